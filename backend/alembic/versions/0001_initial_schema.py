@@ -0,0 +1,84 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+USER_ROLE = sa.Enum("ADMIN", "USER", name="userrole")
+GENRE = sa.Enum("ROCK", "POP", "JAZZ", "CLASSIC", "OTHER", name="genre")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("username", sa.String(50), nullable=False),
+        sa.Column("hashed_password", sa.String(200), nullable=False),
+        sa.Column("role", USER_ROLE, nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+
+    op.create_table(
+        "chords",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("strings_json", sa.String(300)),
+        sa.Column("description", sa.Text()),
+        sa.Column("image_url", sa.String(300)),
+        sa.Column("audio_url", sa.String(300)),
+        sa.Column("created_by", sa.Integer(), sa.ForeignKey("users.id")),
+    )
+    op.create_index("ix_chords_id", "chords", ["id"])
+    op.create_index("ix_chords_name", "chords", ["name"])
+
+    op.create_table(
+        "songs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("title", sa.String(200), nullable=False),
+        sa.Column("lyrics", sa.Text()),
+        sa.Column("genre", GENRE),
+        sa.Column("sheet_url", sa.String(300)),
+        sa.Column("audio_url", sa.String(300)),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("author_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+    )
+    op.create_index("ix_songs_title", "songs", ["title"])
+
+    op.create_table(
+        "song_chords",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("song_id", sa.Integer(), sa.ForeignKey("songs.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("chord_id", sa.Integer(), sa.ForeignKey("chords.id", ondelete="CASCADE"), nullable=False),
+        sa.UniqueConstraint("song_id", "chord_id", name="uq_song_chord"),
+    )
+
+    for table, column, target, constraint in (
+        ("user_songs", "song_id", "songs.id", "uq_user_song"),
+        ("user_chords", "chord_id", "chords.id", "uq_user_chord"),
+    ):
+        op.create_table(
+            table,
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+            sa.Column(column, sa.Integer(), sa.ForeignKey(target, ondelete="CASCADE"), nullable=False),
+            sa.UniqueConstraint("user_id", column, name=constraint),
+        )
+        op.create_index(f"ix_{table}_user_id", table, ["user_id"])
+        op.create_index(f"ix_{table}_{column}", table, [column])
+
+
+def downgrade() -> None:
+    for table in ("user_chords", "user_songs", "song_chords", "songs", "chords", "users"):
+        op.drop_table(table)
+    GENRE.drop(op.get_bind(), checkfirst=True)
+    USER_ROLE.drop(op.get_bind(), checkfirst=True)
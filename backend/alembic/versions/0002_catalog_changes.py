@@ -0,0 +1,51 @@
+"""catalog change log
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "catalog_changes",
+        sa.Column("entity", sa.String(16), primary_key=True),
+        sa.Column("entity_id", sa.Integer(), primary_key=True),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("deleted", sa.Boolean(), nullable=False),
+        sa.Column("changed_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_catalog_changes_version", "catalog_changes", ["version"])
+    op.create_table(
+        "catalog_version",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("horizon", sa.Integer(), nullable=False),
+    )
+    # наявний каталог — як у app.services.catalog_changes.bootstrap: версія на сутність
+    max_song = "(SELECT COALESCE(MAX(id), 0) FROM songs)"
+    max_chord = "(SELECT COALESCE(MAX(id), 0) FROM chords)"
+    op.execute(
+        "INSERT INTO catalog_changes (entity, entity_id, version, deleted, changed_at) "
+        "SELECT 'song', id, id, false, CURRENT_TIMESTAMP FROM songs"
+    )
+    op.execute(
+        "INSERT INTO catalog_changes (entity, entity_id, version, deleted, changed_at) "
+        f"SELECT 'chord', id, {max_song} + id, false, CURRENT_TIMESTAMP FROM chords"
+    )
+    op.execute(
+        "INSERT INTO catalog_version (id, version, horizon) "
+        f"VALUES (1, {max_song} + {max_chord}, 0)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("catalog_version")
+    op.drop_table("catalog_changes")
@@ -0,0 +1,27 @@
+"""catalog_version.chord_version
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("catalog_version") as batch:
+        batch.add_column(
+            sa.Column("chord_version", sa.Integer(), nullable=False, server_default="0")
+        )
+    # воркери, що вже тримають каталог акордів, перечитають його один раз
+    op.execute("UPDATE catalog_version SET chord_version = version")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("catalog_version") as batch:
+        batch.drop_column("chord_version")
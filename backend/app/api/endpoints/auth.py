@@ -1,20 +1,26 @@
 from fastapi import APIRouter, HTTPException, status, Depends, Body
+from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, constr
 from datetime import timedelta
 import re
 
+import anyio
+
 from app.core.database import get_db
+from app.core.hashing import password_hasher
+from app.core.principals import Principal, principal_cache
 from app.models import User, UserRole
 from app.core.security import (
-    hash_password,
-    verify_password,
     create_access_token,
+    decode_token,
     ACCESS_TOKEN_EXPIRE_MINUTES,
 )
 
 router = APIRouter(prefix="", tags=["auth"])
 
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
+
 
 class RegisterIn(BaseModel):
     username: constr(strip_whitespace=True, min_length=3, max_length=50)
@@ -31,18 +37,24 @@ def _validate_password(pwd: str) -> None:
         raise HTTPException(400, "Пароль має містити літери різного регістру та цифру")
 
 
+def _find_user(db: Session, username: str) -> User | None:
+    return db.query(User).filter(User.username == username).first()
+
+
+# async: поки bcrypt рахується в пулі процесів, потік пулу запитів вільний; короткі
+# запити до БД — у потоці, щоб не блокувати event loop
 @router.post("/register")
-def register(data: RegisterIn, db: Session = Depends(get_db)):
+async def register(data: RegisterIn, db: Session = Depends(get_db)):
     _validate_password(data.password)
-    if db.query(User).filter(User.username == data.username).first():
+    if await anyio.to_thread.run_sync(_find_user, db, data.username):
         raise HTTPException(400, "Ім’я зайнято")
     user = User(
         username=data.username,
-        hashed_password=hash_password(data.password),
+        hashed_password=await password_hasher.hash_async(data.password),
         role=data.role or UserRole.USER,
     )
     db.add(user)
-    db.commit()
+    await anyio.to_thread.run_sync(db.commit)
     return {"msg": "Користувача створено"}
 
 
@@ -52,12 +64,39 @@ class LoginIn(BaseModel):
 
 
 @router.post("/login")
-def login(data: LoginIn, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == data.username).first()
-    if not user or not verify_password(data.password, user.hashed_password):
+async def login(data: LoginIn, db: Session = Depends(get_db)):
+    user = await anyio.to_thread.run_sync(_find_user, db, data.username)
+    if not user or not await password_hasher.verify_async(data.password, user.hashed_password):
         raise HTTPException(400, "Невірні дані")
     token = create_access_token(
         {"sub": user.username, "role": user.role.value},
         timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
     )
     return {"access_token": token, "token_type": "bearer"}
+
+
+def _invalid_token() -> HTTPException:
+    return HTTPException(
+        status.HTTP_401_UNAUTHORIZED,
+        "Невалідний токен",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+) -> Principal:
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+    claims = decode_token(token)
+    username = claims.get("sub")
+    user = (
+        db.query(User).filter(User.username == username).first() if username else None
+    )
+    if not user:
+        raise _invalid_token()
+    principal = Principal(user.id, user.username, user.role)
+    principal_cache.put(token, principal, claims.get("exp"))
+    return principal
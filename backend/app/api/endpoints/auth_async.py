@@ -0,0 +1,73 @@
+from fastapi import APIRouter, HTTPException, Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import timedelta
+
+from app.core.database import get_async_db
+from app.core.hashing import password_hasher
+from app.core.principals import Principal, principal_cache
+from app.models import User, UserRole
+from app.core.security import (
+    create_access_token,
+    decode_token,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+)
+from app.api.endpoints.auth import (
+    RegisterIn,
+    LoginIn,
+    oauth2_scheme,
+    _invalid_token,
+    _validate_password,
+)
+
+router = APIRouter(prefix="", tags=["auth"])
+
+
+async def _user_by_username(db: AsyncSession, username: str) -> User | None:
+    res = await db.execute(select(User).where(User.username == username))
+    return res.scalars().first()
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db),
+) -> Principal:
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+    claims = decode_token(token)
+    username = claims.get("sub")
+    user = await _user_by_username(db, username) if username else None
+    if not user:
+        raise _invalid_token()
+    principal = Principal(user.id, user.username, user.role)
+    principal_cache.put(token, principal, claims.get("exp"))
+    return principal
+
+
+@router.post("/register")
+async def register(data: RegisterIn, db: AsyncSession = Depends(get_async_db)):
+    _validate_password(data.password)
+    if await _user_by_username(db, data.username):
+        raise HTTPException(400, "Ім’я зайнято")
+    user = User(
+        username=data.username,
+        # bcrypt навмисно повільний — рахується в пулі процесів, не в event loop
+        hashed_password=await password_hasher.hash_async(data.password),
+        role=data.role or UserRole.USER,
+    )
+    db.add(user)
+    await db.commit()
+    return {"msg": "Користувача створено"}
+
+
+@router.post("/login")
+async def login(data: LoginIn, db: AsyncSession = Depends(get_async_db)):
+    user = await _user_by_username(db, data.username)
+    if not user or not await password_hasher.verify_async(data.password, user.hashed_password):
+        raise HTTPException(400, "Невірні дані")
+    token = create_access_token(
+        {"sub": user.username, "role": user.role.value},
+        timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
+    )
+    return {"access_token": token, "token_type": "bearer"}
@@ -0,0 +1,59 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.encoding import encoded
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.principals import Principal
+from app.api.endpoints.auth import get_current_user
+from app.services.catalog_changes import feed
+from app.services.catalog_snapshot import catalog_snapshot
+
+# лише sync-роутер: у async-режимі main.py однаково підключає його
+router = APIRouter(prefix="/changes", tags=["changes"])
+
+
+@router.get("")
+def catalog_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(settings.page_size_max, ge=1, le=settings.page_size_max),
+    after: Optional[str] = Query(None),
+    db: Session = Depends(get_db),
+    _: Principal = Depends(get_current_user),
+):
+    """
+    Пісні й акорди, змінені після версії ``since`` (актуальний стан), та id
+    видалених. ``more`` — є ще сторінки; наступний запит — ``since=version``
+    і ``after``, якщо він не ``null`` (сторінка обірвалась посеред версії).
+    """
+    cursor = decode_cursor(after, arity=2)
+    changes = feed(db, since, limit, tuple(cursor) if cursor else None)
+    if changes is None:
+        raise HTTPException(410, "Журнал змін стиснуто, синхронізуйтесь з since=0")
+    if changes["after"] is not None:
+        changes["after"] = encode_cursor(*changes["after"])
+    return encoded(changes)
+
+
+@router.get("/snapshot")
+def catalog_snapshot_manifest(response: Response, _: Principal = Depends(get_current_user)):
+    """
+    Готовий знімок каталогу: завантажити ``url`` (gzip NDJSON, кешується назавжди),
+    далі — ``GET /changes?since=version``.
+    """
+    manifest = catalog_snapshot.manifest()
+    if manifest is None:
+        raise HTTPException(404, "Знімок каталогу ще не зібрано")
+    response.headers["Cache-Control"] = "private, no-cache"
+    return encoded(
+        {
+            "version": manifest["version"],
+            "url": f"/media/catalog/{manifest['name']}",
+            "bytes": manifest["bytes"],
+            "built_at": manifest["built_at"],
+        },
+        response,
+    )
@@ -1,9 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Path
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status, Path, Query, Response
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.core.database import get_db
-from app.models import User, UserChord, Chord
+from app.core.encoding import encoded
+from app.core.pagination import StreamFormat, decode_cursor, page, stream_rows
+from app.core.principals import Principal
+from app.models import UserChord
 from app.api.endpoints.auth import get_current_user
+from app.services.chord_catalog import chord_catalog
+from app.api.endpoints.chords import _saved_chord_item, _saved_chords_stmt
 
 router = APIRouter(prefix="/chords", tags=["chords-save"])
 
@@ -12,10 +20,11 @@ router = APIRouter(prefix="/chords", tags=["chords-save"])
 def save_chord(
     chord_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
-    chord = db.query(Chord).filter(Chord.id == chord_id).first()
-    if not chord:
+    from app.services.playable import playable_index
+
+    if not chord_catalog.existing(db, [chord_id]):
         raise HTTPException(404, "Не знайдено")
     if db.query(UserChord).filter(
         UserChord.user_id == user.id, UserChord.chord_id == chord_id
@@ -23,6 +32,7 @@ def save_chord(
         raise HTTPException(400, "Вже додано")
     db.add(UserChord(user_id=user.id, chord_id=chord_id))
     db.commit()
+    playable_index.chord_saved(user.id, chord_id)
     return {"msg": "Додано"}
 
 
@@ -30,8 +40,10 @@ def save_chord(
 def unsave_chord(
     chord_id: int,
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
+    from app.services.playable import playable_index
+
     link = db.query(UserChord).filter(
         UserChord.user_id == user.id, UserChord.chord_id == chord_id
     ).first()
@@ -39,15 +51,22 @@ def unsave_chord(
         raise HTTPException(404, "Не додано")
     db.delete(link)
     db.commit()
+    playable_index.chord_unsaved(user.id, chord_id)
     return {"msg": "Прибрано"}
 
 
 @router.get("/me/saved", status_code=200)
 def my_saved_chords(
+    response: Response,
+    limit: int = Query(settings.page_size, ge=1, le=settings.page_size_max),
+    after: Optional[str] = Query(None),
+    stream: Optional[StreamFormat] = Query(None),
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
-    links = db.query(UserChord).filter(UserChord.user_id == user.id).all()
-    ids = [ln.chord_id for ln in links]
-    chords = db.query(Chord).filter(Chord.id.in_(ids)).all()
-    return [{"id": c.id, "name": c.name} for c in chords]
+    stmt = _saved_chords_stmt(user.id, decode_cursor(after))
+    if stream:
+        return stream_rows(stmt, _saved_chord_item, stream)
+    rows = db.execute(stmt.limit(limit + 1)).all()
+    items = [_saved_chord_item(c) for c in page(response, rows, limit, lambda c: c.link_id)]
+    return encoded(items, response)
@@ -1,9 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, Path
+from typing import List, Optional
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query, Request, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
 
+from app.core.config import settings
 from app.core.database import get_db
-from app.models import User, UserChord, Chord
+from app.core.encoding import encoded
+from app.core.pagination import StreamFormat, decode_cursor, page, stream_rows
+from app.core.principals import Principal
+from app.core.saved import apply_saved_batch, batch_ids
+from app.models import Chord, UserChord
 from app.api.endpoints.auth import get_current_user
+from app.services.chord_catalog import chord_catalog
+from app.services.shapes import parse_shape
 
 router = APIRouter(prefix="/chords", tags=["chords-save"])
 
@@ -12,10 +23,11 @@ router = APIRouter(prefix="/chords", tags=["chords-save"])
 def save_chord(
     chord_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
-    chord = db.query(Chord).filter(Chord.id == chord_id).first()
-    if not chord:
+    from app.services.playable import playable_index
+
+    if not chord_catalog.existing(db, [chord_id]):
         raise HTTPException(404, "Не знайдено")
 
     if db.query(UserChord).filter(
@@ -25,6 +37,7 @@ def save_chord(
 
     db.add(UserChord(user_id=user.id, chord_id=chord_id))
     db.commit()
+    playable_index.chord_saved(user.id, chord_id)
     return {"msg": "Додано"}
 
 
@@ -32,8 +45,10 @@ def save_chord(
 def unsave_chord(
     chord_id: int,
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
+    from app.services.playable import playable_index
+
     link = db.query(UserChord).filter(
         UserChord.user_id == user.id, UserChord.chord_id == chord_id
     ).first()
@@ -41,15 +56,140 @@ def unsave_chord(
         raise HTTPException(404, "Не додано")
     db.delete(link)
     db.commit()
+    playable_index.chord_unsaved(user.id, chord_id)
     return {"msg": "Прибрано"}
 
 
+def _saved_chords_stmt(user_id: int, cursor: Optional[list]) -> Select:
+    stmt = (
+        select(UserChord.id.label("link_id"), UserChord.chord_id, Chord.name)
+        .outerjoin(Chord, Chord.id == UserChord.chord_id)
+        .where(UserChord.user_id == user_id)
+        .order_by(UserChord.id)
+    )
+    if cursor:
+        stmt = stmt.where(UserChord.id > cursor[0])
+    return stmt
+
+
+def _saved_chord_item(c) -> dict:
+    # назва — з того ж запиту: знімок chord_catalog може ще не знати щойно доданого акорду
+    return {"id": c.chord_id, "name": c.name}
+
+
+@router.patch("/me/saved")
+def sync_saved_chords(
+    add: List[int] = Body([]),
+    remove: List[int] = Body([]),
+    db: Session = Depends(get_db),
+    user: Principal = Depends(get_current_user),
+):
+    """Ідемпотентна пакетна синхронізація: ``{"add": [id…], "remove": [id…]}``."""
+    from app.services.playable import playable_index
+
+    add, remove = batch_ids(add, remove)
+    result = apply_saved_batch(db, UserChord, user.id, add, remove)
+    playable_index.forget_user(user.id)
+    return result
+
+
 @router.get("/me/saved")
 def my_saved_chords(
+    response: Response,
+    limit: int = Query(settings.page_size, ge=1, le=settings.page_size_max),
+    after: Optional[str] = Query(None),
+    stream: Optional[StreamFormat] = Query(None),
+    db: Session = Depends(get_db),
+    user: Principal = Depends(get_current_user),
+):
+    stmt = _saved_chords_stmt(user.id, decode_cursor(after))
+    if stream:
+        return stream_rows(stmt, _saved_chord_item, stream)
+    rows = db.execute(stmt.limit(limit + 1)).all()
+    items = [_saved_chord_item(c) for c in page(response, rows, limit, lambda c: c.link_id)]
+    return encoded(items, response)
+
+
+def _shape(frets: str, wildcards: bool = False) -> List[Optional[int]]:
+    try:
+        return parse_shape(frets, wildcards)
+    except ValueError:
+        raise HTTPException(400, "Невірна аплікатура: 6 струн, x — заглушена, напр. x02210")
+
+
+@router.get("/voicings")
+def find_by_voicing(
+    frets: str = Query(..., max_length=64),
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
-    links = db.query(UserChord).filter(UserChord.user_id == user.id).all()
-    ids = [ln.chord_id for ln in links]
-    chords = db.query(Chord).filter(Chord.id.in_(ids)).all()
-    return [{"id": c.id, "name": c.name} for c in chords]
+    """Акорди з точно такою аплікатурою."""
+    from app.services.voicings import voicing_index
+
+    shape = _shape(frets)
+    voicing_index.refresh(db)
+    return voicing_index.exact(shape)
+
+
+@router.get("/voicings/nearest")
+def nearest_voicings(
+    frets: str = Query(..., max_length=64),
+    limit: int = Query(10, ge=1, le=100),
+    max_distance: int = Query(4, ge=0, le=60),
+    open_cost: int = Query(1, ge=0, le=10),
+    mute_cost: int = Query(3, ge=0, le=10),
+    db: Session = Depends(get_db),
+    user: Principal = Depends(get_current_user),
+):
+    """Найближчі аплікатури; ``?`` у ``frets`` — будь-що на цій струні."""
+    from app.services.voicings import voicing_index
+
+    shape = _shape(frets, wildcards=True)
+    voicing_index.refresh(db)
+    return voicing_index.nearest(shape, limit, max_distance, open_cost, mute_cost)
+
+
+@router.get("/voicings/by-name")
+def voicings_by_name(
+    name: str = Query(..., min_length=1, max_length=100),
+    db: Session = Depends(get_db),
+    user: Principal = Depends(get_current_user),
+):
+    from app.services.voicings import voicing_index
+
+    voicing_index.refresh(db)
+    return voicing_index.by_name(name)
+
+
+# ───── catalog ───────────────────────────────────────────────────────────────
+# з пам'яті воркера (chord_catalog), без запиту до БД; /{chord_id} — останнім
+@router.get("")
+def list_chords(
+    request: Request,
+    search: Optional[str] = Query(None, max_length=100),
+    user: Principal = Depends(get_current_user),
+):
+    """Увесь каталог (з ETag) або акорди, назва яких містить ``search``."""
+    if search and search.strip():
+        return encoded(chord_catalog.search(search))
+    return chord_catalog.respond(request.headers)
+
+
+@router.get("/by-name")
+def chords_by_name(
+    name: str = Query(..., min_length=1, max_length=100),
+    user: Principal = Depends(get_current_user),
+):
+    return encoded([c._asdict() for c in chord_catalog.by_name(name)])
+
+
+@router.get("/{chord_id}")
+def chord_details(
+    chord_id: int = Path(..., gt=0),
+    db: Session = Depends(get_db),
+    user: Principal = Depends(get_current_user),
+):
+    chord = chord_catalog.lookup(db, [chord_id]).get(chord_id)
+    if chord is None:
+        raise HTTPException(404, "Не знайдено")
+    return encoded(chord._asdict())
@@ -0,0 +1,97 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import get_async_db
+from app.core.encoding import encoded
+from app.core.pagination import StreamFormat, decode_cursor, page, stream_rows_async
+from app.core.principals import Principal
+from app.core.saved import apply_saved_batch_async, batch_ids
+from app.models import UserChord
+from app.api.endpoints.auth_async import get_current_user
+from app.api.endpoints.chords import _saved_chord_item, _saved_chords_stmt
+from app.services.chord_catalog import chord_catalog
+
+router = APIRouter(prefix="/chords", tags=["chords-save"])
+
+
+async def _link(db: AsyncSession, user_id: int, chord_id: int) -> UserChord | None:
+    res = await db.execute(
+        select(UserChord).where(
+            UserChord.user_id == user_id, UserChord.chord_id == chord_id
+        )
+    )
+    return res.scalars().first()
+
+
+@router.post("/{chord_id}/save")
+async def save_chord(
+    chord_id: int = Path(..., gt=0),
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_user),
+):
+    from app.services.playable import playable_index
+
+    if not await db.run_sync(chord_catalog.existing, [chord_id]):
+        raise HTTPException(404, "Не знайдено")
+
+    if await _link(db, user.id, chord_id):
+        raise HTTPException(400, "Вже додано")
+
+    db.add(UserChord(user_id=user.id, chord_id=chord_id))
+    await db.commit()
+    playable_index.chord_saved(user.id, chord_id)
+    return {"msg": "Додано"}
+
+
+@router.delete("/{chord_id}/save")
+async def unsave_chord(
+    chord_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_user),
+):
+    from app.services.playable import playable_index
+
+    link = await _link(db, user.id, chord_id)
+    if not link:
+        raise HTTPException(404, "Не додано")
+    await db.delete(link)
+    await db.commit()
+    playable_index.chord_unsaved(user.id, chord_id)
+    return {"msg": "Прибрано"}
+
+
+@router.patch("/me/saved")
+async def sync_saved_chords(
+    add: List[int] = Body([]),
+    remove: List[int] = Body([]),
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_user),
+):
+    """Ідемпотентна пакетна синхронізація: ``{"add": [id…], "remove": [id…]}``."""
+    from app.services.playable import playable_index
+
+    add, remove = batch_ids(add, remove)
+    result = await apply_saved_batch_async(db, UserChord, user.id, add, remove)
+    playable_index.forget_user(user.id)
+    return result
+
+
+@router.get("/me/saved")
+async def my_saved_chords(
+    response: Response,
+    limit: int = Query(settings.page_size, ge=1, le=settings.page_size_max),
+    after: Optional[str] = Query(None),
+    stream: Optional[StreamFormat] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_user),
+):
+    stmt = _saved_chords_stmt(user.id, decode_cursor(after))
+    if stream:
+        return stream_rows_async(stmt, _saved_chord_item, stream)
+    rows = (await db.execute(stmt.limit(limit + 1))).all()
+    items = [_saved_chord_item(c) for c in page(response, rows, limit, lambda c: c.link_id)]
+    return encoded(items, response)
@@ -0,0 +1,25 @@
+from fastapi import APIRouter, HTTPException, Request
+
+from app.core.media import MediaResponse
+from app.core.uploads import SONGS_DIR, is_content_addressed
+from app.services.catalog_snapshot import catalog_snapshot
+
+router = APIRouter(prefix="/media", tags=["media"])
+
+
+@router.api_route("/songs/{name}", methods=["GET", "HEAD"])
+def song_media(name: str, request: Request):
+    # .part — недописані завантаження; "/" у {name} не потрапляє
+    path = SONGS_DIR / name
+    if name.startswith(".") or not path.is_file():
+        raise HTTPException(404, "Не знайдено")
+    return MediaResponse(path, request.headers, immutable=is_content_addressed(name))
+
+
+@router.api_route("/catalog/{name}", methods=["GET", "HEAD"])
+def catalog_snapshot_file(name: str, request: Request):
+    # лише знімки (<sha256>.gz): manifest.json і шарди назовні не віддаються
+    path = catalog_snapshot.directory / name
+    if not is_content_addressed(name) or not path.is_file():
+        raise HTTPException(404, "Не знайдено")
+    return MediaResponse(path, request.headers, immutable=True)
@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from starlette.responses import Response
+
+from app.core.metrics import CONTENT_TYPE, registry
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    # без автентифікації: доступ обмежується на рівні мережі (як і для scrape)
+    return Response(registry.render(), media_type=CONTENT_TYPE)
@@ -1,8 +1,10 @@
+import io
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from fastapi import (
     APIRouter,
+    BackgroundTasks,
     Depends,
     HTTPException,
     status,
@@ -11,25 +13,39 @@ from fastapi import (
     Path as FPath,
     UploadFile,
     File,
+    Request,
+    Response,
 )
+from fastapi.responses import JSONResponse
+from sqlalchemy import case, delete, select
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
 
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.encoding import encoded
+from app.core.pagination import StreamFormat, decode_cursor, page, stream_rows
+from app.core.principals import Principal
+from app.core.replicas import pinned
+from app.core.saved import apply_saved_batch, batch_ids
+from app.core.uploads import SONGS_DIR, store_upload
 from app.models import (
+    Chord,
     Song,
     SongChord,
-    Chord,
-    User,
     UserRole,
     Genre,
     UserSong,
 )
 from app.api.endpoints.auth import get_current_user
+from app.services import catalog_changes
+from app.services.chord_catalog import chord_catalog
+from app.services.song_cache import song_cache
+from app.services.song_import import detect_format, import_songs, iter_rows
 
 router = APIRouter(prefix="/songs", tags=["songs"])
 
-STATIC_DIR = Path(__file__).resolve().parents[3] / "static" / "songs"
-STATIC_DIR.mkdir(parents=True, exist_ok=True)
+TRANSPOSE_BATCH_MAX = 100
 
 
 @router.post("", status_code=201)
@@ -39,70 +55,207 @@ def create_song(
     genre: Optional[Genre] = Body(Genre.OTHER),
     chord_ids: List[int] = Body(...),
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
+    from app.services.playable import playable_index
+    from app.services.search import song_index
+    from app.services.similar import similar_index
+
     if user.role != UserRole.ADMIN:
         raise HTTPException(403, "Тільки адміністратор може додавати пісні")
 
-    if db.query(Song).filter(Song.title == title).first():
+    if db.scalar(select(Song.id).where(Song.title == title)):
         raise HTTPException(400, "Пісня з такою назвою вже існує")
 
+    found = chord_catalog.existing(db, chord_ids)
+    if len(found) != len(chord_ids):
+        raise HTTPException(404, "Не всі акорди знайдено")
+
     song = Song(title=title, lyrics=lyrics, genre=genre, author_id=user.id)
     db.add(song)
+    db.flush()
+    song_id = song.id
+    db.add_all(SongChord(song_id=song_id, chord_id=cid) for cid in found)
+    catalog_changes.record(db, catalog_changes.SONG, [song_id])
     db.commit()
-    db.refresh(song)
+    song_index.add(song_id, title, lyrics)
+    playable_index.add_song(song_id, found)
+    similar_index.add_song(song_id, found, genre)
+    return {"id": song_id, "title": title}
 
-    chords = db.query(Chord).filter(Chord.id.in_(chord_ids)).all()
-    if len(chords) != len(chord_ids):
-        raise HTTPException(404, "Не всі акорди знайдено")
 
-    for c in chords:
-        db.add(SongChord(song_id=song.id, chord_id=c.id))
-    db.commit()
-    return {"id": song.id, "title": song.title}
+@router.post("/import")
+def import_songs_file(
+    file: UploadFile = File(...),
+    start_line: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+    user: Principal = Depends(get_current_user),
+):
+    """Масовий імпорт з .ndjson/.csv; повторний виклик зі start_line=checkpoint продовжує імпорт."""
+    if user.role != UserRole.ADMIN:
+        raise HTTPException(403, "Тільки адміністратор може додавати пісні")
+    fmt = detect_format(file.filename)
+    if fmt is None:
+        raise HTTPException(400, "Допустимі .ndjson .jsonl .csv")
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    report = import_songs(
+        db, iter_rows(stream, fmt), user.id, settings.import_batch_size, start_line
+    )
+    return report.as_dict()
+
+
+def _song_item(s) -> dict:
+    return {"id": s.id, "title": s.title, "genre": s.genre.value if s.genre else None}
+
+
+def _ranked_ids(search: str, cursor: Optional[list]) -> Dict[int, int]:
+    from app.services.search import song_index
+
+    # для пошуку курсор — позиція в ранжованому списку, а не id
+    ranked = song_index.search(search, limit=settings.search_max_results)
+    start = cursor[0] + 1 if cursor else 0
+    return {sid: i for i, (sid, _) in enumerate(ranked) if i >= start}
+
+
+def _list_songs_stmt(
+    rank: Optional[Dict[int, int]],
+    genre: Optional[Genre],
+    chord_id: Optional[int],
+    cursor: Optional[list],
+) -> Select:
+    stmt = select(Song.id, Song.title, Song.genre)
+    if rank is not None:
+        stmt = stmt.where(Song.id.in_(rank))
+        if rank:
+            stmt = stmt.order_by(case(rank, value=Song.id))
+    else:
+        if cursor:
+            stmt = stmt.where(Song.id > cursor[0])
+        stmt = stmt.order_by(Song.id)
+    if genre:
+        stmt = stmt.where(Song.genre == genre)
+    if chord_id:
+        stmt = stmt.where(
+            Song.id.in_(select(SongChord.song_id).where(SongChord.chord_id == chord_id))
+        )
+    return stmt
 
 
 @router.get("")
 def list_songs(
+    response: Response,
     search: Optional[str] = Query(None),
     genre: Optional[Genre] = Query(None),
     chord_id: Optional[int] = Query(None),
+    limit: int = Query(settings.page_size, ge=1, le=settings.page_size_max),
+    after: Optional[str] = Query(None),
+    stream: Optional[StreamFormat] = Query(None),
     db: Session = Depends(get_db),
-    _: User = Depends(get_current_user),
+    _: Principal = Depends(get_current_user),
 ):
-    q = db.query(Song)
+    from app.services.search import song_index
+
+    cursor = decode_cursor(after)
+    rank = None
     if search:
-        q = q.filter(Song.title.ilike(f"%{search}%"))
-    if genre:
-        q = q.filter(Song.genre == genre)
-    if chord_id:
-        song_ids = (
-            db.query(SongChord.song_id)
-            .filter(SongChord.chord_id == chord_id)
-            .subquery()
+        song_index.refresh(db)
+        rank = _ranked_ids(search, cursor)
+    stmt = _list_songs_stmt(rank, genre, chord_id, cursor)
+    if stream:
+        return stream_rows(stmt, _song_item, stream)
+    rows = db.execute(stmt.limit(limit + 1)).all()
+    key = (lambda s: rank[s.id]) if rank is not None else (lambda s: s.id)
+    return encoded([_song_item(s) for s in page(response, rows, limit, key)], response)
+
+
+def _saved_songs_stmt(user_id: int, cursor: Optional[list]) -> Select:
+    stmt = (
+        select(UserSong.id.label("link_id"), Song.id, Song.title)
+        .join(Song, Song.id == UserSong.song_id)
+        .where(UserSong.user_id == user_id)
+        .order_by(UserSong.id)
+    )
+    if cursor:
+        stmt = stmt.where(UserSong.id > cursor[0])
+    return stmt
+
+
+def _saved_song_item(s) -> dict:
+    return {"id": s.id, "title": s.title}
+
+
+# /playable і /me/saved оголошено до /{song_id}, інакше вони потрапляють у song_details
+@router.get("/playable")
+def playable_songs(
+    chord_ids: Optional[List[int]] = Query(None),
+    max_missing: int = Query(2, ge=0, le=5),
+    limit: int = Query(50, ge=1, le=settings.page_size_max),
+    db: Session = Depends(get_db),
+    user: Principal = Depends(get_current_user),
+):
+    """Пісні, яким бракує не більше max_missing акордів (типово — зі збережених)."""
+    from app.services.playable import playable_index
+
+    have = chord_ids if chord_ids is not None else playable_index.user_chords(db, user.id)
+    playable_index.refresh(db)
+    hits = playable_index.query(have, max_missing, limit)
+    rows = {
+        s.id: s
+        for s in db.execute(
+            select(Song.id, Song.title, Song.genre).where(Song.id.in_([sid for sid, _ in hits]))
         )
-        q = q.filter(Song.id.in_(song_ids))
+    }
+    # пісні, видалені іншим воркером, індекс ще може повертати — відкидаємо
     return [
-        {"id": s.id, "title": s.title, "genre": s.genre.value if s.genre else None}
-        for s in q.all()
+        {**_song_item(rows[sid]), "missing": len(lacks), "missing_chord_ids": lacks}
+        for sid, lacks in hits
+        if sid in rows
     ]
 
 
-@router.get("/{song_id}")
-def song_details(
-    song_id: int = FPath(..., gt=0),
+@router.patch("/me/saved")
+def sync_saved_songs(
+    add: List[int] = Body([]),
+    remove: List[int] = Body([]),
     db: Session = Depends(get_db),
-    _: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
-    song = db.query(Song).filter(Song.id == song_id).first()
-    if not song:
-        raise HTTPException(404, "Не знайдено")
-    chords = (
-        db.query(Chord)
-        .join(SongChord, SongChord.chord_id == Chord.id)
-        .filter(SongChord.song_id == song.id)
-        .all()
+    """Ідемпотентна пакетна синхронізація: ``{"add": [id…], "remove": [id…]}``."""
+    add, remove = batch_ids(add, remove)
+    return apply_saved_batch(db, UserSong, user.id, add, remove)
+
+
+@router.get("/me/saved")
+def my_saved_songs(
+    response: Response,
+    limit: int = Query(settings.page_size, ge=1, le=settings.page_size_max),
+    after: Optional[str] = Query(None),
+    stream: Optional[StreamFormat] = Query(None),
+    db: Session = Depends(get_db),
+    user: Principal = Depends(get_current_user),
+):
+    stmt = _saved_songs_stmt(user.id, decode_cursor(after))
+    if stream:
+        return stream_rows(stmt, _saved_song_item, stream)
+    rows = db.execute(stmt.limit(limit + 1)).all()
+    items = [_saved_song_item(s) for s in page(response, rows, limit, lambda s: s.link_id)]
+    return encoded(items, response)
+
+
+def _song_detail_stmt(song_id: int) -> Select:
+    # пісня й акорди одним запитом: рядок на кожен акорд (або один з NULL). Назви — з
+    # того ж запиту, а не з chord_catalog: тіло кешується, і застаріла назва жила б у кеші
+    return (
+        select(Song, SongChord.chord_id, Chord.name.label("chord_name"))
+        .outerjoin(SongChord, SongChord.song_id == Song.id)
+        .outerjoin(Chord, Chord.id == SongChord.chord_id)
+        .where(Song.id == song_id)
+        .order_by(SongChord.id)
     )
+
+
+def _song_detail(rows) -> dict:
+    song = rows[0].Song
     return {
         "id": song.id,
         "title": song.title,
@@ -110,23 +263,84 @@ def song_details(
         "genre": song.genre.value if song.genre else None,
         "sheet_url": song.sheet_url,
         "audio_url": song.audio_url,
-        "chords": [{"id": c.id, "name": c.name} for c in chords],
+        "chords": [
+            {"id": r.chord_id, "name": r.chord_name}
+            for r in rows
+            if r.chord_id is not None
+        ],
     }
 
 
+@router.get("/detail-cache")
+def song_detail_cache_stats(user: Principal = Depends(get_current_user)):
+    if user.role != UserRole.ADMIN:
+        raise HTTPException(403, "Недостатньо прав")
+    return song_cache.stats()
+
+
+@router.get("/transpose")
+def transpose_songs(
+    ids: List[int] = Query(...),
+    semitones: int = Query(0, ge=-12, le=12),
+    capo: int = Query(0, ge=0, le=12),
+    db: Session = Depends(get_db),
+    _: Principal = Depends(get_current_user),
+):
+    """Пачка пісень в іншій тональності; відсутні id просто не потрапляють у ``songs``."""
+    from app.services.transpose import effective_shift, transposer
+
+    if len(ids) > TRANSPOSE_BATCH_MAX:
+        raise HTTPException(400, f"Не більше {TRANSPOSE_BATCH_MAX} пісень за запит")
+    shift = effective_shift(semitones, capo)
+    songs = transposer.songs(db, ids, shift)
+    return {"semitones": semitones, "capo": capo, "shift": shift, "songs": songs}
+
+
+@router.get("/{song_id}")
+def song_details(
+    request: Request,
+    song_id: int = FPath(..., gt=0),
+    db: Session = Depends(get_db),
+    _: Principal = Depends(get_current_user),
+):
+    song_cache.refresh(db)
+    generation = song_cache.generation
+    # кеш спільний і наповнюється з реплік — клієнт після запису читає primary напряму
+    body = None if pinned() else song_cache.get(song_id)
+    if body is None:
+        rows = db.execute(_song_detail_stmt(song_id)).all()
+        if not rows:
+            raise HTTPException(404, "Не знайдено")
+        body = song_cache.put(song_id, _song_detail(rows), generation)
+    return song_cache.respond(body, request.headers)
+
+
 @router.delete("/{song_id}")
 def delete_song(
     song_id: int,
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
-    song = db.query(Song).filter(Song.id == song_id).first()
-    if not song:
+    from app.services.playable import playable_index
+    from app.services.search import song_index
+    from app.services.similar import similar_index
+    from app.services.transpose import transposer
+
+    if not db.scalar(select(Song.id).where(Song.id == song_id)):
         raise HTTPException(404, "Не знайдено")
     if user.role != UserRole.ADMIN:
         raise HTTPException(403, "Недостатньо прав")
-    db.delete(song)
+    # зв'язки видаляємо напряму, без завантаження колекцій для ORM-каскаду
+    db.execute(delete(SongChord).where(SongChord.song_id == song_id))
+    db.execute(delete(UserSong).where(UserSong.song_id == song_id))
+    db.execute(delete(Song).where(Song.id == song_id))
+    catalog_changes.record(db, catalog_changes.SONG, [song_id], deleted=True)
     db.commit()
+    song_index.remove(song_id)
+    playable_index.remove_song(song_id)
+    similar_index.remove_song(song_id)
+    song_cache.invalidate([song_id])
+    transposer.forget(song_id)
     return {"msg": "Видалено"}
 
 
@@ -135,7 +349,7 @@ def upload_sheet(
     song_id: int,
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
     if user.role != UserRole.ADMIN:
         raise HTTPException(403, "Недостатньо прав")
@@ -147,20 +361,26 @@ def upload_sheet(
     if ext not in {".png", ".jpg", ".jpeg", ".pdf"}:
         raise HTTPException(400, "Допустимі .png .jpg .jpeg .pdf")
 
-    dst = STATIC_DIR / f"{song_id}_sheet{ext}"
-    dst.write_bytes(file.file.read())
-    song.sheet_url = f"/static/songs/{dst.name}"
+    name = store_upload(
+        file.file, SONGS_DIR, ext, settings.upload_max_bytes, settings.upload_chunk_size
+    )
+    url = song.sheet_url = f"/media/songs/{name}"
+    catalog_changes.record(db, catalog_changes.SONG, [song_id])
     db.commit()
-    return {"sheet_url": song.sheet_url}
+    song_cache.invalidate([song_id])
+    return {"sheet_url": url}
 
 
 @router.post("/{song_id}/upload-audio")
 def upload_audio(
     song_id: int,
+    background: BackgroundTasks,
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
+    from app.services.waveform import build_peaks
+
     if user.role != UserRole.ADMIN:
         raise HTTPException(403, "Недостатньо прав")
     song = db.query(Song).filter(Song.id == song_id).first()
@@ -171,18 +391,111 @@ def upload_audio(
     if ext not in {".mp3", ".wav", ".ogg"}:
         raise HTTPException(400, "Допустимі .mp3 .wav .ogg")
 
-    dst = STATIC_DIR / f"{song_id}_audio{ext}"
-    dst.write_bytes(file.file.read())
-    song.audio_url = f"/static/songs/{dst.name}"
+    name = store_upload(
+        file.file, SONGS_DIR, ext, settings.upload_max_bytes, settings.upload_chunk_size
+    )
+    url = song.audio_url = f"/media/songs/{name}"
+    catalog_changes.record(db, catalog_changes.SONG, [song_id])
     db.commit()
-    return {"audio_url": song.audio_url}
+    song_cache.invalidate([song_id])
+    background.add_task(build_peaks, SONGS_DIR / name)
+    return {"audio_url": url}
+
+
+@router.get("/{song_id}/similar")
+def similar_songs(
+    song_id: int = FPath(..., gt=0),
+    limit: int = Query(10, ge=1, le=100),
+    genre_weight: float = Query(0.0, ge=0.0, le=1.0),
+    db: Session = Depends(get_db),
+    _: Principal = Depends(get_current_user),
+):
+    """Пісні зі схожим набором акордів; ``genre_weight`` — бонус за той самий жанр."""
+    from app.services.similar import similar_index
+
+    similar_index.refresh(db)
+    hits = similar_index.similar(song_id, limit, genre_weight)
+    if hits is None:
+        raise HTTPException(404, "Не знайдено")
+    songs = {
+        s.id: s
+        for s in db.execute(
+            select(Song.id, Song.title, Song.genre).where(Song.id.in_([h[0] for h in hits]))
+        )
+    }
+    return [
+        {
+            "id": sid,
+            "title": songs[sid].title,
+            "genre": songs[sid].genre.value if songs[sid].genre else None,
+            "score": round(score, 4),
+            "jaccard": round(jaccard, 4),
+        }
+        for sid, score, jaccard in hits
+        if sid in songs  # видалена іншим воркером, а індекс ще не знає
+    ]
+
+
+@router.get("/{song_id}/peaks")
+def song_peaks(
+    request: Request,
+    background: BackgroundTasks,
+    song_id: int = FPath(..., gt=0),
+    width: int = Query(1000, ge=1, le=100_000),
+    db: Session = Depends(get_db),
+    _: Principal = Depends(get_current_user),
+):
+    """Рівень хвильової форми з ≥ width точок: int8 min/max парами, метадані — у заголовках."""
+    from app.services.waveform import build_peaks, failed_path, peaks_path, read_level
+
+    audio_url = db.scalar(select(Song.audio_url).where(Song.id == song_id))
+    audio = SONGS_DIR / Path(audio_url or "").name
+    if not audio_url or not audio.is_file():
+        raise HTTPException(404, "Не знайдено")
+    found = read_level(peaks_path(audio), width)
+    if found is None:
+        if failed_path(audio).exists():
+            raise HTTPException(415, "Хвильова форма для цього формату аудіо недоступна")
+        # ще не пораховано (або файл завантажено до появи waveform) — ставимо в чергу
+        background.add_task(build_peaks, audio)
+        return JSONResponse({"msg": "Хвильова форма обробляється"}, status_code=202)
+    meta, data = found
+    etag = f'"{audio.name}-{meta["samples_per_peak"]}"'
+    headers = {
+        "ETag": etag,
+        "X-Sample-Rate": str(meta["sample_rate"]),
+        "X-Frames": str(meta["frames"]),
+        "X-Samples-Per-Peak": str(meta["samples_per_peak"]),
+        "X-Peak-Count": str(meta["peaks"]),
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(data, media_type="application/octet-stream", headers=headers)
+
+
+@router.get("/{song_id}/transpose")
+def transpose_song(
+    song_id: int = FPath(..., gt=0),
+    semitones: int = Query(0, ge=-12, le=12),
+    capo: int = Query(0, ge=0, le=12),
+    db: Session = Depends(get_db),
+    _: Principal = Depends(get_current_user),
+):
+    """Акорди пісні, зсунуті на ``semitones``; з капо — аплікатури на ``semitones - capo``."""
+    from app.services.transpose import effective_shift, transposer
+
+    shift = effective_shift(semitones, capo)
+    chords = transposer.songs(db, [song_id], shift).get(song_id)
+    if chords is None:
+        raise HTTPException(404, "Не знайдено")
+    return {"song_id": song_id, "semitones": semitones, "capo": capo, "shift": shift, "chords": chords}
 
 
 @router.post("/{song_id}/save")
 def save_song(
     song_id: int,
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
     if db.query(UserSong).filter(
         UserSong.user_id == user.id, UserSong.song_id == song_id
@@ -197,7 +510,7 @@ def save_song(
 def unsave_song(
     song_id: int,
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
     link = db.query(UserSong).filter(
         UserSong.user_id == user.id, UserSong.song_id == song_id
@@ -207,14 +520,3 @@ def unsave_song(
     db.delete(link)
     db.commit()
     return {"msg": "Прибрано"}
-
-
-@router.get("/me/saved")
-def my_saved_songs(
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
-):
-    links = db.query(UserSong).filter(UserSong.user_id == user.id).all()
-    ids = [ln.song_id for ln in links]
-    songs = db.query(Song).filter(Song.id.in_(ids)).all()
-    return [{"id": s.id, "title": s.title} for s in songs]
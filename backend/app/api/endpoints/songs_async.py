@@ -0,0 +1,210 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, Path as FPath, Request, Response
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import get_async_db
+from app.core.encoding import encoded
+from app.core.pagination import StreamFormat, decode_cursor, page, stream_rows_async
+from app.core.principals import Principal
+from app.core.replicas import pinned
+from app.core.saved import apply_saved_batch_async, batch_ids
+from app.models import (
+    Song,
+    SongChord,
+    UserRole,
+    Genre,
+    UserSong,
+)
+from app.api.endpoints.auth_async import get_current_user
+from app.api.endpoints.songs import (
+    _list_songs_stmt,
+    _ranked_ids,
+    _saved_song_item,
+    _saved_songs_stmt,
+    _song_detail,
+    _song_detail_stmt,
+    _song_item,
+)
+from app.services import catalog_changes
+from app.services.chord_catalog import chord_catalog
+from app.services.song_cache import song_cache
+
+# Завантаження файлів (upload-sheet / upload-audio) та /playable лишаються у sync-роутері
+# songs.py: main.py підключає його після цього, тож вони й надалі доступні в async-режимі.
+# Шляхи з {song_id:int}, щоб статичні /songs/<назва> не перехоплювались як song_id.
+router = APIRouter(prefix="/songs", tags=["songs"])
+
+
+@router.post("", status_code=201)
+async def create_song(
+    title: str = Body(...),
+    lyrics: Optional[str] = Body(None),
+    genre: Optional[Genre] = Body(Genre.OTHER),
+    chord_ids: List[int] = Body(...),
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_user),
+):
+    from app.services.playable import playable_index
+    from app.services.search import song_index
+    from app.services.similar import similar_index
+
+    if user.role != UserRole.ADMIN:
+        raise HTTPException(403, "Тільки адміністратор може додавати пісні")
+
+    if (await db.execute(select(Song.id).where(Song.title == title))).first():
+        raise HTTPException(400, "Пісня з такою назвою вже існує")
+
+    found = await db.run_sync(chord_catalog.existing, chord_ids)
+    if len(found) != len(chord_ids):
+        raise HTTPException(404, "Не всі акорди знайдено")
+
+    song = Song(title=title, lyrics=lyrics, genre=genre, author_id=user.id)
+    db.add(song)
+    await db.flush()
+    db.add_all(SongChord(song_id=song.id, chord_id=cid) for cid in found)
+    await db.run_sync(catalog_changes.record, catalog_changes.SONG, [song.id])
+    await db.commit()
+    song_index.add(song.id, song.title, song.lyrics)
+    playable_index.add_song(song.id, found)
+    similar_index.add_song(song.id, found, genre)
+    return {"id": song.id, "title": song.title}
+
+
+@router.get("")
+async def list_songs(
+    response: Response,
+    search: Optional[str] = Query(None),
+    genre: Optional[Genre] = Query(None),
+    chord_id: Optional[int] = Query(None),
+    limit: int = Query(settings.page_size, ge=1, le=settings.page_size_max),
+    after: Optional[str] = Query(None),
+    stream: Optional[StreamFormat] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+    _: Principal = Depends(get_current_user),
+):
+    from app.services.search import song_index
+
+    cursor = decode_cursor(after)
+    rank = None
+    if search:
+        await db.run_sync(song_index.refresh)
+        rank = _ranked_ids(search, cursor)
+    stmt = _list_songs_stmt(rank, genre, chord_id, cursor)
+    if stream:
+        return stream_rows_async(stmt, _song_item, stream)
+    rows = (await db.execute(stmt.limit(limit + 1))).all()
+    key = (lambda s: rank[s.id]) if rank is not None else (lambda s: s.id)
+    return encoded([_song_item(s) for s in page(response, rows, limit, key)], response)
+
+
+@router.patch("/me/saved")
+async def sync_saved_songs(
+    add: List[int] = Body([]),
+    remove: List[int] = Body([]),
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_user),
+):
+    """Ідемпотентна пакетна синхронізація: ``{"add": [id…], "remove": [id…]}``."""
+    add, remove = batch_ids(add, remove)
+    return await apply_saved_batch_async(db, UserSong, user.id, add, remove)
+
+
+@router.get("/me/saved")
+async def my_saved_songs(
+    response: Response,
+    limit: int = Query(settings.page_size, ge=1, le=settings.page_size_max),
+    after: Optional[str] = Query(None),
+    stream: Optional[StreamFormat] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_user),
+):
+    stmt = _saved_songs_stmt(user.id, decode_cursor(after))
+    if stream:
+        return stream_rows_async(stmt, _saved_song_item, stream)
+    rows = (await db.execute(stmt.limit(limit + 1))).all()
+    items = [_saved_song_item(s) for s in page(response, rows, limit, lambda s: s.link_id)]
+    return encoded(items, response)
+
+
+@router.get("/{song_id:int}")
+async def song_details(
+    request: Request,
+    song_id: int = FPath(..., gt=0),
+    db: AsyncSession = Depends(get_async_db),
+    _: Principal = Depends(get_current_user),
+):
+    await db.run_sync(song_cache.refresh)
+    generation = song_cache.generation
+    # кеш спільний і наповнюється з реплік — клієнт після запису читає primary напряму
+    body = None if pinned() else song_cache.get(song_id)
+    if body is None:
+        rows = (await db.execute(_song_detail_stmt(song_id))).all()
+        if not rows:
+            raise HTTPException(404, "Не знайдено")
+        body = song_cache.put(song_id, _song_detail(rows), generation)
+    return song_cache.respond(body, request.headers)
+
+
+@router.delete("/{song_id:int}")
+async def delete_song(
+    song_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_user),
+):
+    from app.services.playable import playable_index
+    from app.services.search import song_index
+    from app.services.similar import similar_index
+    from app.services.transpose import transposer
+
+    if not (await db.execute(select(Song.id).where(Song.id == song_id))).first():
+        raise HTTPException(404, "Не знайдено")
+    if user.role != UserRole.ADMIN:
+        raise HTTPException(403, "Недостатньо прав")
+    await db.execute(delete(SongChord).where(SongChord.song_id == song_id))
+    await db.execute(delete(UserSong).where(UserSong.song_id == song_id))
+    await db.execute(delete(Song).where(Song.id == song_id))
+    await db.run_sync(catalog_changes.record, catalog_changes.SONG, [song_id], deleted=True)
+    await db.commit()
+    song_index.remove(song_id)
+    playable_index.remove_song(song_id)
+    similar_index.remove_song(song_id)
+    song_cache.invalidate([song_id])
+    transposer.forget(song_id)
+    return {"msg": "Видалено"}
+
+
+async def _link(db: AsyncSession, user_id: int, song_id: int) -> UserSong | None:
+    res = await db.execute(
+        select(UserSong).where(UserSong.user_id == user_id, UserSong.song_id == song_id)
+    )
+    return res.scalars().first()
+
+
+@router.post("/{song_id:int}/save")
+async def save_song(
+    song_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_user),
+):
+    if await _link(db, user.id, song_id):
+        raise HTTPException(400, "Вже додано")
+    db.add(UserSong(user_id=user.id, song_id=song_id))
+    await db.commit()
+    return {"msg": "Додано"}
+
+
+@router.delete("/{song_id:int}/save")
+async def unsave_song(
+    song_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_user),
+):
+    link = await _link(db, user.id, song_id)
+    if not link:
+        raise HTTPException(404, "Не збережено")
+    await db.delete(link)
+    await db.commit()
+    return {"msg": "Прибрано"}
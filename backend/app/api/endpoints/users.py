@@ -1,30 +1,68 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body, Path
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Path, Query, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
 
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.encoding import encoded
+from app.core.hashing import password_hasher
+from app.core.pagination import StreamFormat, decode_cursor, page, stream_rows
+from app.core.principals import Principal, principal_cache
 from app.models import User, UserRole
 from app.api.endpoints.auth import get_current_user
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
+def _list_users_stmt(cursor: Optional[list]) -> Select:
+    stmt = select(User.id, User.username, User.role, User.created_at).order_by(User.id)
+    if cursor:
+        stmt = stmt.where(User.id > cursor[0])
+    return stmt
+
+
+def _user_item(u) -> dict:
+    return {
+        "id": u.id,
+        "username": u.username,
+        "role": u.role.value,
+        "created": u.created_at.isoformat(),
+    }
+
+
 @router.get("")
 def list_users(
+    response: Response,
+    limit: int = Query(settings.page_size, ge=1, le=settings.page_size_max),
+    after: Optional[str] = Query(None),
+    stream: Optional[StreamFormat] = Query(None),
     db: Session = Depends(get_db),
-    admin: User = Depends(get_current_user),
+    admin: Principal = Depends(get_current_user),
 ):
     if admin.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Недостатньо прав")
-    users = db.query(User).all()
-    return [
-        {
-            "id": u.id,
-            "username": u.username,
-            "role": u.role.value,
-            "created": u.created_at.isoformat(),
-        }
-        for u in users
-    ]
+    stmt = _list_users_stmt(decode_cursor(after))
+    if stream:
+        return stream_rows(stmt, _user_item, stream)
+    rows = db.execute(stmt.limit(limit + 1)).all()
+    return encoded([_user_item(u) for u in page(response, rows, limit, lambda u: u.id)], response)
+
+
+@router.get("/principal-cache")
+def principal_cache_stats(admin: Principal = Depends(get_current_user)):
+    if admin.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Недостатньо прав")
+    return principal_cache.stats()
+
+
+@router.get("/password-hasher")
+def password_hasher_stats(admin: Principal = Depends(get_current_user)):
+    if admin.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Недостатньо прав")
+    return password_hasher.stats()
 
 
 @router.put("/{user_id}/role")
@@ -32,7 +70,7 @@ def set_role(
     user_id: int = Path(..., gt=0),
     new_role: UserRole = Body(...),
     db: Session = Depends(get_db),
-    admin: User = Depends(get_current_user),
+    admin: Principal = Depends(get_current_user),
 ):
     if admin.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Недостатньо прав")
@@ -41,4 +79,5 @@ def set_role(
         raise HTTPException(404, "Користувача не знайдено")
     user.role = new_role
     db.commit()
-    return {"msg": "Роль змінено", "user_id": user.id, "role": user.role.value}
+    principal_cache.invalidate_user(user_id)
+    return {"msg": "Роль змінено", "user_id": user_id, "role": new_role.value}
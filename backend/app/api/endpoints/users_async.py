@@ -0,0 +1,51 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Body, Path, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import get_async_db
+from app.core.encoding import encoded
+from app.core.pagination import StreamFormat, decode_cursor, page, stream_rows_async
+from app.core.principals import Principal, principal_cache
+from app.models import User, UserRole
+from app.api.endpoints.auth_async import get_current_user
+from app.api.endpoints.users import _list_users_stmt, _user_item
+
+router = APIRouter(prefix="/users", tags=["users"])
+
+
+@router.get("")
+async def list_users(
+    response: Response,
+    limit: int = Query(settings.page_size, ge=1, le=settings.page_size_max),
+    after: Optional[str] = Query(None),
+    stream: Optional[StreamFormat] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+    admin: Principal = Depends(get_current_user),
+):
+    if admin.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Недостатньо прав")
+    stmt = _list_users_stmt(decode_cursor(after))
+    if stream:
+        return stream_rows_async(stmt, _user_item, stream)
+    rows = (await db.execute(stmt.limit(limit + 1))).all()
+    return encoded([_user_item(u) for u in page(response, rows, limit, lambda u: u.id)], response)
+
+
+@router.put("/{user_id}/role")
+async def set_role(
+    user_id: int = Path(..., gt=0),
+    new_role: UserRole = Body(...),
+    db: AsyncSession = Depends(get_async_db),
+    admin: Principal = Depends(get_current_user),
+):
+    if admin.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Недостатньо прав")
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(404, "Користувача не знайдено")
+    user.role = new_role
+    await db.commit()
+    principal_cache.invalidate_user(user_id)
+    return {"msg": "Роль змінено", "user_id": user_id, "role": new_role.value}
@@ -0,0 +1,196 @@
+"""
+Контроль допуску: окремий ліміт одночасних запитів на клас маршрутів.
+
+Коли Postgres гальмує, sync-обробники стоять у threadpool за ``get_db`` і
+затримка росте для всіх маршрутів, навіть дешевих; хвиля логінів (bcrypt) чи
+завантажень займає ті самі потоки. Тут кожен клас — ``auth``, ``uploads``,
+``admin``, ``catalog`` — має власний ліміт, а запит понад ліміт одразу
+отримує 503 з ``Retry-After``, не стаючи в чергу. Решта шляхів (``/media``,
+``/static``, ``/metrics``, документація) не обмежується: стрими медіа довгі
+за природою, і їхня тривалість не говорить про перевантаження. З тієї ж причини
+експорт ``?stream=`` (NDJSON/CSV) звільняє слот, щойно надіслано заголовки, і не
+дає відліку затримки: тіло йде зі швидкістю клієнта.
+
+Ліміт підлаштовується за затримкою, як Gradient2 з Netflix concurrency-limits:
+коротке EWMA затримки порівнюється з довгим (базовим); поки коротке не
+перевищує базове більше ніж у ``tolerance`` разів, ліміт росте приблизно на
+√ліміт за оновлення, а коли перевищує — множиться на градієнт ``базове /
+коротке`` (не нижче 0.5). Ліміт не росте, поки клас використовує менше
+половини свого ліміту, — інакше простій роздуває його до максимуму.
+
+Усе працює в event loop, тож без локів (як ``MetricsMiddleware``).
+"""
+import json
+import math
+import re
+import time
+from typing import Dict, List, Optional, Pattern, Sequence, Tuple
+
+from app.core.metrics import Counter, Gauge, registry
+
+ADMISSION_LIMIT = registry.add(Gauge("admission_limit", "Ліміт одночасних запитів", ("class",)))
+ADMISSION_IN_FLIGHT = registry.add(Gauge("admission_in_flight", "Запити в обробці", ("class",)))
+ADMISSION_REJECTED = registry.add(Counter(
+    "admission_rejected_total", "Запити, відхилені з 503 понад ліміт", ("class",),
+))
+
+# те саме тіло, що й у 503 від HTTPException (app.core.hashing)
+OVERLOADED = json.dumps({"detail": "Сервер перевантажений, спробуйте пізніше"}).encode()
+
+
+class GradientLimit:
+    def __init__(
+        self,
+        initial: int,
+        min_limit: int = 1,
+        max_limit: int = 1000,
+        tolerance: float = 1.5,
+        smoothing: float = 0.2,
+        short_window: int = 10,
+        long_window: int = 600,
+    ):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self._short_alpha = 2 / (short_window + 1)
+        self._long_alpha = 2 / (long_window + 1)
+        self.short_rtt = 0.0
+        self.long_rtt = 0.0
+        self.in_flight = 0
+
+    def acquire(self) -> bool:
+        if self.in_flight >= int(self.limit):
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self, seconds: Optional[float]) -> None:
+        """``seconds`` — затримка запиту; None — не враховувати (помилка сервера)."""
+        in_flight = self.in_flight
+        self.in_flight -= 1
+        if seconds is not None:
+            self._update(seconds, in_flight)
+
+    def _update(self, rtt: float, in_flight: int) -> None:
+        if not self.long_rtt:
+            self.short_rtt = self.long_rtt = rtt
+        self.short_rtt += (rtt - self.short_rtt) * self._short_alpha
+        self.long_rtt += (rtt - self.long_rtt) * self._long_alpha
+        # після сплеску базове лишається завищеним — підтягуємо його вниз
+        if self.long_rtt > 2 * self.short_rtt:
+            self.long_rtt *= 0.95
+        if in_flight < self.limit / 2:
+            return
+        gradient = max(0.5, min(1.0, self.tolerance * self.long_rtt / self.short_rtt))
+        target = self.limit * gradient + math.sqrt(self.limit)
+        limit = self.limit * (1 - self.smoothing) + target * self.smoothing
+        self.limit = max(self.min_limit, min(self.max_limit, limit))
+
+
+Rule = Tuple[str, Optional[Sequence[str]], Pattern]
+
+
+def _rule(name: str, methods: Optional[str], pattern: str) -> Rule:
+    return name, methods.split() if methods else None, re.compile(pattern)
+
+
+# перший збіг визначає клас; None у методах — будь-який метод
+RULES: List[Rule] = [
+    _rule("auth", "POST", r"^/(login|register)$"),
+    _rule("uploads", "POST", r"^/songs/\d+/upload-(sheet|audio)$"),
+    _rule("admin", None, r"^/users(/|$)"),
+    _rule("admin", "POST", r"^/songs(/import)?$"),
+    _rule("admin", "DELETE", r"^/songs/\d+$"),
+    _rule("admin", "GET", r"^/songs/detail-cache$"),
+    _rule("catalog", None, r"^/(songs|chords|changes)(/|$)"),
+]
+
+# (початковий, мінімальний, максимальний) ліміт класу
+DEFAULT_LIMITS: Dict[str, Tuple[int, int, int]] = {
+    "auth": (8, 2, 64),
+    "uploads": (4, 1, 16),
+    "admin": (4, 1, 16),
+    "catalog": (32, 4, 512),
+}
+
+
+_STREAM = re.compile(rb"(?:^|&)stream=[^&]")
+
+
+def classify(method: str, path: str, rules: Sequence[Rule] = RULES) -> Optional[str]:
+    for name, methods, pattern in rules:
+        if (methods is None or method in methods) and pattern.match(path):
+            return name
+    return None
+
+
+class AdmissionMiddleware:
+    def __init__(
+        self,
+        app,
+        limits: Optional[Dict[str, Tuple[int, int, int]]] = None,
+        retry_after: int = 1,
+        rules: Sequence[Rule] = RULES,
+    ):
+        self.app = app
+        self.rules = rules
+        self.retry_after = str(retry_after).encode()
+        self.limits = {
+            name: GradientLimit(initial, min_limit, max_limit)
+            for name, (initial, min_limit, max_limit) in (limits or DEFAULT_LIMITS).items()
+        }
+        registry.collectors.append(self._collect)
+
+    def _collect(self) -> None:
+        for name, limit in self.limits.items():
+            ADMISSION_LIMIT.set(int(limit.limit), name)
+            ADMISSION_IN_FLIGHT.set(limit.in_flight, name)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        name = classify(scope["method"], scope["path"], self.rules)
+        limit = self.limits.get(name)
+        if limit is None:
+            return await self.app(scope, receive, send)
+        if not limit.acquire():
+            ADMISSION_REJECTED.inc(name)
+            return await self._reject(send)
+
+        status = 500
+        streaming = bool(_STREAM.search(scope.get("query_string", b"")))
+        released = False
+
+        def release(seconds: Optional[float]) -> None:
+            nonlocal released
+            if not released:
+                released = True
+                limit.release(seconds)
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if streaming:
+                    release(None)
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            release(time.perf_counter() - started if status < 500 else None)
+
+    async def _reject(self, send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(OVERLOADED)).encode()),
+                (b"retry-after", self.retry_after),
+            ],
+        })
+        await send({"type": "http.response.body", "body": OVERLOADED})
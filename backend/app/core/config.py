@@ -9,11 +9,80 @@ class Settings(BaseSettings):
     db_host: str = Field(default="db", env="DB_HOST")
     db_port: int = Field(default=5432, env="DB_PORT")
     db_name: str = Field(default="chords_db", env="DB_NAME")
+    # true — схему веде alembic, воркер лише звіряє ревізію; false — create_all
+    use_alembic: bool = Field(default=False, env="USE_ALEMBIC")
+
+    # ───── connection pool ───────────────────────────────────────────────────────
+    db_async: bool = Field(default=False, env="DB_ASYNC")
+    db_pool_size: int = Field(default=10, env="DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=20, env="DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(default=30.0, env="DB_POOL_TIMEOUT")
+
+    # ───── read replicas ─────────────────────────────────────────────────────────
+    # SQLAlchemy-URL через кому; порожньо — усе читається з primary
+    db_replica_urls: str = Field(default="", env="DB_REPLICA_URLS")
+    # скільки секунд клієнт після свого запису читає з primary
+    db_read_your_writes: float = Field(default=5.0, env="DB_READ_YOUR_WRITES")
+    db_replica_retry: float = Field(default=30.0, env="DB_REPLICA_RETRY")  # с поза ротацією
+
+    # ───── pagination / streaming ───────────────────────────────────────────────
+    page_size: int = Field(default=100, env="PAGE_SIZE")
+    page_size_max: int = Field(default=1000, env="PAGE_SIZE_MAX")
+    stream_batch_size: int = Field(default=500, env="STREAM_BATCH_SIZE")
+
+    # ───── uploads ───────────────────────────────────────────────────────────────
+    upload_max_bytes: int = Field(default=50 * 1024 * 1024, env="UPLOAD_MAX_BYTES")
+    upload_chunk_size: int = Field(default=1024 * 1024, env="UPLOAD_CHUNK_SIZE")
+
+    # ───── song detail cache ─────────────────────────────────────────────────────
+    song_cache_max_bytes: int = Field(default=32 * 1024 * 1024, env="SONG_CACHE_MAX_BYTES")
+    song_cache_ttl: float = Field(default=300.0, env="SONG_CACHE_TTL")
+    song_cache_url: str = Field(default="", env="SONG_CACHE_URL")  # redis://… — спільний кеш
+
+    # ───── search ────────────────────────────────────────────────────────────────
+    search_max_results: int = Field(default=500, env="SEARCH_MAX_RESULTS")
+    # MinHash-підписи «схожих пісень»; порожньо — перебудова з БД на кожному старті
+    similar_index_path: str = Field(default="data/similar_songs.npz", env="SIMILAR_INDEX_PATH")
+    # індекси пісень і аплікатур будуються у фоні після старту воркера; false — першим
+    # запитом, якому вони потрібні
+    index_warm_up: bool = Field(default=True, env="INDEX_WARM_UP")
+
+    # ───── catalog change feed ───────────────────────────────────────────────────
+    # надгробки видалених пісень/акордів у GET /changes; старші прибирає старт і збирання знімка
+    changes_tombstone_days: float = Field(default=30.0, env="CHANGES_TOMBSTONE_DAYS")
+    # знімок каталогу (static/catalog): як часто перевіряти версію, с; 0 — не збирати
+    catalog_snapshot_interval: float = Field(default=30.0, env="CATALOG_SNAPSHOT_INTERVAL")
+    catalog_snapshot_shard: int = Field(default=1000, env="CATALOG_SNAPSHOT_SHARD")  # пісень
+    # каталог акордів у пам'яті: як часто звіряти chord_version з БД, с; 0 — лише раз після старту
+    chord_catalog_poll: float = Field(default=5.0, env="CHORD_CATALOG_POLL")
+
+    # ───── response encoding ─────────────────────────────────────────────────────
+    compress_min_bytes: int = Field(default=1024, env="COMPRESS_MIN_BYTES")  # 0 — не стискати
+
+    # ───── bulk import ───────────────────────────────────────────────────────────
+    import_batch_size: int = Field(default=1000, env="IMPORT_BATCH_SIZE")
+
+    # ───── diagnostics ───────────────────────────────────────────────────────────
+    debug_sql: bool = Field(default=False, env="DEBUG_SQL")  # X-DB-Queries / X-DB-Time-Ms
+    metrics_enabled: bool = Field(default=True, env="METRICS_ENABLED")  # GET /metrics
+
+    # ───── admission control ─────────────────────────────────────────────────────
+    admission_enabled: bool = Field(default=True, env="ADMISSION_ENABLED")  # 503 понад ліміт класу
+    admission_retry_after: int = Field(default=1, env="ADMISSION_RETRY_AFTER")  # с
 
     # ───── security ──────────────────────────────────────────────────────────────
     secret_key: str = Field(env="SECRET_KEY")
     algorithm: str = Field(default="HS256", env="ALGORITHM")
     access_token_expire_minutes: int = Field(default=30, env="ACCESS_TOKEN_EXPIRE_MINUTES")
+    principal_cache_ttl: float = Field(default=60.0, env="PRINCIPAL_CACHE_TTL")
+    principal_cache_size: int = Field(default=10_000, env="PRINCIPAL_CACHE_SIZE")  # 0 — вимкнено
+    # адміністратори — коротше: зняття ролі інші воркери бачать за секунди
+    principal_cache_admin_ttl: float = Field(default=5.0, env="PRINCIPAL_CACHE_ADMIN_TTL")
+    # процесів bcrypt на воркер; 0 — ядра / WEB_CONCURRENCY, щоб воркери разом не брали
+    # ядра × воркери процесів
+    hash_workers: int = Field(default=0, env="HASH_WORKERS")
+    web_concurrency: int = Field(default=1, env="WEB_CONCURRENCY")  # воркерів uvicorn
+    hash_queue_size: int = Field(default=16, env="HASH_QUEUE_SIZE")
 
     class Config:
         env_file = ".env"
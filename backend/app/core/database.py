@@ -1,25 +1,103 @@
+from typing import AsyncIterator, Iterator
+
 from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.models import Base  # єдина декларативна база: моделі реєструються саме в ній
 
 from .config import settings
+from .metrics import TimedAsyncQueuePool, TimedQueuePool, watch_pools
+from .replicas import RoutingSession, replica_set
 
 # ───── SQLAlchemy core setup ────────────────────────────────────────────────────
 DATABASE_URL = (
     f"postgresql+psycopg2://{settings.db_user}:{settings.db_password}"
     f"@{settings.db_host}:{settings.db_port}/{settings.db_name}"
 )
+ASYNC_DATABASE_URL = DATABASE_URL.replace("+psycopg2", "+asyncpg", 1)
+
+POOL_OPTIONS = dict(
+    pool_pre_ping=True,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+)
+
+engine = create_engine(DATABASE_URL, poolclass=TimedQueuePool, **POOL_OPTIONS)
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
+
+# ───── async mode (DB_ASYNC=true) ──────────────────────────────────────────────
+# asyncpg імпортується лише коли режим увімкнено, щоб sync-деплой його не потребував
+async_engine = (
+    create_async_engine(ASYNC_DATABASE_URL, poolclass=TimedAsyncQueuePool, **POOL_OPTIONS)
+    if settings.db_async
+    else None
+)
+AsyncSessionLocal = (
+    async_sessionmaker(
+        async_engine, sync_session_class=RoutingSession, autoflush=False, expire_on_commit=False
+    )
+    if async_engine is not None
+    else None
+)
+
+# ───── read replicas (DB_REPLICA_URLS) ─────────────────────────────────────────
+# маршрутизація — app/core/replicas.py; без реплік RoutingSession завжди читає з primary
+for _n, _url in enumerate(u.strip() for u in settings.db_replica_urls.split(",") if u.strip()):
+    replica_set.add(
+        f"replica{_n}",
+        create_engine(_url, poolclass=TimedQueuePool, **POOL_OPTIONS),
+        create_async_engine(
+            _url.replace("+psycopg2", "+asyncpg", 1), poolclass=TimedAsyncQueuePool, **POOL_OPTIONS
+        )
+        if settings.db_async
+        else None,
+    )
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
+
+def _pools():
+    # глобальні імена, а не захоплені об'єкти: тести й бенчмарки підміняють engine
+    yield "sync", engine.pool
+    if async_engine is not None:
+        yield "async", async_engine.sync_engine.pool
+    yield from replica_set.pools()
+
+
+watch_pools(_pools)
+
+
+def get_db() -> Iterator[Session]:
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async DB mode is disabled (set DB_ASYNC=true)")
+    async with AsyncSessionLocal() as db:
+        yield db
 
 
 # ───── helper for FastAPI lifespan / startup ───────────────────────────────────
 def init_db() -> None:
     """
-    Импортируем модели → создаём таблицы, если их нет.
-    Вызывать из ``app/main.py`` в событии ``startup``.
+    Викликається з ``startup`` кожного воркера. ``USE_ALEMBIC=true`` — лише
+    звіряє ревізію БД з head міграцій (``app/core/schema.py``), інакше
+    створює відсутні таблиці.
     """
-    from app import models  # noqa: WPS433  (локальный импорт, чтобы избежать циклов)
+    if settings.use_alembic:
+        from .schema import check_schema
+
+        check_schema(engine)
+    else:
+        Base.metadata.create_all(bind=engine)
+
 
-    Base.metadata.create_all(bind=engine)
+async def dispose_async_engine() -> None:
+    if async_engine is not None:
+        await async_engine.dispose()
+    await replica_set.dispose()
@@ -0,0 +1,189 @@
+"""
+bcrypt в окремому пулі процесів.
+
+``hash_password`` / ``verify_password`` навмисно важкі для CPU: якщо рахувати
+їх прямо в обробниках, хвиля логінів займає весь threadpool і GIL, і звичайні
+``GET /songs`` стоять у черзі за ними. Пул процесів розміром з кількість ядер
+ізолює цю роботу, а обмежена черга не дає їй накопичуватись: коли в пулі вже
+``workers + HASH_QUEUE_SIZE`` завдань, запит одразу отримує 503.
+
+Пул є в кожному воркері uvicorn, тож типово він бере ``ядра / WEB_CONCURRENCY``
+процесів — разом воркери займають усі ядра, а не ядра × воркери. Якщо процес
+пулу вбито (OOM), пул зламаний назавжди: його завдання отримують 503, а
+наступне створює новий пул. Черга, відмови й квантилі затримки — на ``/metrics``.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge, registry
+from app.core.security import hash_password, verify_password
+
+HASH_QUEUE = registry.add(Gauge("password_hash_queue_depth", "Завдання bcrypt у пулі та черзі"))
+HASH_REJECTED = registry.add(Counter(
+    "password_hash_rejected_total", "Завдання bcrypt, відхилені з 503",
+))
+HASH_RESTARTS = registry.add(Counter(
+    "password_hash_pool_restarts_total", "Перезапуски зламаного пулу bcrypt",
+))
+HASH_LATENCY = registry.add(Gauge(
+    "password_hash_latency_ms", "Квантилі затримки bcrypt, мс (total — з очікуванням у черзі)",
+    ("stage", "quantile"),
+))
+
+
+def _overloaded() -> HTTPException:
+    return HTTPException(
+        503, "Сервер перевантажений, спробуйте пізніше", headers={"Retry-After": "1"}
+    )
+
+
+def _timed(fn, *args):
+    # виконується у воркері: повертає і результат, і чистий час bcrypt
+    started = time.perf_counter()
+    return fn(*args), time.perf_counter() - started
+
+
+class PasswordHasher:
+    def __init__(
+        self,
+        workers: int = 0,
+        queue_size: int = 16,
+        latency_window: int = 1000,
+        web_workers: int = 1,
+    ):
+        self.workers = workers or max(1, (os.cpu_count() or 1) // max(1, web_workers))
+        self.max_pending = self.workers + queue_size
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.restarts = 0
+        self._hash_ms: deque = deque(maxlen=latency_window)  # лише bcrypt
+        self._total_ms: deque = deque(maxlen=latency_window)  # з очікуванням у черзі
+
+    def start(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn, а не fork: батьківський процес багатопотоковий
+                self._pool = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def _restart(self, pool: ProcessPoolExecutor) -> None:
+        # зламаний пул не приймає завдань — відкидаємо; новий створить наступний start
+        with self._lock:
+            if self._pool is not pool:
+                return  # інший потік уже замінив
+            self._pool = None
+            self.restarts += 1
+        HASH_RESTARTS.inc()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    def _submit(self, fn, *args) -> Future:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                HASH_REJECTED.inc()
+                raise _overloaded()
+            self._pending += 1
+        submitted = time.perf_counter()
+        try:
+            pool = self.start()
+            try:
+                inner = pool.submit(_timed, fn, *args)
+            except BrokenProcessPool:  # зламався між завданнями — одна спроба з новим пулом
+                self._restart(pool)
+                pool = self.start()
+                inner = pool.submit(_timed, fn, *args)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+        outer: Future = Future()
+
+        def done(f: Future) -> None:
+            with self._lock:
+                self._pending -= 1
+            error = f.exception()
+            if isinstance(error, BrokenProcessPool):
+                self._restart(pool)
+                with self._lock:
+                    self.rejected += 1
+                HASH_REJECTED.inc()
+                outer.set_exception(_overloaded())
+                return
+            if error is not None:
+                outer.set_exception(error)
+                return
+            result, seconds = f.result()
+            with self._lock:
+                self.completed += 1
+                self._hash_ms.append(seconds * 1000)
+                self._total_ms.append((time.perf_counter() - submitted) * 1000)
+            outer.set_result(result)
+
+        inner.add_done_callback(done)
+        return outer
+
+    # ───── API ───────────────────────────────────────────────────────────────
+    def hash(self, password: str) -> str:
+        return self._submit(hash_password, password).result()
+
+    def verify(self, password: str, hashed: str) -> bool:
+        return self._submit(verify_password, password, hashed).result()
+
+    async def hash_async(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(hash_password, password))
+
+    async def verify_async(self, password: str, hashed: str) -> bool:
+        return await asyncio.wrap_future(self._submit(verify_password, password, hashed))
+
+    def stats(self) -> dict:
+        with self._lock:
+            hash_ms, total_ms = sorted(self._hash_ms), sorted(self._total_ms)
+            out = {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "queue_depth": self._pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "restarts": self.restarts,
+            }
+        for name, values in (("hash_ms", hash_ms), ("total_ms", total_ms)):
+            out[name] = {
+                q: round(values[min(len(values) - 1, int(p * len(values)))], 2) if values else None
+                for q, p in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))
+            }
+        return out
+
+    def _collect(self) -> None:
+        stats = self.stats()
+        HASH_QUEUE.set(stats["queue_depth"])
+        for stage in ("hash", "total"):
+            for quantile, ms in stats[f"{stage}_ms"].items():
+                if ms is not None:
+                    HASH_LATENCY.set(ms, stage, quantile)
+
+
+password_hasher = PasswordHasher(
+    settings.hash_workers, settings.hash_queue_size, web_workers=settings.web_concurrency
+)
+registry.collectors.append(password_hasher._collect)
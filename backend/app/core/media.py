@@ -0,0 +1,207 @@
+"""
+Віддача медіафайлів: HTTP Range / 206, сильні ETag, умовні запити.
+
+ETag — SHA-256 вмісту. Для контентно-адресованих файлів (``<sha256>.<ext>``,
+див. ``app.core.uploads``) він береться з імені без читання файлу, для
+старих (``12_audio.wav``) рахується один раз і кешується за (шлях, mtime, розмір).
+
+Тіло віддається через ASGI-розширення ``http.response.zerocopysend``
+(sendfile), якщо сервер його пропонує; інакше — шматками через ``os.pread``
+у потоці, без завантаження файлу в пам'ять.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+import secrets
+from email.utils import formatdate, parsedate_to_datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Mapping, Optional, Tuple
+
+import anyio
+from starlette.responses import Response
+
+from app.core.uploads import is_content_addressed
+
+CHUNK_SIZE = 256 * 1024
+MAX_RANGES = 16  # більше — ігноруємо Range і віддаємо файл цілком
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, no-cache"
+
+_RANGE_RE = re.compile(r"^\s*(\d*)\s*-\s*(\d*)\s*$")
+
+Span = Tuple[int, int]  # [start, end)
+
+
+@lru_cache(maxsize=4096)
+def _content_hash(path: str, mtime_ns: int, size: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_etag(path: Path, stat: os.stat_result) -> str:
+    if is_content_addressed(path.name):
+        digest = path.name.partition(".")[0]
+    else:
+        digest = _content_hash(str(path), stat.st_mtime_ns, stat.st_size)
+    return f'"{digest}"'
+
+
+def parse_ranges(header: str, size: int) -> Optional[List[Span]]:
+    """
+    ``None`` — заголовок невалідний і ігнорується (віддаємо 200),
+    ``[]`` — жоден діапазон не перетинає файл (416).
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes":
+        return None
+    spans = []
+    for part in spec.split(","):
+        m = _RANGE_RE.match(part)
+        if not m or m.groups() == ("", ""):
+            return None
+        first, last = m.groups()
+        if not first:  # суфікс: останні N байтів
+            if int(last) == 0:
+                continue
+            spans.append((max(size - int(last), 0), size))
+            continue
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        if start < size:
+            spans.append((start, min(int(last) + 1, size) if last else size))
+    return spans if len(spans) <= MAX_RANGES else None
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # If-None-Match порівнює слабко: W/"x" == "x"
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or etag in (t[2:] if t.startswith("W/") else t for t in tags)
+
+
+def _not_modified_since(header: str, mtime: float) -> bool:
+    try:
+        return int(mtime) <= parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+class MediaResponse(Response):
+    def __init__(
+        self,
+        path: Path,
+        request_headers: Mapping[str, str],
+        immutable: bool = False,
+    ):
+        stat = path.stat()
+        size = stat.st_size
+        etag = file_etag(path, stat)
+        last_modified = formatdate(stat.st_mtime, usegmt=True)
+        content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+
+        self.path = path
+        self.background = None
+        self.spans: List[Span] = []
+        self.parts: List[Tuple[bytes, Span]] = []  # (заголовок частини, діапазон)
+        self.epilogue = b""
+        headers = {
+            "etag": etag,
+            "last-modified": last_modified,
+            "accept-ranges": "bytes",
+            "cache-control": IMMUTABLE if immutable else REVALIDATE,
+        }
+
+        inm = request_headers.get("if-none-match")
+        ims = request_headers.get("if-modified-since")
+        if (inm is not None and _etag_matches(inm, etag)) or (
+            inm is None and ims is not None and _not_modified_since(ims, stat.st_mtime)
+        ):
+            self.status_code = 304
+            self.init_headers(headers)
+            return
+
+        spans = None
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        if range_header and (if_range is None or if_range.strip() in (etag, last_modified)):
+            spans = parse_ranges(range_header, size)
+
+        if spans is None:
+            self.status_code = 200
+            self.spans = [(0, size)]
+            headers.update({"content-type": content_type, "content-length": str(size)})
+        elif not spans:
+            self.status_code = 416
+            headers.update({"content-range": f"bytes */{size}", "content-length": "0"})
+        elif len(spans) == 1:
+            (start, end), = spans
+            self.status_code = 206
+            self.spans = spans
+            headers.update({
+                "content-type": content_type,
+                "content-length": str(end - start),
+                "content-range": f"bytes {start}-{end - 1}/{size}",
+            })
+        else:
+            boundary = secrets.token_hex(12)
+            self.status_code = 206
+            self.parts = [
+                (
+                    f"--{boundary}\r\nContent-Type: {content_type}\r\n"
+                    f"Content-Range: bytes {start}-{end - 1}/{size}\r\n\r\n".encode(),
+                    (start, end),
+                )
+                for start, end in spans
+            ]
+            self.epilogue = f"--{boundary}--\r\n".encode()
+            length = sum(len(h) + (e - s) + 2 for h, (s, e) in self.parts) + len(self.epilogue)
+            headers.update({
+                "content-type": f"multipart/byteranges; boundary={boundary}",
+                "content-length": str(length),
+            })
+        self.init_headers(headers)
+
+    async def __call__(self, scope, receive, send) -> None:
+        await send(
+            {"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers}
+        )
+        if scope["method"] == "HEAD" or not (self.spans or self.parts):
+            await send({"type": "http.response.body", "body": b""})
+            return
+        zerocopy = "http.response.zerocopysend" in scope.get("extensions", {})
+        with open(self.path, "rb") as f:
+            if self.parts:
+                for header, span in self.parts:
+                    await send({"type": "http.response.body", "body": header, "more_body": True})
+                    await self._send_span(send, f, span, zerocopy)
+                    await send({"type": "http.response.body", "body": b"\r\n", "more_body": True})
+                await send({"type": "http.response.body", "body": self.epilogue})
+                return
+            await self._send_span(send, f, self.spans[0], zerocopy)
+            await send({"type": "http.response.body", "body": b""})
+
+    @staticmethod
+    async def _send_span(send, f, span: Span, zerocopy: bool) -> None:
+        start, end = span
+        if zerocopy:
+            await send({
+                "type": "http.response.zerocopysend",
+                "file": f,
+                "offset": start,
+                "count": end - start,
+                "more_body": True,
+            })
+            return
+        fd = f.fileno()
+        while start < end:
+            n = min(CHUNK_SIZE, end - start)
+            chunk = await anyio.to_thread.run_sync(os.pread, fd, n, start)
+            if not chunk:
+                break
+            start += len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
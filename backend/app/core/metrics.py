@@ -0,0 +1,241 @@
+"""
+Метрики у форматі Prometheus (text 0.0.4) без зовнішніх залежностей.
+
+* ``MetricsMiddleware`` — гістограми тривалості й розміру відповіді за
+  (метод, шаблон маршруту, статус) і кількість запитів у обробці. Шаблон
+  (``/songs/{song_id}``) береться з ``scope["route"]`` після маршрутизації,
+  тож кількість серій не залежить від id у шляху.
+* ``TimedQueuePool`` / ``TimedAsyncQueuePool`` — пули SQLAlchemy, що міряють
+  очікування вільного з'єднання; стан пулу (зайнято, overflow) читається в
+  момент scrape, а тривалість SQL-запитів — подіями ``Engine``.
+
+Спостереження — це bisect і кілька інкрементів під локом, рендер — лише при
+зверненні до ``/metrics``; вартість на запит див. ``benchmarks/metrics.py``.
+Кожен воркер uvicorn має власні лічильники: Prometheus має опитувати воркери
+окремо або агрегувати за ``instance``.
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+SIZE_BUCKETS = tuple(float(4 ** i * 64) for i in range(10))  # 64 B … 16 MiB
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # на кожну серію: [лічильники по кошиках (+Inf останній), сума, кількість]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(labels)
+            if s is None:
+                s = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            s[0][i] += 1
+            s[1] += value
+            s[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = [(k, list(v[0]), v[1], v[2]) for k, v in self._series.items()]
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, counts, total, count in sorted(series):
+            acc = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                acc += n
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{_num(bound)}"'
+                out.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {acc}")
+            out.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_num(total)}")
+            out.append(f"{self.name}_count{_labels(self.label_names, labels)} {count}")
+        return out
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        out += [f"{self.name}{_labels(self.label_names, k)} {_num(v)}" for k, v in values]
+        return out
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: list = []
+        self.collectors: List[Callable[[], None]] = []  # оновлюють gauge перед рендером
+
+    def add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        for collect in self.collectors:
+            collect()
+        return "\n".join(line for m in self.metrics for line in m.render()) + "\n"
+
+
+registry = Registry()
+
+REQUEST_SECONDS = registry.add(Histogram(
+    "http_request_duration_seconds", "Тривалість обробки запиту",
+    ("method", "route", "status"), LATENCY_BUCKETS,
+))
+RESPONSE_BYTES = registry.add(Histogram(
+    "http_response_size_bytes", "Розмір тіла відповіді", ("method", "route"), SIZE_BUCKETS,
+))
+IN_FLIGHT = registry.add(Gauge("http_requests_in_flight", "Запити в обробці"))
+QUERY_SECONDS = registry.add(Histogram(
+    "db_query_duration_seconds", "Тривалість SQL-запиту", (), QUERY_BUCKETS,
+))
+POOL_WAIT = registry.add(Histogram(
+    "db_pool_checkout_wait_seconds", "Очікування з'єднання з пулу", ("pool",), LATENCY_BUCKETS,
+))
+POOL_TIMEOUTS = registry.add(Counter(
+    "db_pool_checkout_timeouts_total", "Запити, що не дочекались з'єднання", ("pool",),
+))
+POOL_CHECKED_OUT = registry.add(Gauge("db_pool_checked_out", "Видані з'єднання", ("pool",)))
+POOL_OVERFLOW = registry.add(Gauge(
+    "db_pool_overflow", "З'єднання понад pool_size (від'ємне — ще не відкриті)", ("pool",),
+))
+POOL_SIZE = registry.add(Gauge("db_pool_size", "Налаштований pool_size", ("pool",)))
+
+
+# ───── HTTP ──────────────────────────────────────────────────────────────────
+class MetricsMiddleware:
+    def __init__(self, app, path: str = "/metrics"):
+        self.app = app
+        self.path = path
+        # лише з event loop — без локу; у gauge переноситься при scrape
+        self.in_flight = 0
+        registry.collectors.append(lambda: IN_FLIGHT.set(self.in_flight))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == self.path:
+            return await self.app(scope, receive, send)
+
+        status = 500
+        size = 0
+
+        async def send_with_metrics(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            elif message["type"] == "http.response.zerocopysend":
+                size += message.get("count") or 0
+            await send(message)
+
+        self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.in_flight -= 1
+            route = scope.get("route")
+            # шлях без маршруту (404, static) не стає окремою серією
+            template = getattr(route, "path", None) or "<unmatched>"
+            REQUEST_SECONDS.observe(elapsed, scope["method"], template, str(status))
+            RESPONSE_BYTES.observe(size, scope["method"], template)
+
+
+# ───── DB ────────────────────────────────────────────────────────────────────
+class _TimedGet:
+    metrics_label = "sync"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeout:
+            POOL_TIMEOUTS.inc(self.metrics_label)
+            raise
+        finally:
+            POOL_WAIT.observe(time.perf_counter() - started, self.metrics_label)
+
+
+class TimedQueuePool(_TimedGet, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedGet, AsyncAdaptedQueuePool):
+    metrics_label = "async"
+
+
+def watch_pools(pools: Callable[[], Iterable[Tuple[str, Pool]]]) -> None:
+    """``pools()`` викликається на кожен scrape: ``(мітка, пул)`` поточних рушіїв."""
+
+    def collect() -> None:
+        for label, pool in pools():
+            if isinstance(pool, QueuePool):
+                POOL_CHECKED_OUT.set(pool.checkedout(), label)
+                POOL_OVERFLOW.set(pool.overflow(), label)
+                POOL_SIZE.set(pool.size(), label)
+
+    registry.collectors.append(collect)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _query_started(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _query_finished(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_metrics_started", None)
+    if started is not None:
+        QUERY_SECONDS.observe(time.perf_counter() - started)
@@ -0,0 +1,114 @@
+import base64
+import json
+from enum import Enum
+from typing import Any, AsyncIterator, Callable, Iterable, Iterator, List, Optional
+
+from fastapi import HTTPException, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.sql import Select
+
+from .config import settings
+from .encoding import json_bytes
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+_KEY_MAX = 2**31 - 1  # Integer-колонки id; більше — помилка драйвера замість 400
+
+
+class StreamFormat(str, Enum):
+    NDJSON = "ndjson"
+    JSON = "json"  # один JSON-масив, що віддається шматками
+
+
+# ───── opaque cursor ────────────────────────────────────────────────────────────
+def encode_cursor(*values: Any) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _is_key(value: Any) -> bool:
+    # ключі сторінок — id або позиція в ранжованому списку; bool — теж int, але не ключ
+    return isinstance(value, int) and not isinstance(value, bool) and 0 <= value <= _KEY_MAX
+
+
+def decode_cursor(cursor: Optional[str], arity: int = 1) -> Optional[list]:
+    if cursor is None:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        values = None
+    if not isinstance(values, list) or len(values) != arity or not all(map(_is_key, values)):
+        raise HTTPException(400, "Невалідний курсор")
+    return values
+
+
+def page(
+    response: Response,
+    rows: List[Any],
+    limit: int,
+    key: Callable[[Any], Any],
+) -> List[Any]:
+    """
+    ``rows`` вибрано з ``limit + 1``: зайвий рядок означає, що є наступна сторінка.
+    Курсор наступної сторінки кладемо в заголовок, тіло лишається списком.
+    """
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(key(rows[-1]))
+    return rows
+
+
+# ───── streaming (server-side cursor) ───────────────────────────────────────────
+def _encode_stream(items: Iterable[dict], fmt: StreamFormat) -> Iterator[bytes]:
+    if fmt is StreamFormat.NDJSON:
+        for item in items:
+            yield json_bytes(item) + b"\n"
+        return
+    sep = b"["
+    for item in items:
+        yield sep + json_bytes(item)
+        sep = b","
+    yield b"[]" if sep == b"[" else b"]"
+
+
+def _media_type(fmt: StreamFormat) -> str:
+    return "application/x-ndjson" if fmt is StreamFormat.NDJSON else "application/json"
+
+
+def stream_rows(stmt: Select, serialize: Callable[[Any], dict], fmt: StreamFormat) -> StreamingResponse:
+    """
+    Віддає результат ``stmt`` потоком: рядки читаються пачками з серверного курсора
+    у власній сесії (сесія з ``get_db`` може закритися раніше, ніж завершиться стрім).
+    """
+    from .database import SessionLocal
+
+    def rows() -> Iterator[dict]:
+        with SessionLocal() as db:
+            result = db.execute(stmt.execution_options(yield_per=settings.stream_batch_size))
+            for row in result:
+                yield serialize(row)
+
+    return StreamingResponse(_encode_stream(rows(), fmt), media_type=_media_type(fmt))
+
+
+def stream_rows_async(
+    stmt: Select, serialize: Callable[[Any], dict], fmt: StreamFormat
+) -> StreamingResponse:
+    from .database import AsyncSessionLocal
+
+    async def body() -> AsyncIterator[bytes]:
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(stmt.execution_options(yield_per=settings.stream_batch_size))
+            items = (serialize(row) async for row in result)
+            sep = b"["
+            async for item in items:
+                chunk = json_bytes(item)
+                if fmt is StreamFormat.NDJSON:
+                    yield chunk + b"\n"
+                else:
+                    yield sep + chunk
+                    sep = b","
+            if fmt is StreamFormat.JSON:
+                yield b"[]" if sep == b"[" else b"]"
+
+    return StreamingResponse(body(), media_type=_media_type(fmt))
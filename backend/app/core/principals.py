@@ -0,0 +1,106 @@
+"""
+Кеш автентифікованих користувачів за токеном.
+
+``get_current_user`` на кожен захищений запит декодує JWT і читає рядок
+``users`` — зайвий похід у БД. Кеш тримає компактний ``Principal`` (id,
+username, роль) замість ORM-об'єкта, прив'язаного до сесії, не довше за TTL і
+за термін дії самого токена; розмір обмежено (LRU). Зміна ролі чи видалення
+користувача скидає всі його записи в цьому воркері, інші воркери доганяють
+не пізніше ніж через TTL. Для адміністраторів TTL короткий (``admin_ttl``):
+зняті права не мають жити на інших воркерах ще хвилину.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.models import User, UserRole
+
+
+class Principal(NamedTuple):
+    id: int
+    username: str
+    role: UserRole
+
+
+class PrincipalCache:
+    def __init__(self, ttl: float = 60.0, max_size: int = 10_000, admin_ttl: float = 5.0):
+        self.ttl = ttl
+        self.admin_ttl = admin_ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        # ключ — 16-байтовий дайджест токена, а не сам токен (~200 байт)
+        self._entries: "OrderedDict[bytes, Tuple[Principal, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, token: str) -> Optional[Principal]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, token: str, principal: Principal, token_exp: Optional[float] = None) -> None:
+        if self.max_size <= 0:
+            return
+        ttl = min(self.ttl, self.admin_ttl) if principal.role == UserRole.ADMIN else self.ttl
+        expires = time.time() + ttl
+        if token_exp is not None:
+            expires = min(expires, token_exp)
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (principal, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for key in [k for k, (p, _) in self._entries.items() if p.id == user_id]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "admin_ttl": self.admin_ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+principal_cache = PrincipalCache(
+    settings.principal_cache_ttl, settings.principal_cache_size, settings.principal_cache_admin_ttl
+)
+
+
+# маршруту видалення користувачів поки немає — ловимо будь-яке ORM-видалення
+@event.listens_for(User, "after_delete")
+def _forget_deleted_user(mapper, connection, target: User) -> None:
+    principal_cache.invalidate_user(target.id)
@@ -0,0 +1,102 @@
+"""
+Лічильник SQL-запитів і часу БД на HTTP-запит.
+
+Слухачі ``before/after_cursor_execute`` висять на класі ``Engine``, тож бачать і
+sync-, і async-рушій (у останнього це ``sync_engine``). Статистика поточного
+запиту лежить у ``ContextVar``: FastAPI копіює контекст у threadpool для sync-
+обробників і залежностей, а SQLAlchemy — у greenlet async-драйвера, тож запити
+з будь-якого місця обробника потрапляють до одного ``QueryStats``. Поза
+``track_queries()`` слухачі нічого не роблять.
+
+``QueryStatsMiddleware`` відкриває такий контекст на кожен запит і (з
+``DEBUG_SQL=true``) додає заголовки ``X-DB-Queries``, ``X-DB-Time-Ms`` і
+``Server-Timing``. Запити, виконані вже після заголовків (тіло стріму), у
+заголовки не потрапляють, але передаються в ``on_complete``.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryStats:
+    __slots__ = ("count", "seconds", "statements")
+
+    def __init__(self, record: bool = False):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Optional[List[str]] = [] if record else None
+
+    @property
+    def ms(self) -> float:
+        return round(self.seconds * 1000, 2)
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info["query_started"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = conn.info.pop("query_started", None)
+    if stats is None or started is None:
+        return
+    stats.count += 1
+    stats.seconds += time.perf_counter() - started
+    if stats.statements is not None:
+        stats.statements.append(statement)
+
+
+@contextmanager
+def track_queries(record: bool = False) -> Iterator[QueryStats]:
+    stats = QueryStats(record)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+class QueryStatsMiddleware:
+    def __init__(
+        self,
+        app,
+        headers: bool = True,
+        record: bool = False,
+        on_complete: Optional[Callable[[dict, QueryStats], None]] = None,
+    ):
+        self.app = app
+        self.headers = headers
+        self.record = record
+        self.on_complete = on_complete
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        with track_queries(self.record) as stats:
+
+            async def send_with_stats(message):
+                if message["type"] == "http.response.start" and self.headers:
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (b"x-db-queries", str(stats.count).encode()),
+                        (b"x-db-time-ms", str(stats.ms).encode()),
+                        (b"server-timing", f'db;dur={stats.ms};desc="{stats.count} queries"'.encode()),
+                    ]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_stats)
+            finally:
+                if self.on_complete is not None:
+                    self.on_complete(scope, stats)
@@ -0,0 +1,256 @@
+"""
+Читання з реплік (``DB_REPLICA_URLS``).
+
+``ReadRoutingMiddleware`` дозволяє GET/HEAD-запитам читати з репліки, решта
+запитів і все поза HTTP (старт, імпорт) працюють лише з primary. Сесія
+``RoutingSession`` бере на запит одну репліку (по колу серед здорових) і
+переходить на primary при першому flush чи INSERT/UPDATE/DELETE — і далі вже
+читає звідти, тож запис усередині GET бачить сам себе.
+
+Read-your-writes: після успішного запиту, що закомітив запис, той самий клієнт
+(ключ — токен з ``Authorization``) ще ``DB_READ_YOUR_WRITES`` секунд читає з
+primary, бо репліка може відставати. Інші воркери про запис не знають, тому
+відповідь ставить ще й cookie з моментом, до якого читати з primary. Запити без
+запису (логін, пошук через POST) нікого не прив'язують до primary: ознаку запису
+ставить сесія на коміті після flush чи DML.
+
+Спільні для воркера кеші (тіла ``GET /songs/{id}``, індекси) наповнюються й
+читаннями з реплік, тож для прив'язаного клієнта вони можуть ще тримати стан
+до його запису. Прив'язаний запит (``pinned()``) кеш тіл оминає, а індекси
+звіряє з журналом змін на primary одразу, без паузи ``refresh_interval``.
+
+Репліка, на якій впало з'єднання, виходить з ротації на ``DB_REPLICA_RETRY``
+секунд, потім повертається; знову впала — знову виходить. Поки здорових
+реплік немає, усе читається з primary.
+"""
+import hashlib
+import itertools
+import math
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from http.cookies import CookieError, SimpleCookie
+from typing import List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge, registry
+
+READ_METHODS = frozenset({"GET", "HEAD"})
+PIN_COOKIE = "db_primary_until"
+
+REPLICA_UP = registry.add(Gauge("db_replica_up", "Репліка в ротації (1) чи ні (0)", ("replica",)))
+ROUTED_REQUESTS = registry.add(Counter(
+    "db_routed_requests_total", "HTTP-запити за БД, з якої їм дозволено читати", ("target",),
+))
+
+# чи може поточний запит читати з репліки; за замовчуванням — ні
+_replica_reads: ContextVar[bool] = ContextVar("replica_reads", default=False)
+# ознака «запит закомітив запис»: список, а не bool — сесія живе в потоці з копією
+# контексту, і присвоєння звідти middleware не побачив би
+_request_writes: ContextVar[Optional[list]] = ContextVar("request_writes", default=None)
+# GET/HEAD, що читає з primary через нещодавній запис клієнта
+_pinned: ContextVar[bool] = ContextVar("pinned", default=False)
+
+
+def pinned() -> bool:
+    return _pinned.get()
+
+
+class Replica:
+    __slots__ = ("name", "engine", "async_engine", "down_until")
+
+    def __init__(self, name: str, engine: Engine, async_engine: Optional[AsyncEngine] = None):
+        self.name = name
+        self.engine = engine
+        self.async_engine = async_engine
+        self.down_until = 0.0  # time.monotonic(), до якого репліка поза ротацією
+
+
+class ReplicaSet:
+    def __init__(self, retry: float = 30.0):
+        self.retry = retry
+        self.replicas: List[Replica] = []
+        self._lock = threading.Lock()
+        self._turn = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self.replicas)
+
+    def add(self, name: str, engine: Engine, async_engine: Optional[AsyncEngine] = None) -> Replica:
+        replica = Replica(name, engine, async_engine)
+        self._watch(replica, engine)
+        if async_engine is not None:
+            self._watch(replica, async_engine.sync_engine)
+        self.replicas.append(replica)
+        REPLICA_UP.set(1, name)
+        return replica
+
+    def _watch(self, replica: Replica, engine: Engine) -> None:
+        @event.listens_for(engine, "handle_error")
+        def _failed(context):
+            if context.is_pre_ping:  # пул сам перепідключиться — ще не відмова
+                return
+            if context.is_disconnect or isinstance(
+                context.sqlalchemy_exception, (OperationalError, InterfaceError)
+            ):
+                self.mark_down(replica)
+
+    def mark_down(self, replica: Replica) -> None:
+        with self._lock:
+            replica.down_until = time.monotonic() + self.retry
+        REPLICA_UP.set(0, replica.name)
+
+    def healthy(self, replica: Replica) -> bool:
+        return replica.down_until <= time.monotonic()
+
+    def pick(self) -> Optional[Replica]:
+        """Наступна здорова репліка по колу або None."""
+        now = time.monotonic()
+        with self._lock:
+            up = [r for r in self.replicas if r.down_until <= now]
+            if not up:
+                return None
+            replica = up[next(self._turn) % len(up)]
+            if replica.down_until:  # повертається в ротацію після паузи
+                replica.down_until = 0.0
+                REPLICA_UP.set(1, replica.name)
+        return replica
+
+    def pools(self):
+        for replica in self.replicas:
+            yield replica.name, replica.engine.pool
+            if replica.async_engine is not None:
+                yield replica.name + "-async", replica.async_engine.sync_engine.pool
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            replica.engine.dispose()
+            if replica.async_engine is not None:
+                await replica.async_engine.dispose()
+
+
+replica_set = ReplicaSet(retry=settings.db_replica_retry)
+
+
+class RoutingSession(Session):
+    """
+    Читання — з репліки, якщо запит це дозволяє; запис і все після нього — з
+    primary (``bind`` сесії). Для ``AsyncSession`` — як ``sync_session_class``.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        primary = super().get_bind(mapper, clause=clause, **kw)
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.info["primary"] = self.info["writes"] = True
+        if self.info.get("primary") or not _replica_reads.get():
+            return primary
+
+        replica = self.info.get("replica")
+        if replica is None or not replica_set.healthy(replica):
+            replica = self.info["replica"] = replica_set.pick()
+        if replica is None:
+            return primary
+        if primary.dialect.is_async:
+            return replica.async_engine.sync_engine
+        return replica.engine
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _committed(session: Session) -> None:
+    writes = _request_writes.get()
+    if session.info.pop("writes", False) and writes is not None:
+        writes.append(True)
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _rolled_back(session: Session) -> None:
+    session.info.pop("writes", None)
+
+
+# ───── HTTP ──────────────────────────────────────────────────────────────────
+def _client_key(authorization: Optional[bytes]) -> Optional[bytes]:
+    if not authorization:
+        return None
+    return hashlib.blake2b(authorization, digest_size=16).digest()
+
+
+def _cookie_until(header: Optional[bytes]) -> float:
+    if not header:
+        return 0.0
+    try:
+        morsel = SimpleCookie(header.decode("latin-1")).get(PIN_COOKIE)
+        return float(morsel.value) if morsel is not None else 0.0
+    except (CookieError, ValueError):
+        return 0.0
+
+
+class ReadRoutingMiddleware:
+    def __init__(self, app, window: float = 5.0, max_clients: int = 100_000):
+        self.app = app
+        self.window = window
+        self.max_clients = max_clients
+        # ключ клієнта → time.time(), до якого читати з primary; лише з event loop
+        self._pinned: "OrderedDict[bytes, float]" = OrderedDict()
+
+    def _is_pinned(self, key: Optional[bytes], headers: dict, now: float) -> bool:
+        if key is not None and self._pinned.get(key, 0.0) > now:
+            return True
+        return _cookie_until(headers.get(b"cookie")) > now
+
+    def _pin(self, key: Optional[bytes], until: float) -> None:
+        if key is None:
+            return
+        self._pinned[key] = until
+        self._pinned.move_to_end(key)
+        # вікно однакове для всіх, тож найстаріші записи — спереду
+        now = time.time()
+        while self._pinned and (
+            next(iter(self._pinned.values())) <= now or len(self._pinned) > self.max_clients
+        ):
+            self._pinned.popitem(last=False)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope["headers"])
+        key = _client_key(headers.get(b"authorization"))
+        now = time.time()
+        if scope["method"] in READ_METHODS:
+            replica = not self._is_pinned(key, headers, now)
+            ROUTED_REQUESTS.inc("replica" if replica else "primary")
+            token = _replica_reads.set(replica)
+            pin_token = _pinned.set(not replica)
+            try:
+                return await self.app(scope, receive, send)
+            finally:
+                _pinned.reset(pin_token)
+                _replica_reads.reset(token)
+
+        ROUTED_REQUESTS.inc("primary")
+        until = math.ceil(now + self.window)
+        max_age = math.ceil(self.window)
+        cookie = f"{PIN_COOKIE}={until}; Max-Age={max_age}; Path=/; HttpOnly; SameSite=Lax".encode()
+
+        writes: list = []
+
+        async def send_pinned(message):
+            if message["type"] == "http.response.start" and message["status"] < 400 and writes:
+                self._pin(key, until)
+                headers = [*message.get("headers", []), (b"set-cookie", cookie)]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = _request_writes.set(writes)
+        try:
+            await self.app(scope, receive, send_pinned)
+        finally:
+            _request_writes.reset(token)
@@ -0,0 +1,81 @@
+"""
+Пакетне збереження/видалення «збережених» пісень і акордів.
+
+Уся пачка — два оператори на таблицю зв'язків: ``DELETE … WHERE id IN (…)`` і
+``INSERT … SELECT id FROM <пісні|акорди> WHERE id IN (…)``. Вибірка з цільової
+таблиці відкидає неіснуючі id (інакше впав би FK), а повторне додавання не
+конфліктує з ``uq_user_song`` / ``uq_user_chord``:
+
+* Postgres — ``ON CONFLICT DO NOTHING``, тож дві одночасні синхронізації не
+  ламають одна одну;
+* інші СУБД (SQLite у тестах і локально) — ``WHERE NOT EXISTS``; SQLite
+  серіалізує запис, тож гонки тут немає.
+
+Повтор того самого запиту нічого не змінює — клієнт може спокійно ретраїти.
+"""
+from typing import List, Tuple, Type, Union
+
+from fastapi import HTTPException
+from sqlalchemy import delete, exists, insert, literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models import Chord, Song, UserChord, UserSong
+
+SAVED_BATCH_MAX = 500
+
+Link = Union[Type[UserSong], Type[UserChord]]
+_TARGETS = {UserSong: ("song_id", Song.id), UserChord: ("chord_id", Chord.id)}
+
+
+def batch_ids(add: List[int], remove: List[int]) -> Tuple[List[int], List[int]]:
+    add, remove = sorted(set(add)), sorted(set(remove))
+    if len(add) + len(remove) > SAVED_BATCH_MAX:
+        raise HTTPException(400, f"Не більше {SAVED_BATCH_MAX} id за запит")
+    if set(add) & set(remove):
+        raise HTTPException(400, "Той самий id і в add, і в remove")
+    return add, remove
+
+
+def _statements(dialect: str, link: Link, user_id: int, add: List[int], remove: List[int]):
+    column, target_id = _TARGETS[link]
+    link_col = getattr(link, column)
+    remove_stmt = (
+        delete(link).where(link.user_id == user_id, link_col.in_(remove)) if remove else None
+    )
+    add_stmt = None
+    if add:
+        rows = select(literal(user_id), target_id).where(target_id.in_(add))
+        if dialect == "postgresql":
+            add_stmt = pg_insert(link).from_select(["user_id", column], rows).on_conflict_do_nothing(
+                index_elements=["user_id", column]
+            )
+        else:
+            rows = rows.where(~exists().where(link.user_id == user_id, link_col == target_id))
+            add_stmt = insert(link).from_select(["user_id", column], rows)
+    return add_stmt, remove_stmt
+
+
+def _rowcount(result) -> int:
+    return max(result.rowcount, 0) if result is not None else 0
+
+
+def apply_saved_batch(
+    db: Session, link: Link, user_id: int, add: List[int], remove: List[int]
+) -> dict:
+    add_stmt, remove_stmt = _statements(db.get_bind().dialect.name, link, user_id, add, remove)
+    removed = _rowcount(db.execute(remove_stmt) if remove_stmt is not None else None)
+    added = _rowcount(db.execute(add_stmt) if add_stmt is not None else None)
+    db.commit()
+    return {"added": added, "removed": removed}
+
+
+async def apply_saved_batch_async(
+    db: AsyncSession, link: Link, user_id: int, add: List[int], remove: List[int]
+) -> dict:
+    add_stmt, remove_stmt = _statements(db.get_bind().dialect.name, link, user_id, add, remove)
+    removed = _rowcount(await db.execute(remove_stmt) if remove_stmt is not None else None)
+    added = _rowcount(await db.execute(add_stmt) if add_stmt is not None else None)
+    await db.commit()
+    return {"added": added, "removed": removed}
@@ -0,0 +1,54 @@
+"""
+Перевірка схеми БД при старті воркера (``USE_ALEMBIC=true``).
+
+``create_all`` на кожному старті інспектує кожну таблицю окремим запитом, і N
+воркерів роблять це одночасно. З alembic міграції накатує один процес до
+запуску воркерів (``alembic upgrade head`` у CMD контейнера), а воркер лише
+звіряє ``alembic_version`` з head-ревізією скриптів: один SELECT. Сам alembic
+при цьому не імпортується — head береться регулярним виразом з
+``alembic/versions/*.py``.
+"""
+import re
+from pathlib import Path
+from typing import Set
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+
+VERSIONS_DIR = Path(__file__).resolve().parents[2] / "alembic" / "versions"
+
+_REVISION_RE = re.compile(r"^revision\s*(?::[^=]*)?=\s*['\"]([^'\"]+)['\"]", re.M)
+_DOWN_REVISION_RE = re.compile(r"^down_revision\s*(?::[^=]*)?=\s*(.+)$", re.M)
+_QUOTED_RE = re.compile(r"['\"]([^'\"]+)['\"]")
+
+
+def alembic_heads(versions: Path = VERSIONS_DIR) -> Set[str]:
+    """Ревізії, від яких не відгалужується жодна інша (зазвичай одна)."""
+    revisions: Set[str] = set()
+    parents: Set[str] = set()
+    for path in versions.glob("*.py"):
+        source = path.read_text(encoding="utf-8")
+        revision = _REVISION_RE.search(source)
+        if revision is None:
+            continue
+        revisions.add(revision.group(1))
+        down = _DOWN_REVISION_RE.search(source)
+        if down is not None:
+            parents.update(_QUOTED_RE.findall(down.group(1)))
+    return revisions - parents
+
+
+def check_schema(bind: Engine, versions: Path = VERSIONS_DIR) -> None:
+    heads = alembic_heads(versions)
+    try:
+        with bind.connect() as conn:
+            current = set(conn.scalars(text("SELECT version_num FROM alembic_version")))
+    except DBAPIError:  # таблиці ще немає — міграції не запускались
+        current = set()
+    if current != heads:
+        found = ", ".join(sorted(current)) or "немає alembic_version"
+        raise RuntimeError(
+            f"Схема БД не на head-ревізії ({found} ≠ {', '.join(sorted(heads))}): "
+            "виконайте `alembic upgrade head`"
+        )
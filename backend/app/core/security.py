@@ -1,21 +1,28 @@
 from datetime import datetime, timedelta
+from functools import lru_cache
+
 from jose import jwt, JWTError
-from passlib.context import CryptContext
 from pydantic_settings import BaseSettings
 
 SECRET_KEY = "REPLACE_ME_SECRET_32_CHARS"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
-_pwd = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+@lru_cache(maxsize=None)
+def _pwd():
+    # passlib — ~65 мс імпорту, а API-воркер хешує лише в пулі bcrypt (app.core.hashing)
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 def hash_password(p: str) -> str:
-    return _pwd.hash(p)
+    return _pwd().hash(p)
 
 
 def verify_password(p: str, hashed: str) -> bool:
-    return _pwd.verify(p, hashed)
+    return _pwd().verify(p, hashed)
 
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
@@ -0,0 +1,47 @@
+"""
+Скільки триває старт воркера і з чого він складається.
+
+Кроки (імпорт застосунку, схема БД) пишуться в лог одним рядком і в
+gauge ``app_startup_seconds{step}`` на ``/metrics`` — для автоскейлу важливо,
+скільки воркер стартує до першого запиту. Індекси будуються вже після старту,
+у фоновому прогріві (``app.main``), і його кроки логуються окремим рядком
+``warm-up``. Порівняння режимів і кількості воркерів — ``benchmarks/startup.py``.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional
+
+from app.core.metrics import Gauge, registry
+
+# логер uvicorn уже налаштований на INFO, власний логер застосунку — ні
+logger = logging.getLogger("uvicorn.error")
+
+STARTUP_SECONDS = registry.add(Gauge("app_startup_seconds", "Тривалість кроків старту воркера", ("step",)))
+
+
+class StartupReport:
+    def __init__(self):
+        self.steps: Dict[str, float] = {}
+
+    def record(self, step: str, seconds: float) -> None:
+        self.steps[step] = seconds
+        STARTUP_SECONDS.set(seconds, step)
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def log(self, label: str = "startup", steps: Optional[Iterable[str]] = None) -> None:
+        """Один рядок у лог: ``steps`` — лише ці кроки (типово всі записані)."""
+        timings = self.steps if steps is None else {s: self.steps[s] for s in steps}
+        total = sum(timings.values())
+        parts = ", ".join(f"{step} {seconds * 1000:.0f}" for step, seconds in timings.items())
+        logger.info("%s %.0f ms: %s", label, total * 1000, parts)
+
+
+startup_report = StartupReport()
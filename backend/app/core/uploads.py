@@ -0,0 +1,103 @@
+"""
+Завантаження файлів: ліміт розміру під час прийому і контентно-адресоване
+сховище.
+
+``UploadLimitMiddleware`` рахує байти тіла запиту в міру надходження й обриває
+upload-маршрути з 413, щойно ліміт перевищено, — ще до того, як multipart-парсер
+допише файл у тимчасовий. ``store_upload`` копіює файл шматками, паралельно
+рахуючи SHA-256, у тимчасовий файл поруч із цільовим і атомарно перейменовує
+його в ``<sha256><ext>``: читач ніколи не бачить недописаного файлу, а однаковий
+вміст, завантажений до різних пісень, зберігається один раз.
+"""
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import BinaryIO
+
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+
+SONGS_DIR = Path(__file__).resolve().parents[2] / "static" / "songs"
+SONGS_DIR.mkdir(parents=True, exist_ok=True)
+
+# заголовки частин і межі multipart поверх самого файлу
+MULTIPART_SLACK = 64 * 1024
+
+_SHA_NAME_RE = re.compile(r"^[0-9a-f]{64}\.\w+$")
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(413, "Файл завеликий")
+
+
+class UploadLimitMiddleware:
+    def __init__(self, app, max_bytes: int, path_pattern: str):
+        self.app = app
+        self.max_body = max_bytes + MULTIPART_SLACK
+        self.path_re = re.compile(path_pattern)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.path_re.match(scope["path"]):
+            return await self.app(scope, receive, send)
+
+        length = dict(scope["headers"]).get(b"content-length")
+        if length is not None:
+            try:
+                declared = int(length)
+            except ValueError:
+                declared = -1
+            if declared < 0:
+                response = JSONResponse({"detail": "Некоректний Content-Length"}, status_code=400)
+                return await response(scope, receive, send)
+            if declared > self.max_body:
+                response = JSONResponse({"detail": _too_large().detail}, status_code=413)
+                return await response(scope, receive, send)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body:
+                    # FastAPI пропускає HTTPException з розбору тіла як є
+                    raise _too_large()
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def is_content_addressed(name: str) -> bool:
+    return _SHA_NAME_RE.match(name) is not None
+
+
+def store_upload(
+    src: BinaryIO, directory: Path, ext: str, max_bytes: int, chunk_size: int = 1 << 20
+) -> str:
+    """Зберігає ``src`` як ``directory/<sha256><ext>`` і повертає ім'я файлу."""
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".upload-", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := src.read(chunk_size):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise _too_large()
+                digest.update(chunk)
+                out.write(chunk)
+        name = f"{digest.hexdigest()}{ext}"
+        dst = directory / name
+        if dst.exists():
+            os.unlink(tmp)  # такий вміст уже є
+        else:
+            os.chmod(tmp, 0o644)  # mkstemp створює 0600
+            os.replace(tmp, dst)
+        return name
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
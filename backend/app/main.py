@@ -1,25 +1,130 @@
+import sys
+import threading
+import time
+
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 
-from app.core.database import init_db
+from app import import_started
+from app.core.admission import AdmissionMiddleware
+from app.core.config import settings
+from app.core.encoding import NegotiatedResponse, ResponseEncodingMiddleware
+from app.core.database import SessionLocal, init_db, dispose_async_engine
+from app.core.hashing import password_hasher
+from app.core.metrics import MetricsMiddleware
+from app.core.querystats import QueryStatsMiddleware
+from app.core.replicas import ReadRoutingMiddleware, replica_set
+from app.core.startup import logger, startup_report
+from app.core.uploads import UploadLimitMiddleware
+from app.services import catalog_changes
+from app.services.catalog_snapshot import catalog_snapshot
+from app.services.chord_catalog import chord_catalog
 from app.api.endpoints.auth import router as auth_router
+from app.api.endpoints.changes import router as changes_router
 from app.api.endpoints.chords import router as chords_router
 from app.api.endpoints.songs import router as songs_router
 from app.api.endpoints.users import router as users_router
 from app.api.endpoints.chord_save import router as chord_save_router
+from app.api.endpoints.media import router as media_router
+from app.api.endpoints.metrics import router as metrics_router
 
-app = FastAPI(title="Гітарні акорди та пісні", version="1.0.0")
+app = FastAPI(
+    title="Гітарні акорди та пісні", version="1.0.0", default_response_class=NegotiatedResponse
+)
+app.add_middleware(
+    UploadLimitMiddleware,
+    max_bytes=settings.upload_max_bytes,
+    path_pattern=r"^/songs/\d+/upload-",
+)
+if settings.debug_sql:
+    app.add_middleware(QueryStatsMiddleware)
+if len(replica_set):
+    app.add_middleware(ReadRoutingMiddleware, window=settings.db_read_your_writes)
+app.add_middleware(ResponseEncodingMiddleware, min_size=settings.compress_min_bytes)
+if settings.admission_enabled:
+    # ззовні від усього, що торкається БД: відмова не чекає ні потоку, ні з'єднання
+    app.add_middleware(AdmissionMiddleware, retry_after=settings.admission_retry_after)
+if settings.metrics_enabled:
+    # останнім, тобто найзовнішнім: у гістограми потрапляють і 413 від ліміту
+    app.add_middleware(MetricsMiddleware)
 
 
 @app.on_event("startup")
 def _startup():
-    init_db()
+    startup_report.record("imports", _imports_done - import_started)
+    with startup_report.step("init_db"):
+        init_db()
+    with startup_report.step("password_hasher"):
+        password_hasher.start()
+    # журнал — до індексів: вони запам'ятовують його версію, з якої потім оновлюються
+    with startup_report.step("catalog_changes"), SessionLocal() as db:
+        catalog_changes.ensure(db)
+        catalog_changes.compact(db, settings.changes_tombstone_days)
+    catalog_snapshot.start(SessionLocal, settings.catalog_snapshot_interval)
+    chord_catalog.start(SessionLocal, settings.chord_catalog_poll)  # перше читання — у потоці
+    startup_report.log()
+    if settings.index_warm_up:
+        threading.Thread(target=_warm_up, name="warm-up", daemon=True).start()
+
+
+def _warm_up() -> None:
+    # numpy та індекси імпортуються тут, а не разом із застосунком; запит, що прийде
+    # раніше, будує потрібний індекс сам (ensure), прогрів тоді його пропускає
+    from app.services.playable import playable_index
+    from app.services.search import song_index
+    from app.services.similar import similar_index
+    from app.services.voicings import voicing_index
+
+    steps = {
+        "song_index": song_index.ensure,
+        "playable_index": playable_index.ensure,
+        "voicing_index": voicing_index.refresh,
+        "similar_index": similar_index.ensure,
+    }
+    try:
+        with SessionLocal() as db:
+            for name, build in steps.items():
+                with startup_report.step(name):
+                    build(db)
+    except Exception:
+        logger.exception("warm-up: індекси побудує перший запит")
+        return
+    startup_report.log("warm-up", steps)
+
+
+@app.on_event("shutdown")
+async def _shutdown():
+    password_hasher.shutdown()
+    catalog_snapshot.stop()
+    chord_catalog.stop()
+    similar = sys.modules.get("app.services.similar")  # не імпортуємо numpy заради виходу
+    if settings.similar_index_path and similar is not None and similar.similar_index.ready:
+        similar.similar_index.save(settings.similar_index_path)
+    await dispose_async_engine()
+
+
+if settings.db_async:
+    from app.api.endpoints.auth_async import router as auth_async_router
+    from app.api.endpoints.chords_async import router as chords_async_router
+    from app.api.endpoints.songs_async import router as songs_async_router
+    from app.api.endpoints.users_async import router as users_async_router
 
+    # async-роутери реєструються першими й перекривають однойменні sync-маршрути;
+    # усе, чого немає в async-версії (upload-*), обслуговує sync-роутер нижче
+    app.include_router(auth_async_router)
+    app.include_router(chords_async_router)
+    app.include_router(songs_async_router)
+    app.include_router(users_async_router)
 
 app.include_router(auth_router)
 app.include_router(chords_router)
 app.include_router(songs_router)
 app.include_router(users_router)
 app.include_router(chord_save_router)
+app.include_router(changes_router)
+app.include_router(media_router)
+if settings.metrics_enabled:
+    app.include_router(metrics_router)
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
+_imports_done = time.perf_counter()
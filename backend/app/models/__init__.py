@@ -4,6 +4,7 @@ from .chord import Chord
 from .song import Song, SongChord, Genre
 from .user_song import UserSong
 from .user_chord import UserChord
+from .catalog_change import CatalogChange, CatalogVersion
 
 __all__ = [
     "Base",
@@ -15,4 +16,6 @@ __all__ = [
     "Genre",
     "UserSong",
     "UserChord",
+    "CatalogChange",
+    "CatalogVersion",
 ]
@@ -0,0 +1,33 @@
+import datetime
+
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Boolean, DateTime, Integer, String
+
+from .base import Base
+
+
+class CatalogChange(Base):
+    """Остання зміна сутності каталогу: один рядок на (entity, entity_id)."""
+
+    __tablename__ = "catalog_changes"
+
+    entity: Mapped[str] = mapped_column(String(16), primary_key=True)  # "song" | "chord"
+    entity_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, index=True)
+    deleted: Mapped[bool] = mapped_column(Boolean, default=False)
+    changed_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime, default=datetime.datetime.utcnow
+    )
+
+
+class CatalogVersion(Base):
+    """Єдиний рядок (id=1): поточна версія каталогу й межа стиснутих надгробків."""
+
+    __tablename__ = "catalog_version"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, default=0)
+    # надгробки з version <= horizon видалено: клієнт зі старішим since — на повну синхронізацію
+    horizon: Mapped[int] = mapped_column(Integer, default=0)
+    # версія останньої зміни акордів: за нею воркери оновлюють chord_catalog
+    chord_version: Mapped[int] = mapped_column(Integer, default=0)
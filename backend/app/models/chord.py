@@ -1,5 +1,6 @@
 import json
-from typing import Optional, List
+from functools import lru_cache
+from typing import Optional, List, Tuple
 
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from sqlalchemy import Integer, String, Text, ForeignKey
@@ -7,6 +8,12 @@ from sqlalchemy import Integer, String, Text, ForeignKey
 from .base import Base
 
 
+@lru_cache(maxsize=4096)
+def _parse_strings(raw: str) -> Tuple[int, ...]:
+    # різних аплікатур у каталозі небагато — json.loads раз на значення, а не на звернення
+    return tuple(json.loads(raw))
+
+
 class Chord(Base):
     __tablename__ = "chords"
 
@@ -23,4 +30,4 @@ class Chord(Base):
 
     @property
     def strings(self) -> List[int]:
-        return json.loads(self.strings_json or "[]")
+        return list(_parse_strings(self.strings_json or "[]"))
@@ -39,8 +39,9 @@ class Song(Base):
     author_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
 
     author = relationship("User", back_populates="songs_created")
-    songs_chords = relationship("SongChord", back_populates="song")
-    saved_by_users = relationship("UserSong", back_populates="song")
+    # delete-orphan: інакше ORM при видаленні пісні обнуляє song_id у зв'язках
+    songs_chords = relationship("SongChord", back_populates="song", cascade="all, delete-orphan")
+    saved_by_users = relationship("UserSong", back_populates="song", cascade="all, delete-orphan")
 
 
 class SongChord(Base):
@@ -0,0 +1,300 @@
+"""
+Журнал змін каталогу для інкрементальної синхронізації (``GET /changes``).
+
+Кожна транзакція, що змінює пісні, акорди чи ``song_chords``, викликає
+``record(...)`` до свого коміту: той бере наступну версію з єдиного рядка
+``catalog_version`` (``UPDATE … RETURNING``) і пише версію в
+``catalog_changes`` (зміна акордів ще й у ``chord_version`` — за нею воркери
+оновлюють ``chord_catalog``). Блокування рядка версії тримається до коміту, тож
+транзакції комітяться в порядку своїх версій і клієнт, що прочитав версію
+N, не пропустить меншу, закомічену пізніше.
+
+Журнал стискається одразу при записі: на сутність — один рядок з її
+останньою версією, а сам фід віддає актуальний стан, а не історію. Зміни
+``song_chords`` пишуться як зміна пісні — її upsert містить ``chord_ids``.
+Маршрутів редагування акордів немає, тож їхні зміни через ORM (адмінка,
+скрипти) записує хук ``after_flush`` у тій самій транзакції.
+Лишаються надгробки видалених сутностей; старші за
+``CHANGES_TOMBSTONE_DAYS`` прибирає ``compact()`` на старті воркера й за
+розкладом знімка каталогу, і клієнт з ``since`` до цієї межі отримує 410 і
+синхронізується з нуля.
+"""
+import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import and_, delete, event, false, func, insert, literal, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from app.models import CatalogChange, CatalogVersion, Chord, Song, SongChord
+
+SONG = "song"
+CHORD = "chord"
+
+
+def _seed(db: Session, entity: str, ids, offset) -> None:
+    now = datetime.datetime.utcnow()
+    db.execute(
+        insert(CatalogChange).from_select(
+            ["entity", "entity_id", "version", "deleted", "changed_at"],
+            select(literal(entity), ids, ids + offset, false(), literal(now)),
+        )
+    )
+
+
+def bootstrap(db: Session) -> None:
+    """
+    Журнал для наявного каталогу (не комітить). Кожна сутність отримує окрему
+    версію, інакше початкова синхронізація була б однією неподільною сторінкою.
+    """
+    songs = db.scalar(select(func.coalesce(func.max(Song.id), 0)))
+    chords = db.scalar(select(func.coalesce(func.max(Chord.id), 0)))
+    _seed(db, SONG, Song.id, 0)
+    _seed(db, CHORD, Chord.id, songs)
+    db.add(CatalogVersion(id=1, version=songs + chords, horizon=0, chord_version=songs + chords))
+    db.flush()
+
+
+def ensure(db: Session) -> None:
+    """Старт воркера: журнал для каталогу, створеного до нього (create_all, datagen)."""
+    if db.get(CatalogVersion, 1) is not None:
+        return
+    try:
+        bootstrap(db)
+        db.commit()
+    except IntegrityError:  # інший воркер встиг першим
+        db.rollback()
+
+
+def versions(db: Session) -> Tuple[int, int]:
+    """``(поточна версія, horizon)``; ``(0, 0)`` — журнал ще не створено."""
+    row = db.execute(
+        select(CatalogVersion.version, CatalogVersion.horizon).where(CatalogVersion.id == 1)
+    ).first()
+    return (row.version, row.horizon) if row is not None else (0, 0)
+
+
+def chord_version(db: Session) -> int:
+    """Версія останньої зміни акордів (0 — журнал ще не створено)."""
+    return db.scalar(
+        select(CatalogVersion.chord_version).where(CatalogVersion.id == 1)
+    ) or 0
+
+
+def _next_version(db: Session, entity: str) -> int:
+    values = {"version": CatalogVersion.version + 1}
+    if entity == CHORD:
+        values["chord_version"] = CatalogVersion.version + 1
+    version = db.scalar(
+        update(CatalogVersion)
+        .where(CatalogVersion.id == 1)
+        .values(values)
+        .returning(CatalogVersion.version)
+        .execution_options(synchronize_session=False)
+    )
+    if version is None:
+        bootstrap(db)
+        return _next_version(db, entity)
+    return version
+
+
+def record(db: Session, entity: str, ids: Iterable[int], deleted: bool = False) -> Optional[int]:
+    """Позначає сутності зміненими (або видаленими) у поточній транзакції; комітить викликач."""
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        return None
+    version = _next_version(db, entity)
+    now = datetime.datetime.utcnow()
+    db.execute(
+        delete(CatalogChange)
+        .where(CatalogChange.entity == entity, CatalogChange.entity_id.in_(ids))
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        insert(CatalogChange),
+        [
+            {"entity": entity, "entity_id": i, "version": version, "deleted": deleted,
+             "changed_at": now}
+            for i in ids
+        ],
+    )
+    return version
+
+
+def compact(db: Session, tombstone_days: float) -> int:
+    """Видаляє надгробки, старші за ``tombstone_days``, і піднімає межу ``horizon``."""
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=tombstone_days)
+    horizon = db.scalar(
+        select(func.max(CatalogChange.version)).where(
+            CatalogChange.deleted.is_(True), CatalogChange.changed_at < cutoff
+        )
+    )
+    if horizon is None:
+        return 0
+    db.execute(
+        update(CatalogVersion)
+        .where(CatalogVersion.id == 1, CatalogVersion.horizon < horizon)
+        .values(horizon=horizon)
+        .execution_options(synchronize_session=False)
+    )
+    removed = db.execute(
+        delete(CatalogChange)
+        .where(CatalogChange.deleted.is_(True), CatalogChange.version <= horizon)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return removed
+
+
+# ───── ORM hook ──────────────────────────────────────────────────────────────
+@event.listens_for(Session, "after_flush")
+def _record_chords(db: Session, flush_context) -> None:
+    # new/dirty/deleted і історія атрибутів тут ще до-флашеві, а id нових уже є
+    changed = [
+        o.id for o in db.new if isinstance(o, Chord)
+    ] + [
+        o.id for o in db.dirty
+        if isinstance(o, Chord) and db.is_modified(o, include_collections=False)
+    ]
+    deleted = [o.id for o in db.deleted if isinstance(o, Chord)]
+    if not (changed or deleted):
+        return
+    if db.get(CatalogVersion, 1) is None:  # журналу ще немає — ensure() засіє його з таблиць
+        return
+    record(db, CHORD, changed)
+    record(db, CHORD, deleted, deleted=True)
+
+
+# ───── worker indexes ────────────────────────────────────────────────────────
+class SongChanges(NamedTuple):
+    version: int  # наступний ``since``
+    changed: Optional[Select]  # id змінених пісень для ``Song.id.in_(…)``; None — змін немає
+    deleted: List[int]
+
+
+def song_changes(db: Session, since: int) -> Optional[SongChanges]:
+    """
+    Пісні, змінені й видалені після ``since`` — для індексів воркера (пошук,
+    «можна зіграти», «схожі»). На відміну від ``Song.id > max_id`` бачить і id,
+    закомічені не по порядку, і видалення в інших воркерах. ``None`` — надгробки
+    після ``since`` уже стиснуто, потрібна повна перебудова.
+    """
+    head, horizon = versions(db)
+    if since < horizon:
+        return None
+    if since >= head:  # нічого нового (або репліка ще не наздогнала)
+        return SongChanges(since, None, [])
+    window = (
+        CatalogChange.entity == SONG, CatalogChange.version > since, CatalogChange.version <= head
+    )
+    deleted = db.scalars(
+        select(CatalogChange.entity_id).where(*window, CatalogChange.deleted.is_(True))
+    ).all()
+    changed = select(CatalogChange.entity_id).where(*window, CatalogChange.deleted.is_(False))
+    return SongChanges(head, changed, list(deleted))
+
+
+# ───── feed ──────────────────────────────────────────────────────────────────
+def _song_upsert(s) -> dict:
+    # без lyrics: текст — у GET /songs/{id}, його ETag дешево ревалідується
+    return {
+        "id": s.id,
+        "title": s.title,
+        "genre": s.genre.value if s.genre else None,
+        "sheet_url": s.sheet_url,
+        "audio_url": s.audio_url,
+        "chord_ids": [],
+    }
+
+
+def song_upserts(db: Session, *where) -> List[dict]:
+    """Пісні за умовою ``where`` у форматі фіду, за id; ``chord_ids`` — ребра song_chords."""
+    # пісні й акорди одним запитом: рядок на кожен акорд (або один з NULL)
+    found: Dict[int, dict] = {}
+    for row in db.execute(
+        select(Song.id, Song.title, Song.genre, Song.sheet_url, Song.audio_url,
+               SongChord.chord_id)
+        .outerjoin(SongChord, SongChord.song_id == Song.id)
+        .where(*where)
+        .order_by(Song.id, SongChord.id)
+    ):
+        if row.id not in found:
+            found[row.id] = _song_upsert(row)
+        if row.chord_id is not None:
+            found[row.id]["chord_ids"].append(row.chord_id)
+    return list(found.values())
+
+
+def chord_upserts(db: Session, *where) -> List[dict]:
+    return [
+        {"id": c.id, "name": c.name, "strings": c.strings}
+        for c in db.scalars(select(Chord).where(*where).order_by(Chord.id))
+    ]
+
+
+def feed(
+    db: Session, since: int, limit: int, after: Optional[Tuple[int, int]] = None
+) -> Optional[dict]:
+    """
+    Зміни після версії ``since``: ``None``, якщо потрібних надгробків уже немає.
+    Сторінка — не більше ``limit`` сутностей у порядку ``(версія, id)``;
+    ``version`` відповіді — готовий ``since`` для наступного запиту. Якщо сторінка
+    обірвалась посеред версії (пачка імпорту), ``after`` — ``(версія, id)``
+    останньої відданої сутності, і наступний запит продовжує саме з неї.
+    ``since=0`` — повний каталог без надгробків.
+    """
+    if after is not None:
+        since = after[0] - 1
+    head, horizon = versions(db)
+    if since and since < horizon:
+        return None
+    if since >= head:
+        # нічого нового; since > head — репліка ще не наздогнала primary, чекаємо
+        return {"version": since, "more": False, "after": None, "songs": [], "chords": [],
+                "deleted": {"songs": [], "chords": []}}
+
+    window = [CatalogChange.version > since, CatalogChange.version <= head]
+    if not since:
+        window.append(CatalogChange.deleted.is_(False))
+    if after is not None:
+        window.append(or_(
+            CatalogChange.version > after[0],
+            and_(CatalogChange.version == after[0], CatalogChange.entity_id > after[1]),
+        ))
+    changed = db.execute(
+        select(CatalogChange.version, CatalogChange.entity, CatalogChange.entity_id,
+               CatalogChange.deleted)
+        .where(*window)
+        .order_by(CatalogChange.version, CatalogChange.entity_id)
+        .limit(limit + 1)
+    ).all()
+    version, cursor = head, None
+    if len(changed) > limit:
+        changed, following = changed[:limit], changed[limit]
+        last = changed[-1]
+        if following.version == last.version:  # версія не влізла — решту віддасть наступна
+            version, cursor = last.version - 1, (last.version, last.entity_id)
+        else:
+            version = last.version
+
+    wanted = {SONG: [], CHORD: []}
+    gone = {SONG: [], CHORD: []}
+    for _, entity, entity_id, deleted in changed:
+        (gone if deleted else wanted)[entity].append(entity_id)
+
+    songs = song_upserts(db, Song.id.in_(wanted[SONG])) if wanted[SONG] else []
+    chords = chord_upserts(db, Chord.id.in_(wanted[CHORD])) if wanted[CHORD] else []
+
+    # змінена, а потім видалена в ще не відданій версії — надгробок уже зараз
+    for entity, found in ((SONG, songs), (CHORD, chords)):
+        present = {item["id"] for item in found}
+        gone[entity].extend(i for i in wanted[entity] if i not in present)
+    return {
+        "version": version,
+        "more": version < head,
+        "after": cursor,
+        "songs": songs,
+        "chords": chords,
+        "deleted": {"songs": gone[SONG], "chords": gone[CHORD]},
+    }
@@ -0,0 +1,244 @@
+"""
+Знімок каталогу для холодного старту клієнта.
+
+Один gzip-файл з NDJSON: перший рядок — ``{"type": "snapshot", "version": N}``,
+далі акорди (``"type": "chord"``) і пісні (``"type": "song"`` з ``chord_ids``)
+у тому ж форматі, що й ``GET /changes``. Клієнт бере адресу з
+``GET /changes/snapshot``, завантажує файл одним запитом і догоняє зміни через
+``/changes?since=N``. Ім'я файлу — SHA-256 вмісту, тож ``/media/catalog/…``
+віддає його з ``immutable``-кешуванням.
+
+Файл складається з шардів: акорди — один шард, пісні — по ``shard_size`` id.
+Кожен шард — окремий gzip-член, а конкатенація gzip-членів — валідний gzip.
+Після змін перезбираються (запит, серіалізація, стиснення) лише шарди, яких
+торкнувся журнал змін з версії попереднього знімка; решта береться готовими
+байтами з ``shards/``. Усі файли пишуться поруч і атомарно перейменовуються,
+``manifest.json`` — останнім.
+
+Збирає фоновий потік кожного воркера раз на ``CATALOG_SNAPSHOT_INTERVAL``, якщо
+версія каталогу змінилась; ``flock`` не дає двом воркерам збирати одночасно. Під
+тим самим замком і з тим самим розкладом стискається журнал змін
+(``catalog_changes.compact``), тож надгробки не накопичуються між перезапусками.
+Знімок «не старіший за N»: зміни, закомічені під час збирання, у ньому вже можуть
+бути — клієнт отримає їх з фіду ще раз, що нічого не зламає.
+"""
+import datetime
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.encoding import compress, json_bytes
+from app.models import CatalogChange, Song
+from app.services.catalog_changes import CHORD, chord_upserts, compact, song_upserts, versions
+
+CATALOG_DIR = Path(__file__).resolve().parents[2] / "static" / "catalog"
+MANIFEST = "manifest.json"
+CHORDS_SHARD = "chords"
+KEEP = 3  # попередні знімки лишаються для клієнтів, що саме їх завантажують
+
+logger = logging.getLogger(__name__)
+
+
+def _write(path: Path, data: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp, 0o644)  # mkstemp створює 0600
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def _shard_order(key: str) -> Tuple[int, int]:
+    # акорди першими: клієнт розбирає пісні, вже знаючи всі chord_ids
+    return (0, 0) if key == CHORDS_SHARD else (1, int(key.partition("-")[2]))
+
+
+class CatalogSnapshot:
+    def __init__(
+        self, directory: Path = CATALOG_DIR, shard_size: int = 1000, tombstone_days: float = 30.0
+    ):
+        self.directory = directory
+        self.shard_size = shard_size
+        self.tombstone_days = tombstone_days
+        self._manifest: Optional[Tuple[Path, int, dict]] = None  # (шлях, mtime_ns, вміст)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def manifest(self) -> Optional[dict]:
+        """Поточний manifest.json (перечитується, лише коли файл змінився)."""
+        path = self.directory / MANIFEST
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+        cached = self._manifest
+        if cached is None or cached[:2] != (path, mtime):
+            cached = self._manifest = (path, mtime, json.loads(path.read_bytes()))
+        return cached[2]
+
+    # ───── build ─────────────────────────────────────────────────────────────
+    def _song_shard(self, song_id: int) -> str:
+        return f"songs-{song_id // self.shard_size}"
+
+    def _build_shard(self, db: Session, key: str) -> Optional[bytes]:
+        if key == CHORDS_SHARD:
+            items = [{"type": "chord", **c} for c in chord_upserts(db)]
+        else:
+            lo = int(key.partition("-")[2]) * self.shard_size
+            songs = song_upserts(db, Song.id >= lo, Song.id < lo + self.shard_size)
+            items = [{"type": "song", **s} for s in songs]
+        if not items:
+            return None
+        return compress(b"".join(json_bytes(item) + b"\n" for item in items), "gzip")
+
+    def _dirty(
+        self, db: Session, current: Optional[dict], head: int, horizon: int
+    ) -> Optional[set]:
+        """Шарди, змінені після ``current``; ``None`` — потрібна повна перебудова."""
+        if (
+            current is None
+            or current["shard_size"] != self.shard_size
+            # надгробки до horizon стиснуто: видалення могли загубитись
+            or current["version"] < horizon
+            or current["version"] > head  # інша БД
+        ):
+            return None
+        return {
+            CHORDS_SHARD if entity == CHORD else self._song_shard(entity_id)
+            for entity, entity_id in db.execute(
+                select(CatalogChange.entity, CatalogChange.entity_id).where(
+                    CatalogChange.version > current["version"]
+                )
+            )
+        }
+
+    def build(self, db: Session) -> Optional[dict]:
+        """Перезбирає знімок, якщо каталог змінився; ``None`` — знімок уже актуальний."""
+        head, horizon = versions(db)
+        current = self.manifest()
+        if current is not None and current["version"] == head:
+            return None
+        started = time.perf_counter()
+        shards_dir = self.directory / "shards"
+        shards_dir.mkdir(parents=True, exist_ok=True)
+
+        dirty = self._dirty(db, current, head, horizon)
+        shards: Dict[str, str] = {}  # шард → sha256 його gzip-члена
+        if dirty is None:
+            lo, hi = db.execute(select(func.min(Song.id), func.max(Song.id))).one()
+            dirty = {CHORDS_SHARD}
+            if lo is not None:
+                dirty.update(
+                    f"songs-{n}" for n in range(lo // self.shard_size, hi // self.shard_size + 1)
+                )
+        else:
+            shards.update(current["shards"])
+            # прибраний вручну файл шарду — збираємо заново
+            dirty.update(k for k, d in shards.items() if not (shards_dir / f"{d}.gz").exists())
+        members: Dict[str, bytes] = {}
+        for key in dirty:
+            data = self._build_shard(db, key)
+            if data is None:
+                shards.pop(key, None)
+                continue
+            members[key] = data
+            shards[key] = hashlib.sha256(data).hexdigest()
+            _write(shards_dir / f"{shards[key]}.gz", data)
+        for key, digest in shards.items():
+            if key not in members:
+                members[key] = (shards_dir / f"{digest}.gz").read_bytes()
+
+        header = compress(json_bytes({"type": "snapshot", "version": head}) + b"\n", "gzip")
+        body = header + b"".join(members[key] for key in sorted(shards, key=_shard_order))
+        name = f"{hashlib.sha256(body).hexdigest()}.gz"
+        _write(self.directory / name, body)
+        manifest = {
+            "version": head,
+            "name": name,
+            "bytes": len(body),
+            "built_at": datetime.datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "shard_size": self.shard_size,
+            "shards": shards,
+        }
+        _write(self.directory / MANIFEST, json_bytes(manifest))
+        self._prune(name, set(shards.values()))
+        logger.info(
+            "catalog snapshot v%d: перезібрано %d з %d шардів, %.1f KiB, %.0f мс",
+            head, len(dirty), len(shards), len(body) / 1024, (time.perf_counter() - started) * 1000,
+        )
+        return manifest
+
+    def _prune(self, current: str, shards: set) -> None:
+        old = sorted(
+            (p for p in self.directory.glob("*.gz") if p.name != current),
+            key=lambda p: p.stat().st_mtime_ns,
+            reverse=True,
+        )
+        for path in old[KEEP - 1:]:
+            path.unlink(missing_ok=True)
+        for path in (self.directory / "shards").glob("*.gz"):
+            if path.stem not in shards:
+                path.unlink(missing_ok=True)
+
+    def refresh(self, db: Session) -> Optional[dict]:
+        """
+        ``compact`` і ``build`` під файловим замком; ``None`` — збирає інший воркер
+        або змін немає.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / ".lock", "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return None
+            removed = compact(db, self.tombstone_days)
+            if removed:
+                logger.info("catalog changes: прибрано %d надгробків", removed)
+            return self.build(db)
+
+    # ───── background job ────────────────────────────────────────────────────
+    def start(self, session_factory: Callable[[], Session], interval: float) -> None:
+        """Фоновий потік: ``refresh`` одразу й далі раз на ``interval`` с (0 — вимкнено)."""
+        if interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(session_factory, interval), name="catalog-snapshot", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+
+    def _run(self, session_factory: Callable[[], Session], interval: float) -> None:
+        while True:
+            try:
+                with session_factory() as db:
+                    self.refresh(db)
+            except Exception:
+                logger.exception("catalog snapshot: збирання не вдалося")
+            if self._stop.wait(interval):
+                return
+
+
+catalog_snapshot = CatalogSnapshot(
+    shard_size=settings.catalog_snapshot_shard, tombstone_days=settings.changes_tombstone_days
+)
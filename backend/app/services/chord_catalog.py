@@ -0,0 +1,247 @@
+"""
+Каталог акордів у пам'яті воркера: список, пошук за id і назвою без запиту до БД.
+
+Акордів небагато, а читаються вони постійно (сторінка акордів, пошук за назвою,
+перевірка id під час збереження), тож каталог лежить у пам'яті цілим. Назви в
+тілах, що кешуються (деталі пісні), беруться з БД тим самим запитом — знімок
+може відставати на інтервал опитування. ``ChordSnapshot`` —
+незмінний знімок з уже розібраними ``strings``; оновлення будує новий знімок
+одним запитом і підміняє його одним присвоєнням, тож читачі без замків бачать
+або старий, або новий каталог повністю.
+
+Версія знімка — ``catalog_version.chord_version``, яку піднімає
+``catalog_changes.record(db, CHORD, …)`` (для змін через ORM його викликає хук
+``after_flush`` у ``catalog_changes``). Фоновий потік воркера раз на
+``CHORD_CATALOG_POLL`` с читає лише це число й перечитує каталог, коли воно
+змінилось. Закомічена зміна акорду через ORM у цьому воркері будить потік
+одразу, як і акорд, якого немає в знімку, але є в БД (щойно доданий іншим
+воркером) — такий промах перевіряється точковим запитом. Запис зв'язку з
+акордом (пісня, «мої акорди») перевіряє id у БД завжди (``existing``).
+"""
+import logging
+import threading
+from types import MappingProxyType
+from typing import Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+from fastapi import Response
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+
+from app.core.encoding import JSON, current_encoding, json_bytes
+from app.models import Chord
+from app.services.catalog_changes import chord_version
+from app.services.song_cache import etag_for, not_modified
+from app.services.shapes import parse_strings_json
+
+logger = logging.getLogger(__name__)
+
+READY_TIMEOUT = 10.0  # скільки запит чекає на перше читання каталогу фоновим потоком
+
+
+class ChordEntry(NamedTuple):
+    id: int
+    name: str
+    strings: Optional[Tuple[int, ...]]  # None — аплікатури немає або вона некоректна
+    description: Optional[str]
+    image_url: Optional[str]
+    audio_url: Optional[str]
+
+
+class ChordSnapshot(NamedTuple):
+    version: int
+    chords: Tuple[ChordEntry, ...]  # за id
+    by_id: Mapping[int, ChordEntry]
+    by_name: Mapping[str, Tuple[ChordEntry, ...]]
+    items: Tuple[dict, ...]  # елементи відповіді, у порядку ``chords``
+    body: bytes  # JSON усього списку — GET /chords без серіалізації
+    etag: str
+
+
+def _entry(c: Chord) -> ChordEntry:
+    return ChordEntry(
+        c.id, c.name, parse_strings_json(c.strings_json), c.description, c.image_url, c.audio_url
+    )
+
+
+def _snapshot(version: int, rows: Iterable[Chord]) -> ChordSnapshot:
+    chords = tuple(_entry(c) for c in rows)
+    by_name: Dict[str, List[ChordEntry]] = {}
+    for c in chords:
+        by_name.setdefault(c.name, []).append(c)
+    items = tuple(c._asdict() for c in chords)
+    body = json_bytes(items)
+    return ChordSnapshot(
+        version=version,
+        chords=chords,
+        by_id=MappingProxyType({c.id: c for c in chords}),
+        by_name=MappingProxyType({n: tuple(cs) for n, cs in by_name.items()}),
+        items=items,
+        body=body,
+        etag=etag_for(body),
+    )
+
+
+class ChordCatalog:
+    def __init__(self):
+        self._snapshot = _snapshot(0, ())
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._ready = threading.Event()  # перший rebuild уже був
+        self.reloads = 0
+
+    @property
+    def snapshot(self) -> ChordSnapshot:
+        # воркер стартує, не чекаючи каталогу: перші запити чекають на потік, а не
+        # віддають порожній список; без потоку (тести, скрипти) знімок будує rebuild
+        if self._thread is not None and not self._ready.is_set():
+            self._ready.wait(READY_TIMEOUT)
+        return self._snapshot
+
+    # ───── DB sync ───────────────────────────────────────────────────────────
+    def rebuild(self, db: Session) -> ChordSnapshot:
+        # версію — до читання: зміна посеред читання дасть ще одну перебудову, а не пропуск
+        self._wake.clear()
+        version = chord_version(db)
+        snapshot = _snapshot(version, db.scalars(select(Chord).order_by(Chord.id)))
+        self._snapshot = snapshot
+        self._ready.set()
+        self.reloads += 1
+        return snapshot
+
+    def refresh(self, db: Session) -> bool:
+        """Перечитує каталог, якщо версія в БД інша або його позначено застарілим."""
+        if (
+            self._ready.is_set()
+            and not self._wake.is_set()
+            and chord_version(db) == self._snapshot.version
+        ):
+            return False
+        self.rebuild(db)
+        return True
+
+    def mark_stale(self) -> None:
+        self._wake.set()
+
+    # ───── query ─────────────────────────────────────────────────────────────
+    def get(self, chord_id: int) -> Optional[ChordEntry]:
+        return self.snapshot.by_id.get(chord_id)
+
+    def by_name(self, name: str) -> Tuple[ChordEntry, ...]:
+        return self.snapshot.by_name.get(name.strip(), ())
+
+    def search(self, text: str) -> List[dict]:
+        snapshot = self.snapshot
+        needle = text.strip().casefold()
+        return [
+            item for c, item in zip(snapshot.chords, snapshot.items)
+            if needle in c.name.casefold()
+        ]
+
+    def respond(self, request_headers: Mapping[str, str]) -> Response:
+        """Увесь каталог готовими байтами; ``304``, якщо ``If-None-Match`` збігся."""
+        snapshot = self.snapshot
+        encoding = current_encoding()
+        if encoding is JSON:
+            etag, body = snapshot.etag, snapshot.body
+        else:
+            etag, body = f'{snapshot.etag[:-1]}-{encoding.name}"', None
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Accept"}
+        if not_modified(request_headers, etag):
+            return Response(status_code=304, headers=headers)
+        if body is None:
+            body = encoding.dumps(snapshot.items)
+        return Response(body, media_type=encoding.media_type, headers=headers)
+
+    def lookup(self, db: Session, ids: Iterable[int]) -> Dict[int, ChordEntry]:
+        """Наявні акорди з ``ids``; кого немає в знімку — перевіряє в БД одним запитом."""
+        by_id = self.snapshot.by_id
+        found: Dict[int, ChordEntry] = {}
+        missing: List[int] = []
+        for chord_id in dict.fromkeys(ids):
+            entry = by_id.get(chord_id)
+            if entry is not None:
+                found[chord_id] = entry
+            else:
+                missing.append(chord_id)
+        if missing:
+            rows = db.scalars(select(Chord).where(Chord.id.in_(missing))).all()
+            found.update((c.id, _entry(c)) for c in rows)
+            if rows:  # знімок відстав — потік перечитає каталог, не чекаючи інтервалу
+                self.mark_stale()
+        return found
+
+    def existing(self, db: Session, ids: Iterable[int]) -> List[int]:
+        """
+        Id з ``ids``, що є в БД, — для запису (зв'язок з акордом): знімок може ще
+        тримати акорд, видалений іншим воркером, і запис упав би на FK. Розбіжність
+        зі знімком будить перечитування.
+        """
+        ids = list(dict.fromkeys(ids))
+        present = set(db.scalars(select(Chord.id).where(Chord.id.in_(ids)))) if ids else set()
+        by_id = self.snapshot.by_id
+        if any((i in present) != (i in by_id) for i in ids):
+            self.mark_stale()
+        return [i for i in ids if i in present]
+
+    # ───── background job ────────────────────────────────────────────────────
+    def start(self, session_factory: Callable[[], Session], interval: float) -> None:
+        """
+        Фоновий потік: ``refresh`` раз на ``interval`` с або одразу після ``mark_stale``;
+        ``interval <= 0`` — лише перше читання (старт воркера його не чекає).
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(session_factory, interval), name="chord-catalog", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            self._wake.set()
+            thread.join()
+
+    def _run(self, session_factory: Callable[[], Session], interval: float) -> None:
+        while True:
+            try:
+                with session_factory() as db:
+                    self.refresh(db)
+            except Exception:
+                logger.exception("chord catalog: оновлення не вдалося")
+                # mark_stale не повинен крутити цикл, поки БД недоступна
+                self._stop.wait(interval if interval > 0 else 1.0)
+            else:
+                if interval <= 0:
+                    return
+                self._wake.wait(interval)
+            if self._stop.is_set():
+                return
+
+
+chord_catalog = ChordCatalog()
+
+
+# під час flush зміна ще не закомічена: перечитування зараз побачило б старий каталог
+# і вважало б себе свіжим — тож лише позначка в сесії, а будимо потік після коміту
+@event.listens_for(Chord, "after_insert")
+@event.listens_for(Chord, "after_update")
+@event.listens_for(Chord, "after_delete")
+def _chords_changed(mapper, connection, target: Chord) -> None:
+    session = object_session(target)
+    if session is not None:
+        session.info["chords_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _chords_committed(session: Session) -> None:
+    if session.info.pop("chords_changed", False):
+        chord_catalog.mark_stale()
+
+
+@event.listens_for(Session, "after_rollback")
+def _chords_rolled_back(session: Session) -> None:
+    session.info.pop("chords_changed", None)
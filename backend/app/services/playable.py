@@ -0,0 +1,251 @@
+"""
+Індекс «пісні, які я можу зіграти».
+
+Для кожної пісні зберігається бітова маска її акордів (рядок ``uint64`` на
+пісню, біт = id акорду), а для кожного акорду — транспонований бітсет пісень,
+де він трапляється (біт = id пісні). Запит «чого бракує до набору U» рахується
+лише побітовими операціями над бітсетами акордів поза U: насичувальні лічильники
+``missing ≥ 1``, ``missing ≥ 2``, … оновлюються векторно по всьому каталогу,
+тож вартість залежить від кількості акордів, а не пісень.
+"""
+import threading
+import time
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+_ONE = np.uint64(1)
+
+
+def _bit(pos: int) -> np.uint64:
+    return _ONE << np.uint64(pos & 63)
+
+
+def _positions(words: np.ndarray) -> np.ndarray:
+    """Номери встановлених бітів бітсету (word i, bit j → i * 64 + j)."""
+    return np.flatnonzero(np.unpackbits(words.astype("<u8").view(np.uint8), bitorder="little"))
+
+
+def _set_bits(words: np.ndarray, positions: np.ndarray) -> None:
+    positions = np.asarray(positions, np.int64)
+    np.bitwise_or.at(words, positions >> 6, _ONE << (positions & 63).astype(np.uint64))
+
+
+class PlayableIndex:
+    def __init__(self, refresh_interval: float = 1.0, user_ttl: float = 30.0):
+        self.refresh_interval = refresh_interval
+        self.user_ttl = user_ttl
+        self._lock = threading.RLock()
+        self.ready = False  # False — ще жодної побудови, її зробить ensure
+        self._build_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._cap = 0  # місткість за id пісні, кратна 64
+        self._song_bits = np.zeros((0, 1), np.uint64)  # [song_id] → маска акордів
+        self._chord_songs: Dict[int, np.ndarray] = {}  # chord_id → бітсет пісень
+        self._alive = np.zeros(0, np.uint64)
+        self._max_id = 0
+        self._version = 0  # версія журналу змін, до якої індекс актуальний
+        self._last_refresh = 0.0
+        self._users: Dict[int, Tuple[FrozenSet[int], float]] = {}
+
+    def __len__(self) -> int:
+        return int(len(_positions(self._alive)))
+
+    # ───── storage growth ────────────────────────────────────────────────────
+    def _ensure_song(self, song_id: int) -> None:
+        if song_id < self._cap:
+            return
+        cap = max(64, self._cap)
+        while cap <= song_id:
+            cap *= 2
+        grow = (cap - self._cap) // 64
+        self._alive = np.concatenate([self._alive, np.zeros(grow, np.uint64)])
+        for c, bits in self._chord_songs.items():
+            self._chord_songs[c] = np.concatenate([bits, np.zeros(grow, np.uint64)])
+        rows = np.zeros((cap, self._song_bits.shape[1]), np.uint64)
+        rows[: self._cap] = self._song_bits
+        self._song_bits, self._cap = rows, cap
+
+    def _ensure_chord(self, chord_id: int) -> None:
+        words = chord_id // 64 + 1
+        if words > self._song_bits.shape[1]:
+            rows = np.zeros((self._cap, words), np.uint64)
+            rows[:, : self._song_bits.shape[1]] = self._song_bits
+            self._song_bits = rows
+        if chord_id not in self._chord_songs:
+            self._chord_songs[chord_id] = np.zeros(self._cap // 64, np.uint64)
+
+    # ───── mutation ──────────────────────────────────────────────────────────
+    def add_song(self, song_id: int, chord_ids: Iterable[int]) -> None:
+        with self._lock:
+            self.remove_song(song_id)
+            self._ensure_song(song_id)
+            for c in set(chord_ids):
+                self._ensure_chord(c)
+                self._song_bits[song_id, c >> 6] |= _bit(c)
+                self._chord_songs[c][song_id >> 6] |= _bit(song_id)
+            self._alive[song_id >> 6] |= _bit(song_id)
+            self._max_id = max(self._max_id, song_id)
+
+    def remove_song(self, song_id: int) -> None:
+        with self._lock:
+            if song_id >= self._cap:
+                return
+            mask = ~_bit(song_id)
+            for c in _positions(self._song_bits[song_id]):
+                self._chord_songs[int(c)][song_id >> 6] &= mask
+            self._song_bits[song_id] = 0
+            self._alive[song_id >> 6] &= mask
+
+    def bulk_load(self, song_ids: Iterable[int], pairs: Iterable[Tuple[int, int]]) -> None:
+        """Повна перебудова з (song_id, chord_id) — векторно, без циклу по піснях."""
+        songs = np.fromiter(song_ids, np.int64)
+        edges = np.array(list(pairs), np.int64).reshape(-1, 2)
+        with self._lock:
+            self._reset()
+            if len(songs):
+                self._ensure_song(int(songs.max()))
+                self._max_id = int(songs.max())
+            for c in np.unique(edges[:, 1]):
+                self._ensure_chord(int(c))
+            _set_bits(self._alive, songs)
+            order = np.argsort(edges[:, 1], kind="stable")
+            by_chord = edges[order]
+            chords, starts = np.unique(by_chord[:, 1], return_index=True)
+            for c, part in zip(chords, np.split(by_chord[:, 0], starts[1:])):
+                _set_bits(self._chord_songs[int(c)], part)
+            np.bitwise_or.at(
+                self._song_bits,
+                (edges[:, 0], edges[:, 1] >> 6),
+                _ONE << (edges[:, 1] & 63).astype(np.uint64),
+            )
+
+    # ───── users' saved chords ───────────────────────────────────────────────
+    def user_chords(self, db: Session, user_id: int) -> FrozenSet[int]:
+        """Збережені акорди користувача; кеш оновлюють save/unsave, а TTL підхоплює інші воркери."""
+        from app.models import UserChord
+
+        cached = self._users.get(user_id)
+        if cached is not None and time.monotonic() - cached[1] < self.user_ttl:
+            return cached[0]
+        chords = frozenset(
+            db.scalars(select(UserChord.chord_id).where(UserChord.user_id == user_id))
+        )
+        self._users[user_id] = (chords, time.monotonic())
+        return chords
+
+    def chord_saved(self, user_id: int, chord_id: int) -> None:
+        with self._lock:
+            cached = self._users.get(user_id)
+            if cached is not None:
+                self._users[user_id] = (cached[0] | {chord_id}, cached[1])
+
+    def chord_unsaved(self, user_id: int, chord_id: int) -> None:
+        with self._lock:
+            cached = self._users.get(user_id)
+            if cached is not None:
+                self._users[user_id] = (cached[0] - {chord_id}, cached[1])
+
+    def forget_user(self, user_id: int) -> None:
+        """Пакетна зміна збережених — простіше перечитати набір при наступному запиті."""
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    # ───── DB sync ───────────────────────────────────────────────────────────
+    def rebuild(self, db: Session) -> None:
+        from app.models import Song, SongChord
+        from app.services.catalog_changes import versions
+
+        version = versions(db)[0]  # до читання: зміни під час нього refresh застосує ще раз
+        song_ids = db.scalars(select(Song.id))
+        pairs = db.execute(select(SongChord.song_id, SongChord.chord_id))
+        self.bulk_load(song_ids, pairs)
+        self._version = version
+        self._last_refresh = time.monotonic()
+        self.ready = True
+
+    def ensure(self, db: Session) -> None:
+        """Перша побудова — у фоновому прогріві воркера або в першому запиті, хто раніше."""
+        if self.ready:
+            return
+        with self._build_lock:
+            if not self.ready:
+                self.rebuild(db)
+
+    def refresh(self, db: Session) -> None:
+        """Зміни пісень з інших воркерів за журналом змін (не частіше за refresh_interval)."""
+        from app.models import Song, SongChord
+        from app.core.replicas import pinned
+        from app.services.catalog_changes import song_changes
+
+        self.ensure(db)
+        now = time.monotonic()
+        if now - self._last_refresh < self.refresh_interval and not pinned():
+            return
+        self._last_refresh = now
+        changes = song_changes(db, self._version)
+        if changes is None:
+            self.rebuild(db)
+            return
+        for sid in changes.deleted:
+            self.remove_song(sid)
+        if changes.changed is not None:
+            songs = db.scalars(select(Song.id).where(Song.id.in_(changes.changed)))
+            changed: Dict[int, Set[int]] = {sid: set() for sid in songs}
+            rows = db.execute(
+                select(SongChord.song_id, SongChord.chord_id).where(
+                    SongChord.song_id.in_(changes.changed)
+                )
+            )
+            for sid, cid in rows:
+                changed[sid].add(cid)
+            for sid, chords in changed.items():
+                self.add_song(sid, chords)
+        self._version = changes.version
+
+    # ───── query ─────────────────────────────────────────────────────────────
+    def query(
+        self, have: Iterable[int], max_missing: int = 2, limit: int = 50
+    ) -> List[Tuple[int, List[int]]]:
+        """
+        Пісні, яким бракує не більше ``max_missing`` акордів з набору ``have``:
+        ``[(song_id, [id відсутніх акордів]), …]``, спершу ті, де бракує менше.
+        """
+        have = set(have)
+        with self._lock:
+            n = self._cap // 64
+            # at_least[k] — пісні, яким бракує ≥ k + 1 акордів
+            at_least = [np.zeros(n, np.uint64) for _ in range(max_missing + 1)]
+            tmp = np.empty(n, np.uint64)
+            for c, songs in self._chord_songs.items():
+                if c in have:
+                    continue
+                for k in range(max_missing, 0, -1):
+                    np.bitwise_and(at_least[k - 1], songs, out=tmp)
+                    np.bitwise_or(at_least[k], tmp, out=at_least[k])
+                np.bitwise_or(at_least[0], songs, out=at_least[0])
+
+            have_words = np.zeros(self._song_bits.shape[1], np.uint64)
+            _set_bits(have_words, [c for c in have if c >> 6 < len(have_words)])
+            out: List[Tuple[int, List[int]]] = []
+            for missing in range(max_missing + 1):
+                tier = self._alive & ~at_least[missing]
+                if missing:
+                    tier &= at_least[missing - 1]
+                # кожне ненульове слово дає ≥ 1 пісню — розпаковуємо лише потрібні слова
+                words = np.flatnonzero(tier)[: limit - len(out)]
+                bits = np.unpackbits(tier[words].astype("<u8").view(np.uint8), bitorder="little")
+                songs = (np.repeat(words, 64) * 64 + np.tile(np.arange(64), len(words)))[bits == 1]
+                for sid in songs[: limit - len(out)]:
+                    lacks = _positions(self._song_bits[sid] & ~have_words)
+                    out.append((int(sid), [int(c) for c in lacks]))
+                if len(out) >= limit:
+                    break
+        return out
+
+
+playable_index = PlayableIndex()
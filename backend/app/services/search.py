@@ -0,0 +1,312 @@
+"""
+Інвертований індекс для пошуку пісень за назвою та текстом.
+
+Без залежності від Postgres: індекс будується з будь-якої SQLAlchemy-сесії
+(у тестах — SQLite) і оновлюється інкрементально з ``create_song`` /
+``delete_song``, а зміни з інших воркерів — за журналом ``catalog_changes``.
+Ранжування — BM25 з підсиленням назви, останнє слово запиту трактується як
+префікс (пошук «під час набору»), усі слова обов'язкові.
+
+Постинги зберігаються як у LSM: «базовий» сегмент — NumPy-масиви (id пісні,
+внесок BM25) на кожен терм, нові пісні — у невеликому словнику-дельті,
+видалені з бази — у множині-«надгробках». Коли дельта чи надгробки
+розростаються, вони зливаються в базу. Запит рахується векторно по щільному
+масиву балів, тож його вартість не залежить від частоти слів у Python-циклах.
+"""
+import bisect
+import math
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+# апостроф усередині слова (м’ята, don't) не розриває його — просто прибираємо.
+# Ланцюжок str.replace, а не str.translate: на кирилиці він у рази швидший
+_FOLD = (("'", ""), ("’", ""), ("ʼ", ""), ("`", ""), ("ґ", "г"), ("ё", "е"))
+_WORD_RE = re.compile(r"[^\W_]+")
+# é → e, ü → u; діакритика після кирилиці (й, ї) лишається — це окремі літери
+_LATIN_MARKS_RE = re.compile(r"(?<=[a-z])[\u0300-\u036f]+")
+_HAS_MARKS_RE = re.compile(r"[\u00c0-\u024f\u0300-\u036f]")
+
+TITLE_WEIGHT = 3.0
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+SongRow = Tuple[int, Optional[str], Optional[str]]
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    if not text:
+        return []
+    text = text.casefold()
+    for old, new in _FOLD:
+        text = text.replace(old, new)
+    if not text.isascii() and _HAS_MARKS_RE.search(text):
+        text = unicodedata.normalize(
+            "NFC", _LATIN_MARKS_RE.sub("", unicodedata.normalize("NFD", text))
+        )
+    return _WORD_RE.findall(text)
+
+
+def _term_freqs(title: Optional[str], lyrics: Optional[str]) -> Dict[str, float]:
+    freqs: Dict[str, float] = Counter(tokenize(lyrics))
+    for t in tokenize(title):
+        freqs[t] += TITLE_WEIGHT
+    return freqs
+
+
+def _impact(tf, length, avg_len):
+    # BM25 без idf: idf множиться під час запиту, бо залежить від поточного df
+    return tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_len))
+
+
+class SongSearchIndex:
+    def __init__(
+        self,
+        max_expansions: int = 50,
+        delta_limit: int = 1000,
+        refresh_interval: float = 1.0,
+    ):
+        self.max_expansions = max_expansions
+        self.delta_limit = delta_limit
+        self.refresh_interval = refresh_interval
+        self._lock = threading.RLock()
+        self.ready = False  # False — ще жодної побудови, її зробить ensure
+        self._build_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._base: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._delta: Dict[str, Dict[int, float]] = {}
+        self._delta_docs: Dict[int, Tuple[str, ...]] = {}
+        self._tombstones: Set[int] = set()
+        self._tomb_arr = np.empty(0, np.int32)
+        self._terms: List[str] = []  # відсортований словник для префіксного пошуку
+        self._doc_len: Dict[int, float] = {}
+        self._total_len = 0.0
+        self._max_id = 0
+        self._version = 0  # версія журналу змін, до якої індекс актуальний
+        self._last_refresh = 0.0
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    # ───── mutation ──────────────────────────────────────────────────────────
+    def add(self, song_id: int, title: Optional[str], lyrics: Optional[str] = None) -> None:
+        freqs = _term_freqs(title, lyrics)
+        length = sum(freqs.values())
+        with self._lock:
+            if song_id in self._doc_len:
+                self.remove(song_id)
+            self._doc_len[song_id] = length
+            self._total_len += length
+            self._max_id = max(self._max_id, song_id)
+            avg_len = self._total_len / len(self._doc_len)
+            for term, tf in freqs.items():
+                postings = self._delta.get(term)
+                if postings is None:
+                    postings = self._delta[term] = {}
+                    if term not in self._base:
+                        bisect.insort(self._terms, term)
+                postings[song_id] = _impact(tf, length, avg_len)
+            self._delta_docs[song_id] = tuple(freqs)
+            if len(self._delta_docs) >= self.delta_limit:
+                self._compact()
+
+    def remove(self, song_id: int) -> None:
+        with self._lock:
+            length = self._doc_len.pop(song_id, None)
+            if length is None:
+                return
+            self._total_len -= length
+            terms = self._delta_docs.pop(song_id, None)
+            if terms is None:
+                self._tombstones.add(song_id)
+                self._tomb_arr = np.fromiter(self._tombstones, np.int32, len(self._tombstones))
+                if len(self._tombstones) >= self.delta_limit:
+                    self._compact()
+                return
+            for term in terms:
+                postings = self._delta[term]
+                del postings[song_id]
+                if not postings:
+                    del self._delta[term]
+                    if term not in self._base:
+                        del self._terms[bisect.bisect_left(self._terms, term)]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset()
+
+    def bulk_load(self, rows: Iterable[SongRow]) -> None:
+        """Повна перебудова одразу в базовий сегмент (без проходу через дельту)."""
+        vocab: Dict[str, int] = {}
+        term_buf, doc_buf, tf_buf = array("i"), array("i"), array("f")
+        lengths: Dict[int, float] = {}
+        for song_id, title, lyrics in rows:
+            freqs = _term_freqs(title, lyrics)
+            for term, tf in freqs.items():
+                term_buf.append(vocab.setdefault(term, len(vocab)))
+                doc_buf.append(song_id)
+                tf_buf.append(tf)
+            lengths[song_id] = sum(freqs.values())
+
+        term_ids = np.frombuffer(term_buf, np.int32)
+        docs = np.frombuffer(doc_buf, np.int32)
+        tfs = np.frombuffer(tf_buf, np.float32)
+        doc_len = np.zeros(max(lengths, default=0) + 1, np.float32)
+        doc_len[list(lengths)] = list(lengths.values())
+        avg_len = max(sum(lengths.values()) / max(len(lengths), 1), 1.0)
+
+        order = np.argsort(term_ids, kind="stable")
+        docs = docs[order]
+        impacts = _impact(tfs[order], doc_len[docs], avg_len).astype(np.float32)
+        bounds = np.searchsorted(term_ids[order], np.arange(len(vocab) + 1))
+
+        with self._lock:
+            self._reset()
+            for term, i in vocab.items():
+                self._base[term] = (docs[bounds[i]:bounds[i + 1]], impacts[bounds[i]:bounds[i + 1]])
+            self._terms = sorted(vocab)
+            self._doc_len = lengths
+            self._total_len = float(sum(lengths.values()))
+            self._max_id = max(lengths, default=0)
+
+    def _compact(self) -> None:
+        # надгробки вирізаємо з бази до злиття дельти: пісня могла бути видалена
+        # й додана знову з тим самим id
+        if self._tombstones:
+            for term, (ids, impacts) in list(self._base.items()):
+                keep = ~np.isin(ids, self._tomb_arr)
+                if not keep.all():
+                    self._base[term] = (ids[keep], impacts[keep])
+        for term, postings in self._delta.items():
+            ids = np.fromiter(postings.keys(), np.int32, len(postings))
+            impacts = np.fromiter(postings.values(), np.float32, len(postings))
+            if term in self._base:
+                base_ids, base_impacts = self._base[term]
+                ids = np.concatenate([base_ids, ids])
+                impacts = np.concatenate([base_impacts, impacts])
+            self._base[term] = (ids, impacts)
+        self._base = {t: p for t, p in self._base.items() if len(p[0])}
+        self._terms = sorted(self._base)
+        self._delta, self._delta_docs = {}, {}
+        self._tombstones, self._tomb_arr = set(), np.empty(0, np.int32)
+
+    # ───── DB sync ───────────────────────────────────────────────────────────
+    def rebuild(self, db: Session) -> None:
+        from app.models import Song
+        from app.services.catalog_changes import versions
+
+        version = versions(db)[0]  # до читання: зміни під час нього refresh застосує ще раз
+        rows = db.query(Song.id, Song.title, Song.lyrics).order_by(Song.id).yield_per(1000)
+        self.bulk_load(rows)
+        self._version = version
+        self._last_refresh = time.monotonic()
+        self.ready = True
+
+    def ensure(self, db: Session) -> None:
+        """Перша побудова — у фоновому прогріві воркера або в першому запиті, хто раніше."""
+        if self.ready:
+            return
+        with self._build_lock:
+            if not self.ready:
+                self.rebuild(db)
+
+    def refresh(self, db: Session) -> None:
+        """Зміни пісень з інших воркерів за журналом змін (не частіше за refresh_interval)."""
+        from app.models import Song
+        from app.core.replicas import pinned
+        from app.services.catalog_changes import song_changes
+
+        self.ensure(db)
+        now = time.monotonic()
+        if now - self._last_refresh < self.refresh_interval and not pinned():
+            return
+        self._last_refresh = now
+        changes = song_changes(db, self._version)
+        if changes is None:
+            self.rebuild(db)
+            return
+        for song_id in changes.deleted:
+            self.remove(song_id)
+        if changes.changed is not None:
+            rows = db.query(Song.id, Song.title, Song.lyrics).filter(Song.id.in_(changes.changed))
+            for row in rows:
+                self.add(row.id, row.title, row.lyrics)
+        self._version = changes.version
+
+    # ───── query ─────────────────────────────────────────────────────────────
+    def _expand(self, prefix: str) -> List[str]:
+        i = bisect.bisect_left(self._terms, prefix)
+        out = []
+        while i < len(self._terms) and self._terms[i].startswith(prefix):
+            out.append(self._terms[i])
+            if len(out) >= self.max_expansions:
+                break
+            i += 1
+        return out
+
+    def _idf(self, term: str) -> float:
+        base = self._base.get(term)
+        df = len(self._delta.get(term, ()))
+        if base is not None:
+            df += len(base[0])
+            if len(self._tomb_arr):  # видалені до злиття не рахуються, інакше idf < 0
+                df -= int(np.count_nonzero(np.isin(base[0], self._tomb_arr)))
+        n = len(self._doc_len)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def _group_scores(self, terms: List[str], size: int) -> np.ndarray:
+        # бал слова для кожної пісні = найкращий серед його варіантів (префікс)
+        scores = np.zeros(size, np.float32)
+        idfs = [self._idf(t) for t in terms]
+        for term, idf in zip(terms, idfs):
+            base = self._base.get(term)
+            if base is not None:
+                ids, impacts = base  # у межах терма id унікальні
+                scores[ids] = np.maximum(scores[ids], impacts * idf)
+        if len(self._tomb_arr):
+            scores[self._tomb_arr] = 0.0
+        for term, idf in zip(terms, idfs):
+            for doc, impact in self._delta.get(term, {}).items():
+                if impact * idf > scores[doc]:
+                    scores[doc] = impact * idf
+        return scores
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Tuple[int, float]]:
+        """``[(song_id, score), …]`` за спаданням релевантності."""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        with self._lock:
+            words = [[t] for t in tokens[:-1]]
+            last = tokens[-1]
+            words.append(self._expand(last) if len(last) >= 2 else [last])
+            size = self._max_id + 1
+            total = np.zeros(size, np.float32)
+            hits = np.zeros(size, np.int16)
+            for terms in words:
+                terms = [t for t in terms if t in self._base or t in self._delta]
+                if not terms:
+                    return []
+                scores = self._group_scores(terms, size)
+                total += scores
+                hits += scores > 0
+
+        ids = np.flatnonzero(hits == len(words))
+        scores = total[ids]
+        if limit is not None and len(ids) > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            ids, scores = ids[top], scores[top]
+        order = np.lexsort((ids, -scores))
+        return [(int(i), float(s)) for i, s in zip(ids[order], scores[order])]
+
+
+song_index = SongSearchIndex()
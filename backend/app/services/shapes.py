@@ -0,0 +1,69 @@
+"""
+Аплікатури акордів як значення: розбір, формат і пакування в ціле.
+
+Аплікатура — шість значень (від 6-ї струни до 1-ї): -1 — заглушена, 0 — відкрита,
+n — лад. Чистий Python без numpy: ним користуються каталог акордів і роутери, що
+мають імпортуватися швидко, а векторний пошук — у ``app.services.voicings``.
+"""
+import json
+from typing import List, Optional, Sequence, Tuple
+
+STRINGS = 6
+MUTED = -1
+MAX_FRET = 30  # 5 біт на струну, 0 зайнятий під «заглушена»
+_BITS = 5
+_MASK = (1 << _BITS) - 1
+
+
+# ───── encoding ──────────────────────────────────────────────────────────────
+def pack(frets: Sequence[int]) -> int:
+    """Шість ладів → ціле (30 біт); ValueError, якщо аплікатура некоректна."""
+    if len(frets) != STRINGS:
+        raise ValueError("потрібно 6 струн")
+    code = 0
+    for f in frets:
+        if not MUTED <= f <= MAX_FRET:
+            raise ValueError(f"лад поза межами: {f}")
+        code = (code << _BITS) | (f + 1)
+    return code
+
+
+def unpack(code: int) -> Tuple[int, ...]:
+    return tuple(((code >> (_BITS * i)) & _MASK) - 1 for i in range(STRINGS - 1, -1, -1))
+
+
+def parse_shape(text: str, wildcards: bool = False) -> List[Optional[int]]:
+    """
+    ``x02210`` або ``x,0,2,2,1,0`` (роздільник обов'язковий, якщо є лади ≥ 10).
+    ``x`` — заглушена; ``?`` — будь-що (лише з ``wildcards``, дає ``None``).
+    """
+    text = text.strip()
+    tokens = text.replace(",", " ").split() if ("," in text or " " in text) else list(text)
+    if len(tokens) != STRINGS:
+        raise ValueError("потрібно 6 струн")
+    out: List[Optional[int]] = []
+    for t in tokens:
+        if t in ("x", "X", "-1"):
+            out.append(MUTED)
+        elif t in ("?", "*") and wildcards:
+            out.append(None)
+        elif t.isdigit() and int(t) <= MAX_FRET:
+            out.append(int(t))
+        else:
+            raise ValueError(f"невідома струна: {t!r}")
+    return out
+
+
+def format_shape(frets: Sequence[int]) -> str:
+    marks = ["x" if f == MUTED else str(f) for f in frets]
+    return ("" if all(len(m) == 1 for m in marks) else ",").join(marks)
+
+
+def parse_strings_json(raw: Optional[str]) -> Optional[Tuple[int, ...]]:
+    """``Chord.strings_json`` → аплікатура або None, якщо її немає чи вона некоректна."""
+    try:
+        frets = tuple(json.loads(raw or "[]"))
+        pack(frets)
+    except (TypeError, ValueError):
+        return None
+    return frets
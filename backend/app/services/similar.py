@@ -0,0 +1,330 @@
+"""
+«Схожі пісні» за набором акордів: MinHash + LSH.
+
+Підпис пісні — ``K`` мінімумів універсальних хешів ``(a·chord + b) mod p`` по її
+акордах; частка однакових позицій двох підписів оцінює Jaccard їхніх наборів.
+Підпис ділиться на ``BANDS`` смуг по ``ROWS`` значень, і кожна смуга хешується в
+ключ: кандидати — пісні, що збіглися з запитом хоча б в одній смузі (для
+Jaccard ≥ ~0.6 імовірність потрапити в кандидати > 90 %). Кандидати ранжуються
+оцінкою Jaccard, за бажання — з бонусом за той самий жанр.
+
+Смуги зберігаються як у ``search``: «базовий» сегмент — відсортовані NumPy-масиви
+ключів і id на кожну смугу (пошук — ``searchsorted``), нові пісні — у словниках-
+дельтах, видалені — знімаються прапорцем ``alive``. Коли змін набирається
+``compact_at``, база перебудовується векторно з масиву підписів.
+
+Підписи (не смуги — їх дешево перебудувати) зберігаються в ``.npz``: після
+перезапуску воркер читає файл і добирає з БД лише різницю.
+"""
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.replicas import pinned
+from app.models import Genre, Song, SongChord
+from app.services.catalog_changes import song_changes, versions
+
+K = 32
+BANDS = 8
+ROWS = K // BANDS
+MAX_BUCKET = 5_000  # популярні набори акордів дають величезні кошики — не скануємо все
+_PRIME = (1 << 31) - 1
+_EMPTY = np.uint32(0xFFFFFFFF)  # підпис пісні без акордів
+_GENRES = list(Genre)
+_CHUNK = 200_000  # пісень за раз при масовому підрахунку підписів
+_IN_CHUNK = 1000
+
+SongHit = Tuple[int, float, float]  # (id, бал, оцінка Jaccard)
+
+
+def genre_code(genre: Optional[Genre]) -> int:
+    return _GENRES.index(Genre(genre)) if genre is not None else -1
+
+
+class SimilarSongsIndex:
+    def __init__(
+        self, seed: int = 1, refresh_interval: float = 1.0, compact_at: int = 50_000, path: str = ""
+    ):
+        self.seed = seed
+        self.path = path  # файл підписів для ensure (open)
+        self.refresh_interval = refresh_interval
+        self.compact_at = compact_at
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, K, dtype=np.int64)
+        self._b = rng.integers(0, _PRIME, K, dtype=np.int64)
+        self._mult = rng.integers(1, 1 << 62, ROWS, dtype=np.uint64) | np.uint64(1)
+        self._lock = threading.RLock()
+        self.ready = False  # False — ще жодної побудови, її зробить ensure
+        self._build_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._cap = 0
+        self._sig = np.zeros((0, K), np.uint32)  # [song_id] → підпис
+        self._alive = np.zeros(0, bool)
+        self._genre = np.zeros(0, np.int8)
+        self._base_keys = [np.empty(0, np.uint64) for _ in range(BANDS)]
+        self._base_ids = [np.empty(0, np.int32) for _ in range(BANDS)]
+        self._delta: List[Dict[int, List[int]]] = [{} for _ in range(BANDS)]
+        self._changes = 0
+        self._max_id = 0
+        self._version = 0  # версія журналу змін, до якої індекс актуальний
+        self._last_refresh = 0.0
+
+    def __len__(self) -> int:
+        return int(self._alive.sum())
+
+    # ───── hashing ───────────────────────────────────────────────────────────
+    def _hash(self, chord_ids: np.ndarray) -> np.ndarray:
+        x = chord_ids.astype(np.int64)[:, None]
+        return ((self._a * x + self._b) % _PRIME).astype(np.uint32)
+
+    def signatures(self, song_ids: np.ndarray, pairs: np.ndarray) -> np.ndarray:
+        """Підписи для відсортованих ``song_ids`` з пар (song_id, chord_id)."""
+        sig = np.full((len(song_ids), K), _EMPTY, np.uint32)
+        if not len(pairs):
+            return sig
+        pos = np.searchsorted(song_ids, pairs[:, 0])
+        order = np.argsort(pos, kind="stable")
+        pos, chords = pos[order], pairs[order, 1]
+        starts = np.flatnonzero(np.r_[True, pos[1:] != pos[:-1]])
+        for lo in range(0, len(starts), _CHUNK):
+            part = starts[lo:lo + _CHUNK]
+            end = starts[lo + _CHUNK] if lo + _CHUNK < len(starts) else len(pos)
+            h = self._hash(chords[part[0]:end])
+            sig[pos[part]] = np.minimum.reduceat(h, part - part[0], axis=0)
+        return sig
+
+    def _band_keys(self, sig: np.ndarray) -> np.ndarray:
+        bands = sig.reshape(len(sig), BANDS, ROWS).astype(np.uint64)
+        return (bands * self._mult).sum(axis=2, dtype=np.uint64)  # переповнення — частина хешу
+
+    # ───── mutation ──────────────────────────────────────────────────────────
+    def _ensure(self, song_id: int) -> None:
+        if song_id < self._cap:
+            return
+        cap = max(self._cap, 1024)
+        while cap <= song_id:
+            cap *= 2
+        sig = np.full((cap, K), _EMPTY, np.uint32)
+        sig[: self._cap] = self._sig
+        alive = np.zeros(cap, bool)
+        alive[: self._cap] = self._alive
+        genre = np.full(cap, -1, np.int8)
+        genre[: self._cap] = self._genre
+        self._sig, self._alive, self._genre, self._cap = sig, alive, genre, cap
+
+    def _put(self, song_ids: np.ndarray, sig: np.ndarray, genres: np.ndarray) -> None:
+        with self._lock:
+            if not len(song_ids):
+                return
+            self._ensure(int(song_ids.max()))
+            self._sig[song_ids] = sig
+            self._alive[song_ids] = True
+            self._genre[song_ids] = genres
+            self._max_id = max(self._max_id, int(song_ids.max()))
+            self._changes += len(song_ids)
+            if self._changes >= self.compact_at:
+                self._compact()
+                return
+            keys = self._band_keys(sig)
+            for sid, row, s in zip(song_ids.tolist(), keys.tolist(), sig[:, 0]):
+                if s == _EMPTY:
+                    continue
+                for b, key in enumerate(row):
+                    self._delta[b].setdefault(key, []).append(sid)
+
+    def add_song(self, song_id: int, chord_ids: Iterable[int], genre: Optional[Genre] = None) -> None:
+        ids = np.array([song_id], np.int64)
+        pairs = np.array([(song_id, c) for c in set(chord_ids)], np.int64).reshape(-1, 2)
+        self._put(ids, self.signatures(ids, pairs), np.array([genre_code(genre)], np.int8))
+
+    def remove_song(self, song_id: int) -> None:
+        with self._lock:
+            if song_id < self._cap and self._alive[song_id]:
+                # записи в смугах відсіються при запиті й зникнуть при злитті
+                self._alive[song_id] = False
+                self._changes += 1
+
+    def _compact(self) -> None:
+        ids = np.flatnonzero(self._alive & (self._sig[:, 0] != _EMPTY)).astype(np.int32)
+        keys = self._band_keys(self._sig[ids])
+        for b in range(BANDS):
+            order = np.argsort(keys[:, b], kind="stable")
+            self._base_keys[b] = keys[order, b]
+            self._base_ids[b] = ids[order]
+        self._delta = [{} for _ in range(BANDS)]
+        self._changes = 0
+
+    def bulk_load(self, song_ids: np.ndarray, pairs: np.ndarray, genres: np.ndarray) -> None:
+        """Повна перебудова: ``song_ids`` відсортовані, ``genres`` — коди з ``genre_code``."""
+        song_ids = np.asarray(song_ids, np.int64)
+        sig = self.signatures(song_ids, np.asarray(pairs, np.int64).reshape(-1, 2))
+        with self._lock:
+            self._reset()
+            if len(song_ids):
+                self._ensure(int(song_ids.max()))
+                self._sig[song_ids] = sig
+                self._alive[song_ids] = True
+                self._genre[song_ids] = genres
+                self._max_id = int(song_ids.max())
+            self._compact()
+
+    # ───── persistence ───────────────────────────────────────────────────────
+    def _params(self) -> np.ndarray:
+        return np.array([K, BANDS, self.seed], np.int64)
+
+    def save(self, path: str) -> None:
+        with self._lock:
+            n = self._max_id + 1 if self._cap else 0
+            sig, alive, genre = self._sig[:n].copy(), self._alive[:n].copy(), self._genre[:n].copy()
+        dst = Path(path)
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dst.with_name(f".{dst.name}.{os.getpid()}.part")
+        with open(tmp, "wb") as f:
+            np.savez(f, params=self._params(), sig=sig, alive=alive, genre=genre)
+        os.replace(tmp, dst)
+
+    def load(self, path: str) -> bool:
+        """False — файлу немає або він від інших параметрів; тоді потрібен ``rebuild``."""
+        try:
+            with np.load(path) as data:
+                if not np.array_equal(data["params"], self._params()):
+                    return False
+                sig, alive, genre = data["sig"], data["alive"], data["genre"]
+        except (OSError, KeyError, ValueError):
+            return False
+        with self._lock:
+            self._reset()
+            if len(alive):
+                self._ensure(len(alive) - 1)
+                self._sig[: len(alive)] = sig
+                self._alive[: len(alive)] = alive
+                self._genre[: len(alive)] = genre
+                live = np.flatnonzero(alive)
+                self._max_id = int(live.max()) if len(live) else 0
+            self._compact()
+        return True
+
+    # ───── DB sync ───────────────────────────────────────────────────────────
+    def _fetch(self, db: Session, rows: List[Tuple[int, Optional[Genre]]]) -> None:
+        song_ids = np.array([r[0] for r in rows], np.int64)
+        genres = np.array([genre_code(r[1]) for r in rows], np.int8)
+        order = np.argsort(song_ids)
+        song_ids, genres = song_ids[order], genres[order]
+        pairs: List[Tuple[int, int]] = []
+        for lo in range(0, len(song_ids), _IN_CHUNK):
+            chunk = song_ids[lo:lo + _IN_CHUNK].tolist()
+            pairs += db.execute(
+                select(SongChord.song_id, SongChord.chord_id).where(SongChord.song_id.in_(chunk))
+            ).all()
+        pairs_arr = np.array(pairs, np.int64).reshape(-1, 2)
+        self._put(song_ids, self.signatures(song_ids, pairs_arr), genres)
+
+    def rebuild(self, db: Session) -> None:
+        version = versions(db)[0]  # до читання: зміни під час нього refresh застосує ще раз
+        rows = db.execute(select(Song.id, Song.genre).order_by(Song.id)).all()
+        pairs = db.execute(select(SongChord.song_id, SongChord.chord_id)).all()
+        self.bulk_load(
+            np.array([r[0] for r in rows], np.int64),
+            np.array(pairs, np.int64).reshape(-1, 2),
+            np.array([genre_code(r[1]) for r in rows], np.int8),
+        )
+        self._version = version
+        self._last_refresh = time.monotonic()
+        self.ready = True
+
+    def sync(self, db: Session) -> None:
+        """Після ``load``: видаляє зниклі з БД пісні й додає ті, яких немає в індексі."""
+        version = versions(db)[0]
+        rows = db.execute(select(Song.id, Song.genre)).all()
+        in_db = np.array([r[0] for r in rows], np.int64)
+        with self._lock:
+            known = np.flatnonzero(self._alive)
+        for sid in np.setdiff1d(known, in_db).tolist():
+            self.remove_song(sid)
+        fresh = set(np.setdiff1d(in_db, known).tolist())
+        self._fetch(db, [r for r in rows if r[0] in fresh])
+        self._version = version
+        self._last_refresh = time.monotonic()
+        self.ready = True
+
+    def open(self, db: Session, path: str = "") -> None:
+        """Старт воркера: підписи з файлу + різниця з БД, або повна перебудова."""
+        if path and self.load(path):
+            self.sync(db)
+        else:
+            self.rebuild(db)
+        if path:
+            self.save(path)
+
+    def ensure(self, db: Session) -> None:
+        """Перша побудова — у фоновому прогріві воркера або в першому запиті, хто раніше."""
+        if self.ready:
+            return
+        with self._build_lock:
+            if not self.ready:
+                self.open(db, self.path)
+
+    def refresh(self, db: Session) -> None:
+        """Зміни пісень з інших воркерів за журналом змін (не частіше за refresh_interval)."""
+        self.ensure(db)
+        now = time.monotonic()
+        if now - self._last_refresh < self.refresh_interval and not pinned():
+            return
+        self._last_refresh = now
+        changes = song_changes(db, self._version)
+        if changes is None:
+            self.rebuild(db)
+            return
+        for sid in changes.deleted:
+            self.remove_song(sid)
+        if changes.changed is not None:
+            rows = db.execute(
+                select(Song.id, Song.genre).where(Song.id.in_(changes.changed))
+            ).all()
+            self._fetch(db, rows)
+        self._version = changes.version
+
+    # ───── query ─────────────────────────────────────────────────────────────
+    def similar(
+        self, song_id: int, limit: int = 10, genre_weight: float = 0.0
+    ) -> Optional[List[SongHit]]:
+        """None — пісні немає в індексі; бал = Jaccard + genre_weight за той самий жанр."""
+        with self._lock:
+            if song_id >= self._cap or not self._alive[song_id]:
+                return None
+            sig = self._sig[song_id]
+            if sig[0] == _EMPTY:
+                return []
+            parts = []
+            for b, key in enumerate(self._band_keys(sig[None])[0].tolist()):
+                keys = self._base_keys[b]
+                lo = np.searchsorted(keys, np.uint64(key))
+                hi = np.searchsorted(keys, np.uint64(key), side="right")
+                parts.append(self._base_ids[b][lo:min(hi, lo + MAX_BUCKET)])
+                extra = self._delta[b].get(key)
+                if extra:
+                    parts.append(np.array(extra, np.int32))
+            cand = np.unique(np.concatenate(parts)).astype(np.int64)
+            cand = cand[(cand != song_id) & self._alive[cand]]
+            jaccard = (self._sig[cand] == sig).mean(axis=1)
+            score = jaccard
+            genre = self._genre[song_id]
+            if genre_weight and genre >= 0:
+                score = jaccard + genre_weight * (self._genre[cand] == genre)
+        if len(cand) > limit:
+            top = np.argpartition(-score, limit - 1)[:limit]
+            cand, score, jaccard = cand[top], score[top], jaccard[top]
+        order = np.lexsort((cand, -score))
+        return [(int(cand[i]), float(score[i]), float(jaccard[i])) for i in order]
+
+
+similar_index = SimilarSongsIndex(path=settings.similar_index_path)
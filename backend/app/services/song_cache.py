@@ -0,0 +1,236 @@
+"""
+Кеш серіалізованих відповідей ``GET /songs/{id}``.
+
+Вміст пісні змінюється рідко, а ``song_details`` щоразу робить два запити (пісня +
+join акордів). Кеш зберігає готовий JSON (байти) за id пісні:
+
+* ``MemoryBackend`` — LRU в межах воркера з обмеженням за байтами й TTL;
+* ``RedisBackend`` — спільний для всіх воркерів (``SONG_CACHE_URL=redis://…``,
+  потрібен пакет ``redis``).
+
+Ключ — ``<id>@<chord_version>``. ``refresh`` на початку запиту (не частіше за
+``refresh_interval``) читає журнал ``catalog_changes`` з версії, обробленої
+минулого разу, і видаляє з кешу лише пісні, що в ньому з'явились, — зміна в
+іншому воркері доходить щонайбільше за цей інтервал, а решта кешу лишається.
+Зміни акордів до пісень не простежити (каскад прибирає ``song_chords``), тож
+нова ``chord_version`` просто дає нові ключі; акорди змінюються рідко.
+``invalidate`` діє одразу в поточному воркері: видаляє ключі й піднімає
+лічильник поколінь, а ``put`` не кладе тіло, якщо покоління змінилось, поки
+його читали з БД (промах → інвалідація → ``put`` старих даних).
+
+ETag — дайджест серіалізованого вмісту, тобто версія самої відповіді: однаковий
+у всіх воркерах і після перезапуску. Кеш тримає JSON; клієнтам, що просять
+MessagePack, тіло перекодовується (``app.core.encoding.transcode``), і ETag
+рахується вже від нього. Локально інвалідацію викликають ``delete_song``,
+``upload_sheet`` і ``upload_audio``.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Mapping, Optional, Tuple
+
+from sqlalchemy.orm import Session
+from starlette.responses import Response
+
+from app.core.config import settings
+from app.core.encoding import current_encoding, json_bytes, transcode
+from app.services.catalog_changes import chord_version, song_changes, versions
+
+
+class MemoryBackend:
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._size = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] < time.monotonic():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._size += len(value)
+            while self._size > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def delete(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._drop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry[0])
+
+    def size(self) -> int:
+        return self._size
+
+
+class RedisBackend:
+    def __init__(self, url: str, ttl: float, prefix: str = "song-detail:"):
+        import redis
+
+        self._redis = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._redis.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes) -> None:
+        self._redis.set(self.prefix + key, value, ex=max(int(self.ttl), 1))
+
+    def delete(self, keys: Iterable[str]) -> None:
+        keys = [self.prefix + k for k in keys]
+        for i in range(0, len(keys), 1000):
+            self._redis.delete(*keys[i:i + 1000])
+
+    def clear(self) -> None:
+        self.delete(k.decode()[len(self.prefix):] for k in self._redis.scan_iter(self.prefix + "*"))
+
+    def size(self) -> Optional[int]:
+        return None  # пам'яттю керує сам Redis (maxmemory-policy)
+
+
+def etag_for(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+
+
+def not_modified(request_headers: Mapping[str, str], etag: str) -> bool:
+    inm = request_headers.get("if-none-match")
+    return inm is not None and etag in (t.strip().removeprefix("W/") for t in inm.split(","))
+
+
+class SongDetailCache:
+    def __init__(self, backend, refresh_interval: float = 1.0):
+        self.backend = backend
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None  # оброблена версія журналу
+        self._chords = 0  # chord_version — частина ключа
+        self._generation = 0
+        self._last_refresh = float("-inf")
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.bytes_saved = 0  # тіла, які не довелося надсилати завдяки 304
+
+    @property
+    def generation(self) -> int:
+        """Береться до читання з БД і передається в ``put``."""
+        return self._generation
+
+    def reset(self, db: Session) -> None:
+        """Порожній кеш, актуальний до поточної версії журналу."""
+        with self._lock:
+            self._generation += 1
+            self.backend.clear()
+            self._version, _ = versions(db)
+            self._chords = chord_version(db)
+            self._last_refresh = time.monotonic()
+
+    def refresh(self, db: Session) -> None:
+        """Прибирає пісні, змінені за журналом (не частіше за refresh_interval)."""
+        now = time.monotonic()
+        if now - self._last_refresh < self.refresh_interval:
+            return
+        self._last_refresh = now
+        chords = chord_version(db)
+        if self._version is None:
+            # старт воркера: у пам'яті порожньо, спільний кеш доглядали інші воркери
+            changes, self._version = None, versions(db)[0]
+        else:
+            changes = song_changes(db, self._version)
+            if changes is None:  # надгробки після _version стиснуто — невідомо, що мінялось
+                with self._lock:
+                    self._generation += 1
+                    self.backend.clear()
+                self._version = versions(db)[0]
+        stale = []
+        if changes is not None:
+            stale = changes.deleted
+            if changes.changed is not None:
+                stale = stale + list(db.scalars(changes.changed))
+            self._version = changes.version
+        with self._lock:
+            if stale or chords != self._chords:
+                self._generation += 1
+            self._chords = chords
+            self.backend.delete(self._key(i) for i in stale)
+
+    def _key(self, song_id: int) -> str:
+        return f"{song_id}@{self._chords}"
+
+    def get(self, song_id: int) -> Optional[bytes]:
+        body = self.backend.get(self._key(song_id))
+        if body is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return body
+
+    def put(self, song_id: int, payload: dict, generation: Optional[int] = None) -> bytes:
+        """Серіалізує ``payload``; кешує, лише якщо з ``generation`` нічого не інвалідовано."""
+        body = json_bytes(payload)
+        with self._lock:
+            if generation is None or generation == self._generation:
+                self.backend.set(self._key(song_id), body)
+        return body
+
+    def invalidate(self, song_ids: Iterable[int]) -> None:
+        with self._lock:
+            self._generation += 1
+            self.backend.delete(self._key(i) for i in song_ids)
+
+    def respond(self, body: bytes, request_headers: Mapping[str, str]) -> Response:
+        body = transcode(body)
+        etag = etag_for(body)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Accept"}
+        if not_modified(request_headers, etag):
+            self.not_modified += 1
+            self.bytes_saved += len(body)
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type=current_encoding().media_type, headers=headers)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "version": self._version,
+            "chord_version": self._chords,
+            "bytes": self.backend.size(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "not_modified": self.not_modified,
+            "bytes_saved": self.bytes_saved,
+        }
+
+
+def _make_backend():
+    if settings.song_cache_url:
+        return RedisBackend(settings.song_cache_url, settings.song_cache_ttl)
+    return MemoryBackend(settings.song_cache_max_bytes, settings.song_cache_ttl)
+
+
+song_cache = SongDetailCache(_make_backend())
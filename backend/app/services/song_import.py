@@ -0,0 +1,320 @@
+"""
+Масовий імпорт пісень з NDJSON / CSV.
+
+Рядок — одна пісня: ``title``, ``lyrics``, ``genre`` і ``chords`` (назви або id
+акордів; у CSV — через ``;`` чи пробіл). Акорди резолвляться одним запитом на
+весь імпорт, унікальність назв — одним запитом на пачку, а ``Song`` /
+``SongChord`` вставляються пачками через executemany (на Postgres SQLAlchemy
+згортає його в багаторядкові ``INSERT … VALUES … RETURNING``). Кожна пачка —
+окрема транзакція; пачку, яку відхилила БД, відкочено до savepoint і повторено
+поштучно — у звіт потрапляють лише рядки, що не записались. Після коміту пачки
+номер її останнього рядка пишеться в checkpoint, тож перерваний імпорт
+продовжується з ``--resume``.
+
+    cd backend && python -m app.services.song_import songs.ndjson --author admin
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import IO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models import Chord, Genre, Song, SongChord, User
+from app.services import catalog_changes
+
+FORMATS = {".ndjson": "ndjson", ".jsonl": "ndjson", ".csv": "csv"}
+TITLE_MAX = 200  # Song.title — String(200)
+MAX_REPORTED_ERRORS = 1000
+_CHORD_SEP_RE = re.compile(r"[;\s]+")
+
+
+class RowError(ValueError):
+    pass
+
+
+class ImportReport:
+    def __init__(
+        self, start_line: int = 0, on_error: Optional[Callable[[int, str], None]] = None
+    ):
+        self.on_error = on_error
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[dict] = []  # перші MAX_REPORTED_ERRORS помилок
+        self.checkpoint = start_line  # останній рядок, оброблений у закоміченій пачці
+
+    def fail(self, line: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": error})
+        if self.on_error is not None:
+            self.on_error(line, error)
+
+    def as_dict(self) -> dict:
+        return {
+            "imported": self.imported,
+            "failed": self.failed,
+            "checkpoint": self.checkpoint,
+            "errors": sorted(self.errors, key=lambda e: e["line"]),
+        }
+
+
+def detect_format(filename: Optional[str]) -> Optional[str]:
+    return FORMATS.get(Path(filename or "").suffix.lower())
+
+
+def iter_rows(stream: IO[str], fmt: str) -> Iterator[Tuple[int, object]]:
+    """``(номер рядка, запис)``; для CSV номер — останній фізичний рядок запису."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for n, line in enumerate(stream, 1):
+        if line.strip():
+            yield n, line
+
+
+# ───── validation ────────────────────────────────────────────────────────────
+def _chord_lookup(db: Session) -> Tuple[Dict[str, int], set]:
+    by_name: Dict[str, int] = {}
+    ids = set()
+    # назви не унікальні — беремо найстаріший акорд
+    for cid, name in db.execute(select(Chord.id, Chord.name).order_by(Chord.id.desc())):
+        by_name[name.casefold()] = cid
+        ids.add(cid)
+    return by_name, ids
+
+
+def _resolve_chords(raw, chords: Tuple[Dict[str, int], set]) -> List[int]:
+    by_name, ids = chords
+    if isinstance(raw, str):
+        raw = [t for t in _CHORD_SEP_RE.split(raw) if t]
+    if not isinstance(raw, list) or not raw:
+        raise RowError("Не вказано акорди")
+    out: Dict[int, None] = {}
+    for token in raw:
+        if isinstance(token, int) or (isinstance(token, str) and token.isdigit()):
+            cid = int(token) if int(token) in ids else None
+        else:
+            cid = by_name.get(str(token).casefold())
+        if cid is None:
+            raise RowError(f"Акорд не знайдено: {token}")
+        out[cid] = None
+    return list(out)
+
+
+def _prepare(raw, chords) -> dict:
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except ValueError:
+            raise RowError("Невалідний JSON") from None
+    if not isinstance(raw, dict):
+        raise RowError("Очікується об'єкт")
+    title = str(raw.get("title") or "").strip()
+    if not title:
+        raise RowError("Не вказано назву")
+    if len(title) > TITLE_MAX:
+        raise RowError("Задовга назва")
+    try:
+        genre = Genre(raw.get("genre") or Genre.OTHER)
+    except ValueError:
+        raise RowError(f"Невідомий жанр: {raw.get('genre')}") from None
+    return {
+        "title": title,
+        "lyrics": raw.get("lyrics") or None,
+        "genre": genre,
+        "chord_ids": _resolve_chords(raw.get("chords"), chords),
+    }
+
+
+# ───── batched insert ────────────────────────────────────────────────────────
+def _flush(
+    db: Session,
+    batch: List[Tuple[int, dict]],
+    author_id: int,
+    report: ImportReport,
+    update_indexes: bool,
+) -> None:
+    titles = [song["title"] for _, song in batch]
+    taken = set(db.scalars(select(Song.title).where(Song.title.in_(titles))))
+    fresh: List[Tuple[int, dict]] = []
+    for line, song in batch:
+        if song["title"] in taken:
+            report.fail(line, "Пісня з такою назвою вже існує")
+            continue
+        taken.add(song["title"])
+        fresh.append((line, song))
+    if not fresh:
+        return
+
+    try:
+        with db.begin_nested():
+            ids = _insert(db, fresh, author_id)
+        inserted = fresh
+    except (IntegrityError, DataError):
+        # пачку відкочено до savepoint — шукаємо зіпсовані рядки поштучно
+        ids, inserted = [], []
+        for line, song in fresh:
+            try:
+                with db.begin_nested():
+                    ids += _insert(db, [(line, song)], author_id)
+            except (IntegrityError, DataError) as e:
+                report.fail(line, f"Помилка БД: {str(e.orig).splitlines()[0]}")
+            else:
+                inserted.append((line, song))
+    if not ids:
+        return
+    catalog_changes.record(db, catalog_changes.SONG, ids)
+    db.commit()
+    if update_indexes:
+        # індекси — numpy; CLI-імпорт їх не оновлює й не має імпортувати
+        from app.services.playable import playable_index
+        from app.services.search import song_index
+        from app.services.similar import similar_index
+
+        for sid, (_, s) in zip(ids, inserted):
+            song_index.add(sid, s["title"], s["lyrics"])
+            playable_index.add_song(sid, s["chord_ids"])
+            similar_index.add_song(sid, s["chord_ids"], s["genre"])
+    report.imported += len(inserted)
+
+
+def _insert(db: Session, rows: List[Tuple[int, dict]], author_id: int) -> List[int]:
+    # Core-таблиці, а не ORM-сутності: ORM bulk insert утричі повільніший
+    conn = db.connection()
+    ids = conn.execute(
+        insert(Song.__table__).returning(Song.id, sort_by_parameter_order=True),
+        [
+            {"title": s["title"], "lyrics": s["lyrics"], "genre": s["genre"],
+             "author_id": author_id}
+            for _, s in rows
+        ],
+    ).scalars().all()
+    pairs = [
+        {"song_id": sid, "chord_id": cid}
+        for sid, (_, s) in zip(ids, rows) for cid in s["chord_ids"]
+    ]
+    if pairs:
+        conn.execute(insert(SongChord.__table__), pairs)
+    return list(ids)
+
+
+def import_songs(
+    db: Session,
+    rows: Iterable[Tuple[int, object]],
+    author_id: int,
+    batch_size: int = 1000,
+    start_line: int = 0,
+    on_batch: Optional[Callable[[ImportReport], None]] = None,
+    on_error: Optional[Callable[[int, str], None]] = None,
+    update_indexes: bool = True,
+) -> ImportReport:
+    """
+    Імпортує рядки з номером > ``start_line``. Рядки з помилками пропускаються
+    й потрапляють у звіт; ``on_batch`` викликається після коміту кожної пачки.
+    ``update_indexes=False`` — для окремого процесу (CLI): сервер сам підхопить
+    нові пісні через ``refresh()`` індексів.
+    """
+    chords = _chord_lookup(db)
+    report = ImportReport(start_line, on_error)
+    batch: List[Tuple[int, dict]] = []
+    line = start_line
+
+    def flush() -> None:
+        if batch:
+            _flush(db, batch, author_id, report, update_indexes)
+            batch.clear()
+        report.checkpoint = line
+        if on_batch is not None:
+            on_batch(report)
+
+    try:
+        for line, raw in rows:
+            if line <= start_line:
+                continue
+            try:
+                batch.append((line, _prepare(raw, chords)))
+            except RowError as e:
+                report.fail(line, str(e))
+            if len(batch) >= batch_size:
+                flush()
+    except UnicodeDecodeError:
+        # текст декодується шматками, тож зламаний байт може бути й за кілька рядків
+        # далі; прочитане імпортуємо, а з наступного рядка файл треба перекодувати
+        report.fail(line + 1, "Файл не в кодуванні UTF-8, імпорт зупинено")
+    if line > report.checkpoint:
+        flush()
+    return report
+
+
+# ───── CLI ───────────────────────────────────────────────────────────────────
+def _write_checkpoint(path: Path, line: int) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps({"line": line}))
+    os.replace(tmp, path)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from app.core.config import settings
+    from app.core.database import SessionLocal
+
+    ap = argparse.ArgumentParser(description="Масовий імпорт пісень з NDJSON / CSV")
+    ap.add_argument("path", type=Path)
+    ap.add_argument("--author", required=True, help="username автора пісень")
+    ap.add_argument("--format", choices=sorted(set(FORMATS.values())))
+    ap.add_argument("--batch-size", type=int, default=settings.import_batch_size)
+    ap.add_argument("--resume", action="store_true", help="продовжити з checkpoint-файлу")
+    args = ap.parse_args(argv)
+
+    fmt = args.format or detect_format(args.path.name)
+    if fmt is None:
+        ap.error("невідомий формат, вкажіть --format")
+    checkpoint = args.path.with_name(args.path.name + ".checkpoint")
+    start = 0
+    if args.resume and checkpoint.exists():
+        start = json.loads(checkpoint.read_text())["line"]
+
+    t0 = time.perf_counter()
+
+    def progress(report: ImportReport) -> None:
+        _write_checkpoint(checkpoint, report.checkpoint)
+        rate = (report.imported + report.failed) / max(time.perf_counter() - t0, 1e-9)
+        print(
+            f"line {report.checkpoint}: imported {report.imported}, "
+            f"failed {report.failed}, {rate:.0f} rows/s",
+            file=sys.stderr,
+        )
+
+    def error(line: int, message: str) -> None:
+        print(f"line {line}: {message}", file=sys.stderr)
+
+    with SessionLocal() as db:
+        author_id = db.scalar(select(User.id).where(User.username == args.author))
+        if author_id is None:
+            ap.error(f"користувача {args.author} не знайдено")
+        with args.path.open(encoding="utf-8-sig", newline="") as f:
+            report = import_songs(
+                db,
+                iter_rows(f, fmt),
+                author_id,
+                args.batch_size,
+                start,
+                on_batch=progress,
+                on_error=error,
+                update_indexes=False,
+            )
+    checkpoint.unlink(missing_ok=True)
+    print(json.dumps(report.as_dict(), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Транспонування пісень і капо.
+
+Назва акорду розбирається на корінь, якість і бас (``C#m7/G#`` → 1, ``m7``, 8).
+Для каталогу будуються таблиці ``[зсув][chord_id] → id`` і ``→ назва`` на всі
+12 зсувів: акорд тієї самої якості з коренем (і басом) + зсув; якщо такого в
+каталозі немає — id ``-1`` і назва, записана нотами з ``NOTES``. Транспонування
+пачки пісень — це один fancy-index по склеєному масиву їхніх акордів.
+
+Капо на ``capo`` ладі підіймає звучання, тож щоб пісня звучала на ``semitones``
+вище, грати треба аплікатури, зсунуті на ``semitones - capo``.
+
+Таблиці перебудовуються разом з ``voicing_index`` (той самий запит до каталогу),
+а готові списки акордів кешуються за (пісня, зсув) до наступної перебудови.
+Пісні, змінені чи видалені в інших воркерах, ``refresh`` прибирає з кешу за
+журналом ``catalog_changes`` (не частіше за ``refresh_interval``).
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.replicas import pinned
+from app.models import Song, SongChord
+from app.services.catalog_changes import song_changes, versions
+from app.services.voicings import voicing_index
+
+# найуживаніший запис кожної ноти в акордових таблицях
+NOTES = ("C", "C#", "D", "Eb", "E", "F", "F#", "G", "Ab", "A", "Bb", "B")
+_NATURAL = {"C": 0, "D": 2, "E": 4, "F": 5, "G": 7, "A": 9, "B": 11}
+_ACCIDENTAL = {"": 0, "#": 1, "♯": 1, "b": -1, "♭": -1}
+_NAME_RE = re.compile(r"^([A-G])([#♯b♭]?)(.*?)(?:/([A-G])([#♯b♭]?))?$")
+
+
+def parse_name(name: str) -> Optional[Tuple[int, str, int]]:
+    """``(корінь, якість, бас або -1)`` або None, якщо це не назва акорду."""
+    m = _NAME_RE.match(name.strip())
+    if not m:
+        return None
+    root, acc, quality, bass, bass_acc = m.groups()
+    pc = (_NATURAL[root] + _ACCIDENTAL[acc]) % 12
+    bass_pc = (_NATURAL[bass] + _ACCIDENTAL[bass_acc]) % 12 if bass else -1
+    return pc, quality, bass_pc
+
+
+def spell(root: int, quality: str, bass: int) -> str:
+    return NOTES[root] + quality + (f"/{NOTES[bass]}" if bass >= 0 else "")
+
+
+def effective_shift(semitones: int, capo: int) -> int:
+    return (semitones - capo) % 12
+
+
+class Transposer:
+    def __init__(self, memo_size: int = 10_000, refresh_interval: float = 1.0):
+        self.memo_size = memo_size
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._version = -1
+        self._log_version: Optional[int] = None  # версія журналу змін, до якої кеш актуальний
+        self._last_refresh = 0.0
+        self._ids = np.full((12, 1), -1, np.int64)  # [зсув, chord_id] → id у каталозі
+        self._names = np.full((12, 1), None, object)  # [зсув, chord_id] → назва
+        self._memo: "OrderedDict[Tuple[int, int], List[dict]]" = OrderedDict()
+
+    # ───── tables ────────────────────────────────────────────────────────────
+    def build(self, names: Dict[int, str]) -> None:
+        size = max(names, default=0) + 1
+        root = np.full(size, -1, np.int64)
+        bass = np.full(size, -1, np.int64)
+        qual = np.full(size, -1, np.int64)
+        qualities: Dict[str, int] = {}
+        parsed: Dict[int, Tuple[int, str, int]] = {}
+        for chord_id, name in names.items():
+            p = parse_name(name)
+            if p is None:
+                continue
+            parsed[chord_id] = p
+            root[chord_id], bass[chord_id] = p[0], p[2]
+            qual[chord_id] = qualities.setdefault(p[1], len(qualities))
+
+        # (якість, корінь, бас + 1) → найменший id з такою назвою по суті
+        by_key = np.full(max(len(qualities), 1) * 12 * 13, -1, np.int64)
+        for chord_id in sorted(parsed, reverse=True):
+            by_key[(qual[chord_id] * 12 + root[chord_id]) * 13 + bass[chord_id] + 1] = chord_id
+
+        known = root >= 0
+        ids = np.full((12, size), -1, np.int64)
+        out = np.full((12, size), None, object)
+        for shift in range(12):
+            new_root = (root + shift) % 12
+            new_bass = np.where(bass >= 0, (bass + shift) % 12, -1)
+            keys = (qual * 12 + new_root) * 13 + new_bass + 1
+            ids[shift] = np.where(known, by_key[np.where(known, keys, 0)], -1)
+            for chord_id, (_, quality, _) in parsed.items():
+                target = ids[shift, chord_id]
+                out[shift, chord_id] = (
+                    names[int(target)] if target >= 0
+                    else spell(int(new_root[chord_id]), quality, int(new_bass[chord_id]))
+                )
+        ids[0] = np.where(known, np.arange(size), ids[0])
+        for chord_id, name in names.items():
+            if chord_id not in parsed:  # не розібрали (напр. «N.C.») — лишається як є
+                ids[:, chord_id] = chord_id
+                out[:, chord_id] = name
+            else:
+                out[0, chord_id] = name
+        with self._lock:
+            self._ids, self._names = ids, out
+            self._memo.clear()
+
+    def rebuild(self, db: Session) -> None:
+        """Таблиці з каталогу й порожній кеш, актуальний до поточної версії журналу."""
+        self._log_version = versions(db)[0]
+        self._last_refresh = time.monotonic()
+        voicing_index.rebuild(db)
+        version = voicing_index.version
+        self.build(voicing_index.names())
+        self._version = version
+
+    def refresh(self, db: Session) -> None:
+        voicing_index.refresh(db)
+        if voicing_index.version != self._version:
+            version = voicing_index.version
+            self.build(voicing_index.names())
+            self._version = version
+        self._forget_changed(db)
+
+    def _forget_changed(self, db: Session) -> None:
+        now = time.monotonic()
+        # прив'язаний до primary клієнт щойно писав — його зміни мають бути видні одразу
+        if now - self._last_refresh < self.refresh_interval and not pinned():
+            return
+        self._last_refresh = now
+        if self._log_version is None:  # старт воркера: кеш порожній
+            self._log_version = versions(db)[0]
+            return
+        changes = song_changes(db, self._log_version)
+        if changes is None:  # надгробки стиснуто — невідомо, що видалено
+            with self._lock:
+                self._memo.clear()
+            self._log_version = versions(db)[0]
+            return
+        stale = list(changes.deleted)
+        if changes.changed is not None:
+            stale += db.scalars(changes.changed)
+        self._drop(stale)
+        self._log_version = changes.version
+
+    def transpose(self, chord_ids: np.ndarray, shift: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Векторно: id акордів → (id у каталозі або -1, назви) після зсуву."""
+        chord_ids = np.asarray(chord_ids, np.int64)
+        with self._lock:
+            ids, names = self._ids[shift % 12], self._names[shift % 12]
+        inside = chord_ids < len(ids)
+        safe = np.where(inside, chord_ids, 0)
+        return np.where(inside, ids[safe], -1), names[safe]
+
+    # ───── songs ─────────────────────────────────────────────────────────────
+    def _drop(self, song_ids: Iterable[int]) -> None:
+        with self._lock:
+            for sid in song_ids:
+                for shift in range(12):
+                    self._memo.pop((sid, shift), None)
+
+    def forget(self, song_id: int) -> None:
+        self._drop([song_id])
+
+    def songs(self, db: Session, song_ids: Iterable[int], shift: int) -> Dict[int, List[dict]]:
+        """Транспоновані акорди пісень (відсутніх пісень у результаті немає)."""
+        shift %= 12
+        self.refresh(db)
+        found: Dict[int, List[dict]] = {}
+        missing: List[int] = []
+        with self._lock:
+            for sid in dict.fromkeys(song_ids):
+                hit = self._memo.get((sid, shift))
+                if hit is None:
+                    missing.append(sid)
+                else:
+                    self._memo.move_to_end((sid, shift))
+                    found[sid] = hit
+        if not missing:
+            return found
+
+        rows = db.execute(
+            select(Song.id, SongChord.chord_id)
+            .outerjoin(SongChord, SongChord.song_id == Song.id)
+            .where(Song.id.in_(missing))
+            .order_by(Song.id, SongChord.id)
+        ).all()
+        songs: Dict[int, List[int]] = {}
+        for sid, cid in rows:
+            chords = songs.setdefault(sid, [])
+            if cid is not None:
+                chords.append(cid)
+        flat = np.fromiter((c for chords in songs.values() for c in chords), np.int64)
+        ids, names = self.transpose(flat, shift)
+        bounds = np.cumsum([len(chords) for chords in songs.values()])[:-1]
+        voicings: Dict[str, List[dict]] = {}
+        for name in set(names) - {None}:  # None — акорд, новіший за таблиці
+            voicings[name] = voicing_index.by_name(name)
+        for sid, originals, new_ids, new_names in zip(
+            songs, songs.values(), np.split(ids, bounds), np.split(names, bounds)
+        ):
+            found[sid] = [
+                {
+                    "id": int(new_id) if new_id >= 0 else None,
+                    "name": name,
+                    "original_id": original,
+                    "voicings": voicings.get(name, []),
+                }
+                for original, new_id, name in zip(originals, new_ids, new_names)
+            ]
+        with self._lock:
+            for sid in songs:
+                self._memo[(sid, shift)] = found[sid]
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        return found
+
+
+transposer = Transposer()
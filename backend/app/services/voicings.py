@@ -0,0 +1,136 @@
+"""
+Індекс аплікатур акордів: пошук акорду за тим, що затиснуто на грифі.
+
+Аплікатура — шість значень (від 6-ї струни до 1-ї): -1 — заглушена, 0 — відкрита,
+n — лад. Вона пакується в одне ціле по 5 біт на струну (0 — заглушена,
+лад + 1 — інакше), тож точний пошук — це словник ``код → id акордів``. Для
+пошуку найближчої аплікатури ті самі значення лежать матрицею ``int8`` (N × 6)
+і відстань рахується векторно по всьому каталогу:
+
+* обидві струни звучать — різниця ладів;
+* заглушена проти відкритої — ``open_cost`` (часто неважливо, чи дзвенить відкрита);
+* заглушена проти затиснутої — ``mute_cost``;
+* ``?`` у запиті — будь-що на цій струні.
+
+Будь-яка зміна акорду через ORM позначає індекс застарілим, а ``refresh``
+перебудовує його (не рідше ніж раз на ``refresh_interval`` — щоб підхопити
+зміни з інших воркерів). Каталог акордів невеликий: перебудова — один запит.
+"""
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.models import Chord
+from app.services.shapes import MUTED, STRINGS, format_shape, pack, parse_strings_json
+
+
+# ───── index ─────────────────────────────────────────────────────────────────
+class VoicingIndex:
+    def __init__(self, refresh_interval: float = 30.0):
+        self.refresh_interval = refresh_interval
+        self._lock = threading.RLock()
+        self._stale = True
+        self._last_refresh = 0.0
+        self.version = 0  # росте з кожною перебудовою — для похідних таблиць (transpose)
+        self._load([])
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _load(self, rows: Iterable[Tuple[int, str, Optional[str]]]) -> None:
+        ids: List[int] = []
+        names: Dict[int, str] = {}
+        frets: List[Tuple[int, ...]] = []
+        for chord_id, name, raw in rows:
+            voicing = parse_strings_json(raw)
+            names[chord_id] = name
+            if voicing is not None:
+                ids.append(chord_id)
+                frets.append(voicing)
+        exact: Dict[int, List[int]] = {}
+        by_name: Dict[str, List[int]] = {}
+        for chord_id, voicing in zip(ids, frets):
+            exact.setdefault(pack(voicing), []).append(chord_id)
+            by_name.setdefault(names[chord_id], []).append(chord_id)
+        with self._lock:
+            self._ids = np.array(ids, np.int64)
+            self._frets = np.array(frets, np.int8).reshape(-1, STRINGS)
+            self._row = {chord_id: i for i, chord_id in enumerate(ids)}
+            self._names = names
+            self._exact = exact
+            self._by_name = by_name
+            self.version += 1
+
+    # ───── DB sync ───────────────────────────────────────────────────────────
+    def mark_stale(self) -> None:
+        self._stale = True
+
+    def rebuild(self, db: Session) -> None:
+        self._stale = False  # зміни під час читання знову виставлять прапорець
+        self._load(db.execute(select(Chord.id, Chord.name, Chord.strings_json)))
+        self._last_refresh = time.monotonic()
+
+    def refresh(self, db: Session) -> None:
+        if self._stale or time.monotonic() - self._last_refresh >= self.refresh_interval:
+            self.rebuild(db)
+
+    # ───── query ─────────────────────────────────────────────────────────────
+    def names(self) -> Dict[int, str]:
+        """Назви всіх акордів каталогу, зокрема без коректної аплікатури."""
+        with self._lock:
+            return dict(self._names)
+
+    def _item(self, chord_id: int) -> dict:
+        frets = [int(f) for f in self._frets[self._row[chord_id]]]
+        return {"id": chord_id, "name": self._names[chord_id], "frets": frets, "shape": format_shape(frets)}
+
+    def exact(self, frets: Sequence[int]) -> List[dict]:
+        with self._lock:
+            return [self._item(c) for c in self._exact.get(pack(frets), ())]
+
+    def by_name(self, name: str) -> List[dict]:
+        """Усі аплікатури акорду з цією назвою (кожен рядок ``chords`` — одна аплікатура)."""
+        with self._lock:
+            return [self._item(c) for c in self._by_name.get(name.strip(), ())]
+
+    def nearest(
+        self,
+        frets: Sequence[Optional[int]],
+        limit: int = 10,
+        max_distance: int = 4,
+        open_cost: int = 1,
+        mute_cost: int = 3,
+    ) -> List[dict]:
+        """Найближчі аплікатури: спершу з меншою відстанню, далі за id."""
+        known = np.array([f is not None for f in frets])
+        query = np.array([MUTED if f is None else f for f in frets], np.int16)
+        with self._lock:
+            grid = self._frets.astype(np.int16)
+            ids = self._ids
+            q_muted, v_muted = query == MUTED, grid == MUTED
+            cost = np.abs(grid - query)
+            one_muted = q_muted != v_muted
+            cost[v_muted & q_muted] = 0
+            cost[one_muted] = mute_cost
+            cost[one_muted & ((grid == 0) | (query == 0))] = open_cost
+            distance = (cost * known).sum(axis=1)
+            hits = np.flatnonzero(distance <= max_distance)
+            order = hits[np.lexsort((ids[hits], distance[hits]))][:limit]
+            return [
+                {**self._item(int(ids[i])), "distance": int(distance[i])} for i in order
+            ]
+
+
+voicing_index = VoicingIndex()
+
+
+# зміни акордів через ORM (адмінка, скрипти) — перебудова при наступному запиті
+@event.listens_for(Chord, "after_insert")
+@event.listens_for(Chord, "after_update")
+@event.listens_for(Chord, "after_delete")
+def _chords_changed(mapper, connection, target: Chord) -> None:
+    voicing_index.mark_stale()
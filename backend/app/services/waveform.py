@@ -0,0 +1,216 @@
+"""
+Хвильова форма (waveform) аудіо для плеєра.
+
+Після ``upload_audio`` файл у фоні декодується блоками, і для кожних
+``BASE_SAMPLES`` кадрів рахуються min/max (усі канали разом); далі рівні
+грубішають удвічі, поки не лишиться ``MIN_BINS`` точок. Значення квантуються в
+int8 і пишуться бінарним sidecar-файлом ``<аудіо>.peaks`` поруч з аудіо — клієнт
+отримує один рівень на кілька КБ замість декодування всього треку.
+
+WAV (PCM 8/16/24/32 біт) декодується стандартним ``wave``; інші формати — через
+``soundfile`` (libsndfile), якщо він встановлений.
+
+Формат sidecar (little-endian)::
+
+    заголовок  "WFPK", u8 версія, u8 резерв, u32 частота, u64 кадри,
+               u32 BASE_SAMPLES, u16 кількість рівнів
+    таблиця    на кожен рівень: u32 кадрів на точку, u32 кількість точок
+    дані       рівні підряд, кожна точка — int8 min, int8 max
+
+Якщо аудіо не декодується, поруч лишається маркер ``<аудіо>.peaks.failed`` —
+аудіо контентно-адресоване, тож повторна спроба дала б те саме.
+"""
+import logging
+import os
+import struct
+import tempfile
+import threading
+import wave
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import soundfile
+except ImportError:  # опційна залежність: без неї — лише WAV
+    soundfile = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"WFPK"
+VERSION = 1
+BASE_SAMPLES = 256
+MIN_BINS = 256
+BLOCK_FRAMES = BASE_SAMPLES * 4096
+
+_HEADER = struct.Struct("<4sBBIQIH")
+_LEVEL = struct.Struct("<II")
+
+
+class UnsupportedAudio(Exception):
+    pass
+
+
+_building: set = set()  # аудіо, для яких sidecar уже рахується в цьому воркері
+_building_lock = threading.Lock()
+
+
+def peaks_path(audio: Path) -> Path:
+    return audio.with_name(audio.name + ".peaks")
+
+
+def failed_path(audio: Path) -> Path:
+    return audio.with_name(audio.name + ".peaks.failed")
+
+
+# ───── decoding ──────────────────────────────────────────────────────────────
+def _pcm_to_float(frames: bytes, width: int) -> np.ndarray:
+    raw = np.frombuffer(frames, np.uint8)
+    if width == 1:  # 8-бітний WAV беззнаковий
+        return (raw.astype(np.float32) - 128) / 128
+    if width == 2:
+        return np.frombuffer(frames, "<i2").astype(np.float32) / 2**15
+    if width == 3:
+        b = raw.reshape(-1, 3).astype(np.int32)
+        value = b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)
+        return (np.where(value >= 2**23, value - 2**24, value)).astype(np.float32) / 2**23
+    if width == 4:
+        return np.frombuffer(frames, "<i4").astype(np.float32) / 2**31
+    raise UnsupportedAudio(f"PCM width {width}")
+
+
+def _read_blocks(path: Path) -> Iterator[Tuple[int, np.ndarray]]:
+    """``(частота, блок float32 [кадри, канали])``."""
+    try:
+        w = wave.open(str(path), "rb")
+    except (wave.Error, EOFError):
+        w = None
+    if w is not None:
+        with w:
+            channels, width, rate = w.getnchannels(), w.getsampwidth(), w.getframerate()
+            frame_bytes = width * channels
+            while frames := w.readframes(BLOCK_FRAMES):
+                # обрізаний файл закінчується посеред кадру — неповний кадр відкидаємо
+                frames = frames[: len(frames) - len(frames) % frame_bytes]
+                if frames:
+                    yield rate, _pcm_to_float(frames, width).reshape(-1, channels)
+        return
+    if soundfile is None:
+        raise UnsupportedAudio(path.suffix)
+    try:
+        rate = soundfile.info(str(path)).samplerate
+        blocks = soundfile.blocks(str(path), BLOCK_FRAMES, dtype="float32", always_2d=True)
+        for block in blocks:
+            yield rate, block
+    except RuntimeError as e:  # libsndfile не знає формату
+        raise UnsupportedAudio(str(e)) from e
+
+
+# ───── peaks ─────────────────────────────────────────────────────────────────
+def compute_peaks(path: Path) -> Tuple[int, int, List[np.ndarray]]:
+    """``(частота, кадри, [рівень int8 [точки, 2], …])`` — від найдетальнішого."""
+    rate, frames = 0, 0
+    mins, maxs = [], []
+    for rate, block in _read_blocks(path):
+        frames += len(block)
+        starts = np.arange(0, len(block), BASE_SAMPLES)
+        # блоки кратні BASE_SAMPLES, тож точка не розривається між ними
+        mins.append(np.minimum.reduceat(block.min(axis=1), starts))
+        maxs.append(np.maximum.reduceat(block.max(axis=1), starts))
+    lo = np.concatenate(mins) if mins else np.zeros(0, np.float32)
+    hi = np.concatenate(maxs) if maxs else np.zeros(0, np.float32)
+
+    levels = []
+    while True:
+        pairs = np.stack([lo, hi], axis=1)
+        levels.append(np.clip(np.round(pairs * 127), -127, 127).astype(np.int8))
+        if len(lo) <= MIN_BINS:
+            break
+        if len(lo) % 2:
+            lo, hi = np.append(lo, lo[-1]), np.append(hi, hi[-1])
+        lo = np.minimum(lo[0::2], lo[1::2])
+        hi = np.maximum(hi[0::2], hi[1::2])
+    return rate, frames, levels
+
+
+def write_peaks(dst: Path, rate: int, frames: int, levels: List[np.ndarray]) -> None:
+    # унікальний тимчасовий файл: те саме аудіо можуть рахувати кілька потоків чи воркерів
+    fd, tmp = tempfile.mkstemp(dir=dst.parent, prefix=f".{dst.name}.", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, 0, rate, frames, BASE_SAMPLES, len(levels)))
+            for i, level in enumerate(levels):
+                f.write(_LEVEL.pack(BASE_SAMPLES << i, len(level)))
+            for level in levels:
+                f.write(level.tobytes())
+        os.chmod(tmp, 0o644)  # mkstemp створює 0600
+        os.replace(tmp, dst)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def build_peaks(audio: Path) -> bool:
+    """Фонове завдання після завантаження; ``False`` — аудіо не декодується."""
+    dst = peaks_path(audio)
+    if read_level(dst, 1) is not None:  # контентно-адресоване аудіо: той самий вміст уже оброблено
+        return True
+    if failed_path(audio).exists():
+        return False
+    with _building_lock:
+        if audio in _building:  # повторний запит, поки рахується
+            return True
+        _building.add(audio)
+    try:
+        dst.unlink(missing_ok=True)  # застарілий формат чи обрізаний файл
+        write_peaks(dst, *compute_peaks(audio))
+    except (UnsupportedAudio, wave.Error, EOFError, ValueError) as e:
+        logger.info("waveform: %s не декодується (%s)", audio.name, e)
+        failed_path(audio).write_text(str(e))
+        return False
+    finally:
+        with _building_lock:
+            _building.discard(audio)
+    return True
+
+
+def read_level(path: Path, width: int) -> Optional[Tuple[dict, bytes]]:
+    """
+    Найгрубіший рівень, де точок не менше ніж ``width`` (або найдетальніший):
+    ``(метадані, байти int8 min/max)``; ``None``, якщо sidecar-файлу ще немає
+    або він іншої версії чи обрізаний (тоді ``build_peaks`` збирає його заново).
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    with f:
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            return None
+        magic, version, _, rate, frames, _, count = _HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION or not count:
+            return None
+        raw = f.read(_LEVEL.size * count)
+        if len(raw) < _LEVEL.size * count:
+            return None
+        table = list(_LEVEL.iter_unpack(raw))
+        chosen = 0
+        for i, (_, bins) in enumerate(table):
+            if bins >= width:
+                chosen = i
+        offset = f.tell() + sum(bins * 2 for _, bins in table[:chosen])
+        samples_per_peak, bins = table[chosen]
+        f.seek(offset)
+        data = f.read(bins * 2)
+        if len(data) < bins * 2:
+            return None
+    meta = {
+        "sample_rate": rate,
+        "frames": frames,
+        "samples_per_peak": samples_per_peak,
+        "peaks": bins,
+    }
+    return meta, data
@@ -0,0 +1,182 @@
+"""
+Затримка читань каталогу під час хвилі завантажень або логінів — з контролем
+допуску (``ADMISSION_ENABLED``) і без нього.
+
+Для кожного режиму піднімається uvicorn (``benchmarks.loadtest:make_app``),
+``--readers`` клієнтів безперервно читають каталог (деталі пісні й список), а
+в другій половині прогону ще ``--flooders`` клієнтів без пауз шлють
+завантаження (``--flood upload``) або логіни (``--flood login``). Виводяться
+p50/p99 читань каталогу до й під час хвилі, а також скільки запитів хвилі
+виконано і скільки отримали 503.
+
+    cd backend && python -m benchmarks.admission --flood upload --flooders 200 --seconds 20
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.datagen import ADMIN, PASSWORD, Dataset, bench_env
+from benchmarks.loadtest import DEFAULT_DB, _pct, wav_bytes
+
+
+async def reader(http: httpx.AsyncClient, n: int, ctx: dict, stop: float,
+                 out: Dict[str, List[float]], phase: Dict[str, str]) -> None:
+    rnd = random.Random(n)
+    while time.perf_counter() < stop:
+        if rnd.random() < 0.7:
+            url, params = f"/songs/{rnd.randint(1, ctx['songs'])}", None
+        else:
+            url, params = "/songs", {"limit": 50}
+        started = time.perf_counter()
+        r = await http.get(url, params=params, headers=ctx["reader"])
+        label = phase["name"] + (" err" if r.status_code >= 400 else "")
+        out.setdefault(label, []).append(time.perf_counter() - started)
+
+
+async def flooder(http: httpx.AsyncClient, n: int, kind: str, ctx: dict, stop: float,
+                  counts: Dict[int, int]) -> None:
+    rnd = random.Random(-n)
+    while time.perf_counter() < stop:
+        if kind == "upload":
+            song = rnd.randint(ctx["scratch_from"], ctx["songs"])
+            r = await http.post(f"/songs/{song}/upload-audio", content=ctx["body"],
+                                headers={**ctx["admin"], "Content-Type": ctx["content_type"]})
+        else:
+            user = f"bench_user_{n % ctx['users'] + 1}"
+            r = await http.post("/login", json={"username": user, "password": PASSWORD})
+        counts[r.status_code] = counts.get(r.status_code, 0) + 1
+        if r.status_code == 503:
+            await asyncio.sleep(float(r.headers.get("retry-after", "1")))
+
+
+def flood_process(base: str, kind: str, flooders: int, ctx: dict, seconds: float, out) -> None:
+    """Хвиля — в окремому процесі, щоб її клієнтська робота не гальмувала цикл читачів."""
+
+    async def go() -> Dict[int, int]:
+        counts: Dict[int, int] = {}
+        stop = time.perf_counter() + seconds
+        limits = httpx.Limits(max_connections=flooders)
+        async with httpx.AsyncClient(base_url=base, limits=limits, timeout=120) as http:
+            await asyncio.gather(*(
+                flooder(http, n, kind, ctx, stop, counts) for n in range(flooders)
+            ))
+        return counts
+
+    out.put(asyncio.run(go()))
+
+
+async def scenario(base: str, args, ds: Dataset) -> dict:
+    async with httpx.AsyncClient(base_url=base, timeout=120) as http:
+        tokens = []
+        for username in (ADMIN, "bench_user_1"):
+            r = await http.post("/login", json={"username": username, "password": PASSWORD})
+            r.raise_for_status()
+            tokens.append({"Authorization": f"Bearer {r.json()['access_token']}"})
+        # multipart кодується один раз — інакше клієнт хвилі впирається в CPU раніше за сервер
+        upload = http.build_request("POST", "/", files={"file": ("track.wav", wav_bytes(2.0))})
+        ctx = {
+            "admin": tokens[0], "reader": tokens[1], "songs": ds.songs,
+            "scratch_from": ds.scratch_from, "users": ds.users,
+            "body": upload.read(), "content_type": upload.headers["Content-Type"],
+        }
+        latencies: Dict[str, List[float]] = {}
+        phase = {"name": "quiet"}
+        stop = time.perf_counter() + args.seconds
+        readers = [
+            asyncio.create_task(reader(http, n, ctx, stop, latencies, phase))
+            for n in range(args.readers)
+        ]
+        await asyncio.sleep(args.seconds / 2)
+        phase["name"] = "flood"
+        out = multiprocessing.Queue()
+        proc = multiprocessing.Process(
+            target=flood_process,
+            args=(base, args.flood, args.flooders, ctx, stop - time.perf_counter(), out),
+        )
+        proc.start()
+        await asyncio.gather(*readers)
+        counts = await asyncio.to_thread(out.get)
+        proc.join()
+
+    result = {}
+    for name in ("quiet", "flood"):
+        values = sorted(latencies.get(name, []))
+        result[name] = {
+            "n": len(values), "errors": len(latencies.get(name + " err", [])),
+            "p50_ms": _pct(values, 0.5) if values else 0.0,
+            "p99_ms": _pct(values, 0.99) if values else 0.0,
+        }
+    result["flood_status"] = dict(sorted(counts.items()))
+    return result
+
+
+def run(args, ds: Dataset, admission: bool) -> dict:
+    env = {**os.environ, "ADMISSION_ENABLED": str(admission).lower(), "SIMILAR_INDEX_PATH": ""}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.loadtest:make_app", "--factory",
+         "--port", str(args.port), "--workers", str(args.workers), "--log-level", "warning"],
+        env=env,
+    )
+    base = f"http://127.0.0.1:{args.port}"
+    try:
+        for _ in range(600):
+            try:
+                httpx.get(base + "/docs")
+                break
+            except httpx.TransportError:
+                time.sleep(0.1)
+        return asyncio.run(scenario(base, args, ds))
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db-url", default=DEFAULT_DB, help="цю базу буде очищено!")
+    ap.add_argument("--reuse", action="store_true", help="не перегенеровувати базу")
+    ap.add_argument("--songs", type=int, default=Dataset.songs)
+    ap.add_argument("--flood", choices=["upload", "login"], default="upload")
+    ap.add_argument("--flooders", type=int, default=200)
+    ap.add_argument("--readers", type=int, default=8)
+    ap.add_argument("--seconds", type=float, default=20.0)
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--port", type=int, default=8768)
+    args = ap.parse_args()
+
+    bench_env()
+    ds = Dataset(songs=args.songs)
+    os.environ["BENCH_DB_URL"] = args.db_url
+    if not args.reuse:
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import Session
+
+        from benchmarks.datagen import generate, reset
+
+        engine = create_engine(args.db_url)
+        reset(engine)
+        with Session(engine) as db:
+            generate(db, ds)
+        engine.dispose()
+
+    print(f"{'admission':<10} {'phase':<6} {'reads':>7} {'err':>5} {'p50 ms':>9} {'p99 ms':>9}"
+          "  flood status")
+    for admission in (False, True):
+        result = run(args, ds, admission)
+        for name in ("quiet", "flood"):
+            s = result[name]
+            status = result["flood_status"] if name == "flood" else ""
+            print(f"{'on' if admission else 'off':<10} {name:<6} {s['n']:>7} {s['errors']:>5} "
+                  f"{s['p50_ms']:>9.1f} {s['p99_ms']:>9.1f}  {status}")
+
+
+if __name__ == "__main__":
+    main()
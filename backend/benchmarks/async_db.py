@@ -0,0 +1,122 @@
+"""
+Sync vs async DB mode: requests/s on ``GET /songs`` and ``GET /songs/{id}``.
+
+Піднімає uvicorn двічі (DB_ASYNC=false / DB_ASYNC=true) проти тієї ж бази
+і ганяє N конкурентних клієнтів. Потрібен запущений PostgreSQL з .env:
+
+    cd backend && python -m benchmarks.async_db --clients 200 --duration 15
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+ADMIN = {"username": "bench_admin", "password": "BenchPass123"}
+
+
+def seed(songs: int) -> None:
+    from app.core.database import SessionLocal, engine
+    from app.models import Base, Chord, Song, SongChord, User, UserRole
+    from app.core.security import hash_password
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if db.query(Song).count() >= songs:
+            return
+        admin = db.query(User).filter(User.username == ADMIN["username"]).first()
+        if not admin:
+            admin = User(
+                username=ADMIN["username"],
+                hashed_password=hash_password(ADMIN["password"]),
+                role=UserRole.ADMIN,
+            )
+            db.add(admin)
+            db.flush()
+        chords = [Chord(name=f"bench-{i}", strings_json="[0,2,2,1,0,0]") for i in range(24)]
+        db.add_all(chords)
+        db.flush()
+        for i in range(songs):
+            song = Song(title=f"bench song {i}", lyrics="la " * 50, author_id=admin.id)
+            db.add(song)
+            db.flush()
+            db.add_all(SongChord(song_id=song.id, chord_id=chords[(i + k) % 24].id) for k in range(4))
+        db.commit()
+    finally:
+        db.close()
+
+
+async def hammer(base: str, path_of, clients: int, duration: float, token: str) -> float:
+    done = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(base_url=base, limits=limits, headers=headers, timeout=60) as cl:
+
+        async def worker(n: int) -> None:
+            nonlocal done
+            i = n
+            while time.perf_counter() < deadline:
+                r = await cl.get(path_of(i))
+                r.raise_for_status()
+                done += 1
+                i += clients
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(clients)))
+        return done / (time.perf_counter() - started)
+
+
+def run_mode(async_mode: bool, args) -> dict:
+    env = dict(os.environ, DB_ASYNC=str(async_mode).lower())
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        env=env,
+    )
+    base = f"http://127.0.0.1:{args.port}"
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(base + "/docs", timeout=1)
+                break
+            except httpx.TransportError:
+                time.sleep(0.2)
+        token = httpx.post(base + "/login", json=ADMIN).json()["access_token"]
+        return {
+            "GET /songs": asyncio.run(
+                hammer(base, lambda i: "/songs", args.clients, args.duration, token)
+            ),
+            "GET /songs/{id}": asyncio.run(
+                hammer(base, lambda i: f"/songs/{i % args.songs + 1}", args.clients, args.duration, token)
+            ),
+        }
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--clients", type=int, default=200)
+    ap.add_argument("--duration", type=float, default=15.0)
+    ap.add_argument("--songs", type=int, default=500)
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--port", type=int, default=8765)
+    args = ap.parse_args()
+
+    seed(args.songs)
+    result = {"sync": run_mode(False, args), "async": run_mode(True, args)}
+    for route in result["sync"]:
+        s, a = result["sync"][route], result["async"][route]
+        print(f"{route:<18} sync {s:8.1f} rps   async {a:8.1f} rps   x{a / s:.2f}")
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
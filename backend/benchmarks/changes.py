@@ -0,0 +1,100 @@
+"""
+Синхронізація офлайн-клієнта: повне перевантаження каталогу (сторінки
+``GET /songs``) проти ``GET /changes?since=…`` після ``--changes`` змін.
+
+Зміни — оновлення й видалення випадкових пісень через ``record`` у тих самих
+транзакціях, що й сама зміна. Для кожного способу виводяться запити до фіду,
+байти JSON і час на стороні сервера (запити + серіалізація).
+
+    cd backend && python -m benchmarks.changes --songs 20000 --changes 50
+"""
+import argparse
+import random
+import time
+
+from benchmarks.datagen import Dataset, bench_env
+from benchmarks.loadtest import DEFAULT_DB
+
+
+def full_list(db, page_size: int):
+    from app.api.endpoints.songs import _list_songs_stmt, _song_item
+    from app.core.encoding import json_bytes
+
+    cursor, pages, size = None, 0, 0
+    while True:
+        rows = db.execute(_list_songs_stmt(None, None, None, cursor).limit(page_size)).all()
+        pages += 1
+        size += len(json_bytes([_song_item(s) for s in rows]))
+        if len(rows) < page_size:
+            return pages, size
+        cursor = [rows[-1].id]
+
+
+def delta(db, since: int, page_size: int):
+    from app.core.encoding import json_bytes
+    from app.services.catalog_changes import feed
+
+    pages, size, after = 0, 0, None
+    while True:
+        page = feed(db, since, page_size, after)
+        pages += 1
+        size += len(json_bytes(page))
+        since, after = page["version"], page["after"]
+        if not page["more"]:
+            return pages, size, since
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db-url", default=DEFAULT_DB, help="цю базу буде очищено!")
+    ap.add_argument("--songs", type=int, default=Dataset.songs)
+    ap.add_argument("--changes", type=int, default=50)
+    ap.add_argument("--page", type=int, default=1000)
+    args = ap.parse_args()
+
+    bench_env()
+    from sqlalchemy import create_engine, delete, update
+    from sqlalchemy.orm import Session
+
+    from app.models import Song, SongChord, UserSong
+    from app.services import catalog_changes
+    from benchmarks.datagen import generate, reset
+
+    engine = create_engine(args.db_url)
+    reset(engine)
+    ds = Dataset(songs=args.songs)
+    with Session(engine) as db:
+        generate(db, ds)
+        catalog_changes.ensure(db)
+
+    rng = random.Random(7)
+    with Session(engine) as db:
+        print(f"{'sync':<28} {'pages':>6} {'KiB':>9} {'ms':>9}")
+
+        def report(name, fn, *args):
+            started = time.perf_counter()
+            pages, size, *_ = fn(db, *args)
+            took = (time.perf_counter() - started) * 1000
+            print(f"{name:<28} {pages:>6} {size / 1024:>9.1f} {took:>9.1f}")
+
+        report("GET /songs (усі сторінки)", full_list, args.page)
+        report("GET /changes?since=0", delta, 0, args.page)
+        _, _, since = delta(db, 0, args.page)
+
+        for n, song_id in enumerate(rng.sample(range(1, ds.songs + 1), args.changes)):
+            if n % 5:
+                title = f"Змінена {song_id}"
+                db.execute(update(Song).where(Song.id == song_id).values(title=title))
+                catalog_changes.record(db, catalog_changes.SONG, [song_id])
+            else:
+                db.execute(delete(SongChord).where(SongChord.song_id == song_id))
+                db.execute(delete(UserSong).where(UserSong.song_id == song_id))
+                db.execute(delete(Song).where(Song.id == song_id))
+                catalog_changes.record(db, catalog_changes.SONG, [song_id], deleted=True)
+            db.commit()
+        report(f"GET /changes ({args.changes} змін)", delta, since, args.page)
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
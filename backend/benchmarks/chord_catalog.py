@@ -0,0 +1,80 @@
+"""
+Каталог акордів: запит до БД + серіалізація на кожне звернення проти знімка в
+пам'яті (``chord_catalog``) — увесь список, пошук за id і перевірка версії, яку
+фоновий потік робить раз на ``CHORD_CATALOG_POLL``.
+
+    cd backend && python -m benchmarks.chord_catalog --chords 2000 --repeat 500
+"""
+import argparse
+import random
+import time
+
+from benchmarks.datagen import Dataset, bench_env
+from benchmarks.loadtest import DEFAULT_DB
+
+
+def timed(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db-url", default=DEFAULT_DB, help="цю базу буде очищено!")
+    ap.add_argument("--chords", type=int, default=Dataset.chords)
+    ap.add_argument("--repeat", type=int, default=500)
+    args = ap.parse_args()
+
+    bench_env()
+    from sqlalchemy import create_engine, select
+    from sqlalchemy.orm import Session
+
+    from app.core.encoding import json_bytes
+    from app.models import Chord
+    from app.services import catalog_changes
+    from app.services.chord_catalog import ChordCatalog
+    from benchmarks.datagen import generate, reset
+
+    engine = create_engine(args.db_url)
+    reset(engine)
+    ds = Dataset(songs=100, chords=args.chords)
+    with Session(engine) as db:
+        generate(db, ds)
+        catalog_changes.ensure(db)
+
+    rng = random.Random(7)
+    ids = [rng.randint(1, ds.chords) for _ in range(args.repeat)]
+    with Session(engine) as db:
+        catalog = ChordCatalog()
+        started = time.perf_counter()
+        catalog.rebuild(db)
+        rebuild = (time.perf_counter() - started) * 1000
+
+        def db_list():
+            rows = db.scalars(select(Chord).order_by(Chord.id))
+            json_bytes([
+                {"id": c.id, "name": c.name, "strings": c.strings, "description": c.description,
+                 "image_url": c.image_url, "audio_url": c.audio_url}
+                for c in rows
+            ])
+
+        it = iter(ids * 2)
+        results = [
+            ("GET /chords: БД + JSON", timed(db_list, args.repeat)),
+            ("GET /chords: готове тіло", timed(lambda: catalog.snapshot.body, args.repeat)),
+            ("за id: БД", timed(
+                lambda: db.scalar(select(Chord).where(Chord.id == next(it))), args.repeat
+            )),
+            ("за id: пам'ять", timed(lambda: catalog.get(next(it)), args.repeat)),
+            ("перевірка версії (потік)", timed(lambda: catalog.refresh(db), args.repeat)),
+        ]
+    print(f"акордів: {ds.chords}, перебудова знімка: {rebuild:.1f} мс")
+    for name, us in results:
+        print(f"{name:<28} {us:>10.1f} мкс")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
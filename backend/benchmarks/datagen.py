@@ -0,0 +1,171 @@
+"""
+Детермінований генератор даних для бенчмарків.
+
+Той самий ``seed`` і ті самі розміри дають ту саму базу (ті самі id, назви,
+зв'язки), тож результати прогонів на різних комітах можна порівнювати.
+Розподіли наближені до реальних: популярність акордів і пісень — за Ципфом,
+у пісні здебільшого 3–6 акордів, рідко до 12; збереженого в користувачів
+різна кількість. Останні ``SCRATCH_SHARE`` пісень ніхто не зберігає — на них
+навантаження робить save/unsave, не стикаючись із наявними зв'язками.
+
+    cd backend && python -m benchmarks.datagen --db-url sqlite:///bench.db --songs 20000
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import random
+from dataclasses import asdict, dataclass
+from typing import List
+
+PASSWORD = "BenchPass123"
+ADMIN = "bench_admin"
+SCRATCH_SHARE = 0.1
+
+ROOTS = ["C", "C#", "D", "Eb", "E", "F", "F#", "G", "Ab", "A", "Bb", "B"]
+QUALITIES = ["", "m", "7", "m7", "maj7", "sus2", "sus4", "dim", "aug", "6", "9", "add9", "m9", "7sus4"]
+WORDS = (
+    "ніч зоря вітер річка дорога серце мрія весна осінь пісня поле місто море дім "
+    "сонце небо вогонь тиша сад любов ранок вечір зима літо хмара степ ліс світло "
+    "night star road heart river dream summer fire rain song home city light blue"
+).split()
+FANOUT = [3, 4, 5, 6, 7, 8, 10, 12]
+FANOUT_WEIGHTS = [20, 30, 22, 12, 7, 5, 3, 1]
+
+
+@dataclass(frozen=True)
+class Dataset:
+    users: int = 1000
+    chords: int = 120
+    songs: int = 20000
+    saved_songs: int = 15  # у середньому на користувача
+    saved_chords: int = 8
+    seed: int = 42
+
+    @property
+    def scratch_from(self) -> int:
+        """Перший id пісні, яку ніхто не зберігає (ids 1..songs)."""
+        return self.songs - max(int(self.songs * SCRATCH_SHARE), 1) + 1
+
+    def fingerprint(self) -> str:
+        raw = json.dumps(asdict(self), sort_keys=True).encode()
+        return hashlib.blake2b(raw, digest_size=8).hexdigest()
+
+
+def _zipf(n: int, s: float = 1.1) -> List[float]:
+    return [1 / (rank ** s) for rank in range(1, n + 1)]
+
+
+def _pick(rng: random.Random, cum_weights: List[float], k: int, n: int) -> List[int]:
+    """``k`` різних індексів з ``range(n)`` з вагами (k ≤ n)."""
+    picked = {}
+    while len(picked) < k:
+        picked.setdefault(rng.choices(range(n), cum_weights=cum_weights)[0], None)
+    return list(picked)
+
+
+def chord_names(n: int) -> List[str]:
+    names = [r + q for q, r in itertools.product(QUALITIES, ROOTS)]
+    return [names[i] if i < len(names) else f"{names[i % len(names)]}/{i}" for i in range(n)]
+
+
+def generate(db, ds: Dataset, batch: int = 5000) -> None:
+    """Заповнює порожню БД; id в кожній таблиці — 1..N у порядку генерації."""
+    from sqlalchemy import insert
+
+    from app.core.security import hash_password
+    from app.models import Chord, Genre, Song, SongChord, User, UserChord, UserRole, UserSong
+
+    rng = random.Random(ds.seed)
+    hashed = hash_password(PASSWORD)  # bcrypt один раз: на всіх однаковий пароль
+
+    def bulk(model, rows) -> None:
+        rows = iter(rows)
+        while chunk := list(itertools.islice(rows, batch)):
+            db.execute(insert(model), chunk)
+
+    bulk(User, [{"username": ADMIN, "hashed_password": hashed, "role": UserRole.ADMIN}])
+    bulk(User, ({"username": f"bench_user_{i}", "hashed_password": hashed, "role": UserRole.USER}
+                for i in range(1, ds.users + 1)))
+
+    bulk(Chord, (
+        {
+            "name": name,
+            "strings_json": json.dumps([rng.choice([-1, 0, 1, 2, 3, 4, 5]) for _ in range(6)]),
+            "created_by": 1,
+        }
+        for name in chord_names(ds.chords)
+    ))
+
+    genres = list(Genre)
+    bulk(Song, (
+        {
+            "title": " ".join(rng.choices(WORDS, k=rng.randint(1, 4))).capitalize() + f" {i}",
+            "lyrics": "\n".join(" ".join(rng.choices(WORDS, k=8)) for _ in range(rng.randint(4, 24))),
+            "genre": rng.choice(genres),
+            "author_id": 1,
+        }
+        for i in range(1, ds.songs + 1)
+    ))
+
+    chord_cum = list(itertools.accumulate(_zipf(ds.chords)))
+
+    def song_chords():
+        for song_id in range(1, ds.songs + 1):
+            k = min(rng.choices(FANOUT, FANOUT_WEIGHTS)[0], ds.chords)
+            for idx in _pick(rng, chord_cum, k, ds.chords):
+                yield {"song_id": song_id, "chord_id": idx + 1}
+
+    bulk(SongChord, song_chords())
+
+    def saved(mean: int, ids: List[int]):
+        """``(user_id, id)``: кількість — експоненційно навколо ``mean``, вибір — за Ципфом."""
+        cum = list(itertools.accumulate(_zipf(len(ids), 0.9)))
+        for user_id in range(2, ds.users + 2):
+            k = min(int(rng.expovariate(1 / mean)), len(ids) // 2) if mean else 0
+            for idx in _pick(rng, cum, k, len(ids)):
+                yield user_id, ids[idx]
+
+    savable = list(range(1, ds.scratch_from))
+    rng.shuffle(savable)  # популярні пісні — не перші за id
+    bulk(UserSong, ({"user_id": u, "song_id": s} for u, s in saved(ds.saved_songs, savable)))
+    chord_ids = list(range(1, ds.chords + 1))
+    bulk(UserChord, ({"user_id": u, "chord_id": c} for u, c in saved(ds.saved_chords, chord_ids)))
+    db.commit()
+
+
+def bench_env() -> None:
+    # Settings() вимагає ці змінні, хоча бенчмарк працює з власною --db-url
+    for name in ("DB_USER", "DB_PASSWORD", "SECRET_KEY"):
+        os.environ.setdefault(name, "bench")
+
+
+def reset(engine) -> None:
+    from app.models import Base
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db-url", required=True, help="цю базу буде очищено!")
+    for field in ("users", "chords", "songs", "saved_songs", "saved_chords", "seed"):
+        ap.add_argument(f"--{field.replace('_', '-')}", type=int, default=getattr(Dataset, field))
+    args = ap.parse_args()
+
+    bench_env()
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+
+    ds = Dataset(args.users, args.chords, args.songs, args.saved_songs, args.saved_chords, args.seed)
+    engine = create_engine(args.db_url)
+    reset(engine)
+    with Session(engine) as db:
+        generate(db, ds)
+    print(json.dumps({**asdict(ds), "fingerprint": ds.fingerprint()}))
+
+
+if __name__ == "__main__":
+    main()
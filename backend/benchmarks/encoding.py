@@ -0,0 +1,115 @@
+"""
+Серіалізація відповідей: час і байти на дроті для кожного формату й стиснення.
+
+Корисне навантаження будується як у ``datagen`` (ті самі слова, жанри, акорди),
+але без БД: сторінки ``GET /songs`` і ``/users``, ``/me/saved`` і деталі
+пісень з текстами. Формати:
+
+* ``fastapi-json`` — як було: ``jsonable_encoder`` + ``json.dumps`` (JSONResponse);
+* ``orjson`` — ``encoded(...)`` з ``app.core.encoding``;
+* ``msgpack`` — те саме з ``Accept: application/msgpack`` (якщо пакет встановлено).
+
+Кожен формат — без стиснення, gzip і brotli (якщо встановлено); час стиснення
+додається до часу серіалізації.
+
+    cd backend && python -m benchmarks.encoding --songs 200000 --page 1000
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+from benchmarks.datagen import WORDS, Dataset, bench_env, chord_names
+
+
+def payloads(ds: Dataset, page: int, details: int) -> Dict[str, list]:
+    rng = random.Random(ds.seed)
+    genres = ["rock", "pop", "jazz", "classic", "other", None]
+    songs = [
+        {
+            "id": i,
+            "title": " ".join(rng.choices(WORDS, k=rng.randint(1, 4))).capitalize() + f" {i}",
+            "genre": rng.choice(genres),
+        }
+        for i in range(1, ds.songs + 1)
+    ]
+    names = chord_names(ds.chords)
+    started = datetime(2024, 1, 1)
+    users = [
+        {"id": i, "username": f"bench_user_{i}", "role": "user",
+         "created": (started + timedelta(minutes=i)).isoformat()}
+        for i in range(1, page + 1)
+    ]
+    detail = [
+        {
+            "id": i,
+            "title": songs[i - 1]["title"],
+            "lyrics": "\n".join(
+                " ".join(rng.choices(WORDS, k=8)) for _ in range(rng.randint(4, 24))
+            ),
+            "genre": songs[i - 1]["genre"],
+            "sheet_url": None,
+            "audio_url": f"/media/songs/{i:08x}.wav",
+            "chords": [{"id": c + 1, "name": names[c]} for c in rng.sample(range(ds.chords), 6)],
+        }
+        for i in range(1, details + 1)
+    ]
+    return {
+        f"GET /songs (page {page})": [songs[k:k + page] for k in range(0, len(songs), page)],
+        f"GET /users (page {page})": [users],
+        "GET /songs/me/saved (50)": [
+            [{"id": s["id"], "title": s["title"]} for s in rng.sample(songs, 50)]
+            for _ in range(100)
+        ],
+        "GET /songs/{id}": detail,
+    }
+
+
+def encoders() -> Dict[str, Callable[[object], bytes]]:
+    from fastapi.encoders import jsonable_encoder
+    from starlette.responses import JSONResponse
+
+    from app.core import encoding
+
+    out = {
+        "fastapi-json": lambda content: JSONResponse(jsonable_encoder(content)).body,
+        "orjson": encoding.json_bytes,
+    }
+    if encoding.msgpack is not None:
+        out["msgpack"] = encoding.msgpack_bytes
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--songs", type=int, default=200_000)
+    ap.add_argument("--page", type=int, default=1000)
+    ap.add_argument("--details", type=int, default=2000)
+    args = ap.parse_args()
+
+    bench_env()
+    from app.core import encoding
+
+    codings = ["identity", "gzip"] + (["br"] if encoding.brotli is not None else [])
+    data = payloads(Dataset(songs=args.songs), args.page, args.details)
+    print(f"{'payload':<26} {'format':<13} {'coding':<9} {'µs/resp':>9} {'bytes/resp':>11}")
+    for name, bodies in data.items():
+        for fmt, dumps in encoders().items():
+            for coding in codings:
+                took: List[float] = []
+                sizes: List[int] = []
+                for content in bodies:
+                    started = time.perf_counter()
+                    body = dumps(content)
+                    if coding != "identity":
+                        body = encoding.compress(body, coding)
+                    took.append(time.perf_counter() - started)
+                    sizes.append(len(body))
+                print(f"{name:<26} {fmt:<13} {coding:<9} {statistics.median(took) * 1e6:>9.0f} "
+                      f"{statistics.mean(sizes):>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,399 @@
+"""
+Навантажувальний бенчмарк API: p50/p95/p99 і req/s по кожному маршруту в JSON.
+
+База генерується детерміновано (``benchmarks.datagen``), кожен клієнт отримує
+власний ``Random(seed + n)`` і робить фіксовану кількість запитів, тож два
+прогони на різних комітах виконують однакову послідовність операцій над
+однаковими даними. Суміш: логін, пошук, список, деталі (популярні пісні
+частіше), /playable, збережене, save/unsave, завантаження sheet/audio і
+Range-читання медіа.
+
+Режими:
+  inprocess — застосунок у тому ж процесі через ``httpx.ASGITransport``
+              (без мережі й uvicorn: видно саму вартість обробників);
+  http      — uvicorn з ``--workers`` процесами на локальному порту.
+
+    cd backend && python -m benchmarks.loadtest --mode http --workers 4 --clients 32 \\
+        --out before.json
+    python -m benchmarks.loadtest compare before.json after.json
+
+``--db-url`` — окрема база, її буде очищено (типово SQLite у тимчасовій теці).
+"""
+import argparse
+import asyncio
+import io
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.datagen import ADMIN, PASSWORD, WORDS, Dataset, bench_env
+
+DEFAULT_DB = f"sqlite:///{Path(tempfile.gettempdir()) / 'chords-bench.db'}"
+DEFAULT_MEDIA = str(Path(tempfile.gettempdir()) / "chords-bench-media")
+
+
+# ───── app under test ────────────────────────────────────────────────────────
+def make_app():
+    """Фабрика для uvicorn і inprocess: ``app.main`` на базі ``BENCH_DB_URL``."""
+    bench_env()
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from app.core import database
+    from app.core.metrics import TimedAsyncQueuePool, TimedQueuePool
+
+    url = os.environ.get("BENCH_DB_URL", DEFAULT_DB)
+    sqlite = url.startswith("sqlite")
+    connect_args = {"check_same_thread": False, "timeout": 30} if sqlite else {}
+    database.engine = create_engine(url, poolclass=TimedQueuePool, connect_args=connect_args)
+    database.SessionLocal = sessionmaker(bind=database.engine, autocommit=False, autoflush=False)
+    if database.settings.db_async:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        async_url = url.replace("sqlite:", "sqlite+aiosqlite:", 1).replace("+psycopg2", "+asyncpg", 1)
+        database.async_engine = create_async_engine(async_url, poolclass=TimedAsyncQueuePool)
+        database.AsyncSessionLocal = async_sessionmaker(
+            database.async_engine, autoflush=False, expire_on_commit=False
+        )
+
+    from app.api.endpoints import media, songs
+
+    media_dir = Path(os.environ.get("BENCH_MEDIA_DIR", DEFAULT_MEDIA))
+    media_dir.mkdir(parents=True, exist_ok=True)
+    media.SONGS_DIR = songs.SONGS_DIR = media_dir
+
+    from app.main import app
+
+    return app
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """startup/shutdown через ASGI lifespan — ASGITransport сам їх не викликає."""
+    to_app: asyncio.Queue = asyncio.Queue()
+    from_app: asyncio.Queue = asyncio.Queue()
+    task = asyncio.create_task(
+        app({"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}, to_app.get, from_app.put)
+    )
+    await to_app.put({"type": "lifespan.startup"})
+    message = await from_app.get()
+    if message["type"] != "lifespan.startup.complete":
+        raise RuntimeError(message.get("message", "startup failed"))
+    try:
+        yield
+    finally:
+        await to_app.put({"type": "lifespan.shutdown"})
+        await from_app.get()
+        await task
+
+
+# ───── payloads ──────────────────────────────────────────────────────────────
+def sheet_bytes(size: int = 256 * 1024) -> bytes:
+    rnd = random.Random(1)
+    return b"%PDF-1.4\n" + bytes(rnd.getrandbits(8) for _ in range(size))
+
+
+def wav_bytes(seconds: float = 5.0, rate: int = 22050) -> bytes:
+    out = io.BytesIO()
+    with wave.open(out, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(b"".join(
+            struct.pack("<h", int(12000 * math.sin(2 * math.pi * 440 * i / rate)))
+            for i in range(int(seconds * rate))
+        ))
+    return out.getvalue()
+
+
+# ───── workload ──────────────────────────────────────────────────────────────
+class Client:
+    """Один віртуальний користувач: власний токен і власний детермінований Random."""
+
+    def __init__(self, http: httpx.AsyncClient, n: int, ds: Dataset, ctx: dict):
+        self.http = http
+        self.n = n
+        self.ds = ds
+        self.ctx = ctx
+        self.rnd = random.Random(ds.seed * 1_000_003 + n)
+        self.username = f"bench_user_{n % ds.users + 1}"
+        self.headers: Dict[str, str] = {}
+
+    async def call(self, label: str, method: str, url: str, record, **kwargs) -> httpx.Response:
+        started = time.perf_counter()
+        r = await self.http.request(method, url, **kwargs)
+        record(label, time.perf_counter() - started, r.status_code)
+        return r
+
+    def song_id(self) -> int:
+        return self.rnd.choices(range(1, self.ds.songs + 1), cum_weights=self.ctx["song_cum"])[0]
+
+    def scratch_id(self) -> int:
+        return self.rnd.randint(self.ds.scratch_from, self.ds.songs)
+
+    # кожна операція — (вага, корутина); вага — у скільки разів частіше за логін
+    async def login(self, record):
+        r = await self.call("POST /login", "POST", "/login", record,
+                            json={"username": self.username, "password": PASSWORD})
+        self.headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    async def details(self, record):
+        await self.call("GET /songs/{song_id}", "GET", f"/songs/{self.song_id()}", record,
+                        headers=self.headers)
+
+    async def search(self, record):
+        q = " ".join(self.rnd.sample(WORDS, self.rnd.choice([1, 1, 2])))
+        await self.call("GET /songs?search", "GET", "/songs", record,
+                        params={"search": q}, headers=self.headers)
+
+    async def list_songs(self, record):
+        await self.call("GET /songs", "GET", "/songs", record,
+                        params={"limit": 50}, headers=self.headers)
+
+    async def playable(self, record):
+        await self.call("GET /songs/playable", "GET", "/songs/playable", record,
+                        headers=self.headers)
+
+    async def saved(self, record):
+        await self.call("GET /songs/me/saved", "GET", "/songs/me/saved", record, headers=self.headers)
+        await self.call("GET /chords/me/saved", "GET", "/chords/me/saved", record, headers=self.headers)
+
+    async def save_unsave(self, record):
+        # scratch-пісні ніхто не зберігає, і кожен клієнт — окремий користувач:
+        # пара save/unsave не конфліктує і лишає базу в початковому стані
+        url = f"/songs/{self.scratch_id()}/save"
+        await self.call("POST /songs/{song_id}/save", "POST", url, record, headers=self.headers)
+        await self.call("DELETE /songs/{song_id}/save", "DELETE", url, record, headers=self.headers)
+
+    async def upload(self, record):
+        kind, name, data = self.rnd.choice(self.ctx["uploads"])
+        await self.call(f"POST /songs/{{song_id}}/upload-{kind}", "POST",
+                        f"/songs/{self.scratch_id()}/upload-{kind}", record,
+                        files={"file": (name, data)}, headers=self.ctx["admin"])
+
+    async def media(self, record):
+        url, size = self.rnd.choice(self.ctx["media"])
+        start = self.rnd.randrange(0, max(size - 65536, 1))
+        await self.call("GET /media/songs/{name}", "GET", url, record,
+                        headers={"Range": f"bytes={start}-{start + 65535}"})
+
+    def mix(self):
+        return [
+            (2, self.login), (30, self.details), (15, self.search), (10, self.list_songs),
+            (5, self.playable), (5, self.saved), (10, self.save_unsave), (2, self.upload),
+            (5, self.media),
+        ]
+
+
+async def prepare(http: httpx.AsyncClient) -> dict:
+    r = await http.post("/login", json={"username": ADMIN, "password": PASSWORD})
+    r.raise_for_status()
+    admin = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    uploads = [("sheet", "sheet.pdf", sheet_bytes()), ("audio", "track.wav", wav_bytes())]
+    media = []
+    for kind, name, data in uploads:  # файли для Range-читання (не в статистиці)
+        r = await http.post(f"/songs/1/upload-{kind}", files={"file": (name, data)}, headers=admin)
+        r.raise_for_status()
+        media.append((r.json()[f"{kind}_url"], len(data)))
+    return {"admin": admin, "uploads": uploads, "media": media}
+
+
+async def drive(http: httpx.AsyncClient, ds: Dataset, clients: int, requests: int, warmup: int) -> dict:
+    ctx = await prepare(http)
+    ctx["song_cum"] = list(itertools.accumulate(1 / (r ** 0.9) for r in range(1, ds.songs + 1)))
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    recording = False
+
+    def record(label: str, seconds: float, status: int) -> None:
+        if not recording:
+            return
+        latencies[label].append(seconds)
+        if status >= 400:
+            errors[label] += 1
+
+    users = [Client(http, n, ds, ctx) for n in range(clients)]
+    for c in users:
+        await c.login(record)
+
+    async def run(c: Client, count: int) -> None:
+        ops = c.mix()
+        weights = [w for w, _ in ops]
+        for _ in range(count):
+            op = c.rnd.choices(ops, weights)[0][1]
+            await op(record)
+
+    await asyncio.gather(*(run(c, warmup) for c in users))
+    recording = True
+    started = time.perf_counter()
+    await asyncio.gather(*(run(c, requests) for c in users))
+    elapsed = time.perf_counter() - started
+    return {"elapsed_s": round(elapsed, 3), "routes": summarize(latencies, errors, elapsed)}
+
+
+def _pct(values: List[float], p: float) -> float:
+    return round(values[min(len(values) - 1, int(p * len(values)))] * 1000, 3)
+
+
+def _stats(values: List[float], errors: int, elapsed: float) -> dict:
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "errors": errors,
+        "rps": round(len(values) / elapsed, 2),
+        "p50_ms": _pct(values, 0.5),
+        "p95_ms": _pct(values, 0.95),
+        "p99_ms": _pct(values, 0.99),
+        "mean_ms": round(sum(values) / len(values) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3),
+    }
+
+
+def summarize(latencies: Dict[str, List[float]], errors: Dict[str, int], elapsed: float) -> dict:
+    out = {label: _stats(latencies[label], errors[label], elapsed) for label in sorted(latencies)}
+    out["*"] = _stats(
+        [v for values in latencies.values() for v in values], sum(errors.values()), elapsed
+    )
+    return out
+
+
+# ───── modes ─────────────────────────────────────────────────────────────────
+async def run_inprocess(args, ds: Dataset) -> dict:
+    app = make_app()
+    transport = httpx.ASGITransport(app=app)
+    async with lifespan(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as http:
+            return await drive(http, ds, args.clients, args.requests, args.warmup)
+
+
+def run_http(args, ds: Dataset, env: dict) -> dict:
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.loadtest:make_app", "--factory",
+         "--port", str(args.port), "--workers", str(args.workers), "--log-level", "warning"],
+        env=env,
+    )
+    base = f"http://127.0.0.1:{args.port}"
+    try:
+        for _ in range(300):
+            try:
+                httpx.get(base + "/docs")
+                break
+            except httpx.TransportError:
+                time.sleep(0.1)
+
+        async def go():
+            limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+            async with httpx.AsyncClient(base_url=base, limits=limits, timeout=120) as http:
+                return await drive(http, ds, args.clients, args.requests, args.warmup)
+
+        return asyncio.run(go())
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def compare(old_path: str, new_path: str) -> None:
+    old, new = (json.loads(Path(p).read_text()) for p in (old_path, new_path))
+    if old["dataset"] != new["dataset"]:
+        print("увага: різні набори даних — порівняння некоректне", file=sys.stderr)
+    print(f"{'route':<34} {'p50 ms':>17} {'p95 ms':>17} {'p99 ms':>17} {'req/s':>17}")
+    for label in sorted(set(old["routes"]) | set(new["routes"])):
+        a, b = old["routes"].get(label), new["routes"].get(label)
+        if not a or not b:
+            continue
+        cells = []
+        for key in ("p50_ms", "p95_ms", "p99_ms", "rps"):
+            delta = (b[key] - a[key]) / a[key] * 100 if a[key] else 0.0
+            cells.append(f"{b[key]:>9.2f} {delta:+6.1f}%")
+        print(f"{label:<34} " + " ".join(cells))
+
+
+def main() -> None:
+    if sys.argv[1:2] == ["compare"]:
+        return compare(*sys.argv[2:4])
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mode", choices=["inprocess", "http"], default="inprocess")
+    ap.add_argument("--db-url", default=DEFAULT_DB, help="цю базу буде очищено!")
+    ap.add_argument("--reuse", action="store_true", help="не перегенеровувати базу")
+    ap.add_argument("--users", type=int, default=Dataset.users)
+    ap.add_argument("--chords", type=int, default=Dataset.chords)
+    ap.add_argument("--songs", type=int, default=Dataset.songs)
+    ap.add_argument("--seed", type=int, default=Dataset.seed)
+    ap.add_argument("--clients", type=int, default=16)
+    ap.add_argument("--requests", type=int, default=200, help="операцій на клієнта")
+    ap.add_argument("--warmup", type=int, default=20)
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--port", type=int, default=8766)
+    ap.add_argument("--out", help="файл для JSON (типово — stdout)")
+    args = ap.parse_args()
+
+    bench_env()
+    ds = Dataset(users=args.users, chords=args.chords, songs=args.songs, seed=args.seed)
+    if args.clients > ds.users:
+        ap.error("--clients не може перевищувати --users (кожен клієнт — окремий користувач)")
+    os.environ["BENCH_DB_URL"] = args.db_url
+    if not args.reuse:
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import Session
+
+        from benchmarks.datagen import generate, reset
+
+        engine = create_engine(args.db_url)
+        reset(engine)
+        with Session(engine) as db:
+            generate(db, ds)
+        engine.dispose()
+
+    if args.mode == "inprocess":
+        result = asyncio.run(run_inprocess(args, ds))
+    else:
+        result = run_http(args, ds, dict(os.environ))
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "mode": args.mode,
+            "workers": args.workers if args.mode == "http" else None,
+            "clients": args.clients,
+            "requests_per_client": args.requests,
+            "db": args.db_url.split(":", 1)[0],
+        },
+        "dataset": {**asdict(ds), "fingerprint": ds.fingerprint()},
+        **result,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
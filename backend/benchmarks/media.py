@@ -0,0 +1,95 @@
+"""
+Пропускна здатність ``/media/songs/…`` проти старого ``StaticFiles``-mount.
+
+Піднімає uvicorn з мінімальним застосунком (лише mount і медіа-роутер, без БД)
+і ганяє N конкурентних клієнтів: повні завантаження файлу та випадкові
+Range-запити по 64 KiB (перемотування в плеєрі).
+
+    cd backend && python -m benchmarks.media --size-mb 20 --clients 16 --duration 10
+"""
+import argparse
+import asyncio
+import io
+import os
+import random
+import subprocess
+import sys
+import time
+
+import httpx
+
+from app.core.uploads import SONGS_DIR, store_upload
+
+
+def make_app():
+    from fastapi import FastAPI
+    from fastapi.staticfiles import StaticFiles
+
+    from app.api.endpoints.media import router
+
+    app = FastAPI()
+    app.include_router(router)
+    app.mount("/static/songs", StaticFiles(directory=SONGS_DIR), name="static")
+    return app
+
+
+async def hammer(base: str, path: str, size: int, clients: int, duration: float, seek: bool):
+    done = transferred = 0
+    deadline = time.perf_counter() + duration
+    async with httpx.AsyncClient(base_url=base, timeout=60) as cl:
+
+        async def worker(n: int) -> None:
+            nonlocal done, transferred
+            rnd = random.Random(n)
+            while time.perf_counter() < deadline:
+                headers = {}
+                if seek:
+                    start = rnd.randrange(0, size - 65536)
+                    headers["Range"] = f"bytes={start}-{start + 65535}"
+                r = await cl.get(path, headers=headers)
+                r.raise_for_status()
+                done += 1
+                transferred += len(r.content)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(clients)))
+        elapsed = time.perf_counter() - started
+    return done / elapsed, transferred / elapsed / 2**20
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--size-mb", type=int, default=20)
+    ap.add_argument("--clients", type=int, default=16)
+    ap.add_argument("--duration", type=float, default=10)
+    ap.add_argument("--port", type=int, default=8765)
+    args = ap.parse_args()
+
+    size = args.size_mb * 2**20
+    name = store_upload(io.BytesIO(os.urandom(size)), SONGS_DIR, ".wav", size)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.media:make_app", "--factory",
+         "--port", str(args.port), "--log-level", "warning"],
+    )
+    try:
+        base = f"http://127.0.0.1:{args.port}"
+        for _ in range(100):
+            try:
+                httpx.get(base + "/docs")
+                break
+            except httpx.TransportError:
+                time.sleep(0.1)
+        for label, seek in (("full file", False), ("64 KiB seek", True)):
+            for route in ("/static/songs/", "/media/songs/"):
+                rps, mbps = asyncio.run(
+                    hammer(base, route + name, size, args.clients, args.duration, seek)
+                )
+                print(f"{label:>12} {route:<15} {rps:8.1f} req/s  {mbps:8.1f} MiB/s")
+    finally:
+        proc.terminate()
+        proc.wait()
+        os.unlink(SONGS_DIR / name)
+
+
+if __name__ == "__main__":
+    main()
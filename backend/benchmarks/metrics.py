@@ -0,0 +1,99 @@
+"""
+Вартість ``MetricsMiddleware`` на запит і рендеру ``/metrics``.
+
+Викликає ASGI-застосунок напряму (без мережі й клієнта), щоб різниця з
+middleware і без неї не тонула в шумі: голий ASGI-обробник і мінімальний
+FastAPI-маршрут. Окремо — ``Histogram.observe`` і рендер реєстру з
+реалістичною кількістю серій.
+
+    cd backend && python -m benchmarks.metrics --requests 20000 --rounds 5
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.datagen import bench_env
+
+
+def raw_app():
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b'{"ok":true}'})
+
+    return app
+
+
+def fastapi_app():
+    from fastapi import FastAPI
+
+    app = FastAPI()
+
+    @app.get("/songs/{song_id}")
+    async def song(song_id: int):
+        return {"id": song_id}
+
+    return app
+
+
+async def per_request_ns(app, n: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    def scope(i: int) -> dict:
+        return {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": f"/songs/{i % 1000 + 1}",
+            "raw_path": b"", "root_path": "", "query_string": b"", "headers": [],
+            "client": ("127.0.0.1", 1), "server": ("127.0.0.1", 80),
+        }
+
+    for i in range(min(n // 10, 2000)):  # прогрів
+        await app(scope(i), receive, send)
+    started = time.perf_counter_ns()
+    for i in range(n):
+        await app(scope(i), receive, send)
+    return (time.perf_counter_ns() - started) / n
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=50_000)
+    ap.add_argument("--rounds", type=int, default=5)
+    args = ap.parse_args()
+
+    bench_env()
+    from app.core.metrics import LATENCY_BUCKETS, Histogram, MetricsMiddleware, registry
+
+    for label, make in (("raw ASGI", raw_app), ("FastAPI route", fastapi_app)):
+        plain, instrumented = make(), MetricsMiddleware(make())
+        base = wrapped = float("inf")
+        for _ in range(args.rounds):  # почергово, найкращий з раундів — менше шуму
+            base = min(base, asyncio.run(per_request_ns(plain, args.requests)))
+            wrapped = min(wrapped, asyncio.run(per_request_ns(instrumented, args.requests)))
+        print(f"{label:>14}: {base / 1000:8.2f} µs → {wrapped / 1000:8.2f} µs"
+              f"  (+{(wrapped - base) / 1000:.2f} µs, {(wrapped - base) / base * 100:+.1f}%)")
+
+    h = Histogram("bench_seconds", "bench", ("route",), LATENCY_BUCKETS)
+    n = args.requests * 4
+    started = time.perf_counter_ns()
+    for i in range(n):
+        h.observe(0.003, "/songs/{song_id}")
+    print(f"Histogram.observe: {(time.perf_counter_ns() - started) / n:.0f} ns")
+
+    from app.core.metrics import REQUEST_SECONDS, RESPONSE_BYTES
+
+    for r in range(40):  # ~ усі маршрути застосунку × кілька статусів
+        for status in ("200", "304", "404"):
+            REQUEST_SECONDS.observe(0.01, "GET", f"/route/{r}", status)
+        RESPONSE_BYTES.observe(1000, "GET", f"/route/{r}")
+    started = time.perf_counter()
+    text = registry.render()
+    print(f"render: {(time.perf_counter() - started) * 1000:.2f} ms, "
+          f"{len(text.splitlines())} рядків, {len(text) / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Латентність ``PlayableIndex.query`` («що я можу зіграти») на великому каталозі.
+
+    cd backend && python -m benchmarks.playable --songs 1000000 --chords 300
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from app.services.playable import PlayableIndex
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--songs", type=int, default=1_000_000)
+    ap.add_argument("--chords", type=int, default=300)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--max-missing", type=int, default=2)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    # популярність акордів ципфівська: Am/C/G у половині пісень, решта — рідше
+    weights = 1 / np.arange(1, args.chords + 1)
+    weights /= weights.sum()
+    per_song = rng.integers(3, 9, args.songs)
+    song_ids = np.repeat(np.arange(1, args.songs + 1), per_song)
+    chord_ids = rng.choice(args.chords, size=len(song_ids), p=weights) + 1
+    pairs = np.unique(np.stack([song_ids, chord_ids], axis=1), axis=0)
+
+    ix = PlayableIndex()
+    t0 = time.perf_counter()
+    ix.bulk_load(range(1, args.songs + 1), pairs.tolist())
+    print(f"build: {args.songs} songs / {len(pairs)} edges in {time.perf_counter() - t0:.1f}s")
+
+    rnd = random.Random(args.seed)
+    lat = []
+    for _ in range(args.queries):
+        have = rnd.sample(range(1, args.chords + 1), rnd.randint(5, 60))
+        t = time.perf_counter()
+        ix.query(have, max_missing=args.max_missing, limit=50)
+        lat.append((time.perf_counter() - t) * 1000)
+    lat.sort()
+    pick = lambda q: lat[min(len(lat) - 1, int(q * len(lat)))]  # noqa: E731
+    print(
+        f"query (max_missing={args.max_missing}): p50 {pick(0.5):.2f} ms  "
+        f"p95 {pick(0.95):.2f} ms  p99 {pick(0.99):.2f} ms"
+    )
+
+    t = time.perf_counter()
+    for sid in range(args.songs + 1, args.songs + 1001):
+        ix.add_song(sid, rnd.sample(range(1, args.chords + 1), 5))
+    for sid in range(1, 1001):
+        ix.remove_song(sid)
+    print(f"incremental: {(time.perf_counter() - t) / 2:.3f} ms per add/remove")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Скільки часу на ``GET /songs/{id}`` економить кеш користувачів за токеном.
+
+In-process (TestClient), без мережі між клієнтом і застосунком — тож різниця
+дорівнює саме вартості ``decode_token`` + ``SELECT … FROM users``. Типово база —
+SQLite-файл; ``--url`` дає реальну (наприклад Postgres з .env), де економія
+більша на величину мережевого round trip.
+
+SQLite, 5000 запитів: без кешу 6.89 ms / 3 запити в БД, з кешем 6.18 ms / 2.
+
+    cd backend && python -m benchmarks.principal_cache --requests 5000
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+for _name, _value in (("DB_USER", "bench"), ("DB_PASSWORD", "bench"), ("SECRET_KEY", "bench")):
+    os.environ.setdefault(_name, _value)
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+import app.core.database as database  # noqa: E402
+from app.core.principals import principal_cache  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Base, Chord, Song, SongChord, User, UserRole  # noqa: E402
+
+
+def run(client: TestClient, path: str, headers: dict, n: int) -> list:
+    lat = []
+    for _ in range(n):
+        t = time.perf_counter()
+        client.get(path, headers=headers).raise_for_status()
+        lat.append((time.perf_counter() - t) * 1000)
+    return sorted(lat)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=5000)
+    ap.add_argument("--url", help="SQLAlchemy URL (типово — тимчасовий SQLite-файл)")
+    args = ap.parse_args()
+
+    url = args.url or f"sqlite:///{Path(tempfile.mkdtemp()) / 'bench.db'}"
+    engine = create_engine(url)
+    database.engine = engine
+    database.SessionLocal = sessionmaker(bind=engine, autoflush=False)
+    Base.metadata.create_all(engine)
+
+    with database.SessionLocal() as db:
+        user = User(username="bench_principal", hashed_password="x", role=UserRole.ADMIN)
+        chord = Chord(name="Am", strings_json="[0,0,2,2,1,0]")
+        db.add_all([user, chord])
+        db.flush()
+        song = Song(title="bench principal song", lyrics="la " * 50, author_id=user.id)
+        db.add(song)
+        db.flush()
+        db.add(SongChord(song_id=song.id, chord_id=chord.id))
+        db.commit()
+        path = f"/songs/{song.id}"
+
+    queries = 0
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(*_):
+        nonlocal queries
+        queries += 1
+
+    headers = {"Authorization": "Bearer " + create_access_token({"sub": "bench_principal"})}
+    client = TestClient(app)
+    run(client, path, headers, 200)  # прогрів
+
+    results = {}
+    for label, size in (("no cache", 0), ("cache", 10_000)):
+        principal_cache.clear()
+        principal_cache.max_size = size
+        queries = 0
+        lat = run(client, path, headers, args.requests)
+        results[label] = sum(lat) / len(lat)
+        print(
+            f"{label:>8}: mean {results[label]:.3f} ms  p50 {lat[len(lat) // 2]:.3f} ms  "
+            f"p99 {lat[int(len(lat) * 0.99)]:.3f} ms  queries/req {queries / args.requests:.2f}"
+        )
+    print(f"saved: {results['no cache'] - results['cache']:.3f} ms per request")
+    print(principal_cache.stats())
+
+
+if __name__ == "__main__":
+    main()
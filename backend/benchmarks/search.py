@@ -0,0 +1,76 @@
+"""
+Латентність ``SongSearchIndex.search`` на синтетичному каталозі.
+
+Словник — псевдослова з кириличних і латинських складів із ципфівським
+розподілом частот (як у справжніх текстах пісень: кілька дуже частих слів
+і довгий хвіст рідкісних).
+
+    cd backend && python -m benchmarks.search --songs 100000 --queries 2000
+"""
+import argparse
+import itertools
+import random
+import time
+
+from app.services.search import SongSearchIndex
+
+UK_SYL = "ко ли на ве ри то ні ма ся ду ші зо ря ле ти ба ро ва ме ча".split()
+EN_SYL = "lo ve ni ght ar ri de so ng ma ra in da ce to mo sta fi re".split()
+
+
+def make_vocab(rnd: random.Random, size: int) -> list:
+    words = set()
+    while len(words) < size:
+        syl = UK_SYL if rnd.random() < 0.6 else EN_SYL
+        words.add("".join(rnd.choices(syl, k=rnd.randint(1, 4))))
+    words = sorted(words)
+    rnd.shuffle(words)
+    return words
+
+
+def percentile(sorted_ms: list, q: float) -> float:
+    return sorted_ms[min(len(sorted_ms) - 1, int(q * len(sorted_ms)))]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--songs", type=int, default=100_000)
+    ap.add_argument("--queries", type=int, default=2000)
+    ap.add_argument("--vocab", type=int, default=30_000)
+    ap.add_argument("--limit", type=int, default=500)  # як SEARCH_MAX_RESULTS у list_songs
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    rnd = random.Random(args.seed)
+    vocab = make_vocab(rnd, args.vocab)
+    cum = list(itertools.accumulate(1 / r for r in range(1, len(vocab) + 1)))
+
+    rows = [
+        (
+            sid,
+            " ".join(rnd.choices(vocab, cum_weights=cum, k=rnd.randint(1, 4))),
+            " ".join(rnd.choices(vocab, cum_weights=cum, k=rnd.randint(40, 160))),
+        )
+        for sid in range(1, args.songs + 1)
+    ]
+    ix = SongSearchIndex()
+    t0 = time.perf_counter()
+    ix.bulk_load(rows)
+    print(f"build: {args.songs} songs in {time.perf_counter() - t0:.1f}s")
+
+    lat = []
+    for _ in range(args.queries):
+        words = rnd.choices(vocab, cum_weights=cum, k=rnd.randint(1, 3))
+        words[-1] = words[-1][: rnd.randint(2, max(2, len(words[-1])))]  # «недонабране» слово
+        t = time.perf_counter()
+        ix.search(" ".join(words), limit=args.limit)
+        lat.append((time.perf_counter() - t) * 1000)
+    lat.sort()
+    print(
+        f"search top-{args.limit}: p50 {percentile(lat, 0.5):.2f} ms  p95 {percentile(lat, 0.95):.2f} ms  "
+        f"p99 {percentile(lat, 0.99):.2f} ms  max {lat[-1]:.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+«Схожі пісні» на синтетичному каталозі без БД: побудова підписів, запити top-k,
+збереження/читання ``.npz`` і інкрементальні додавання.
+
+Набори акордів — як у ``datagen``: 3…12 акордів на пісню з Zipf-популярністю,
+тож популярні комбінації дають великі LSH-кошики (найгірший випадок для запиту).
+
+    cd backend && python -m benchmarks.similar --songs 1000000 --queries 2000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.datagen import bench_env
+
+
+def catalog(songs: int, chords: int, seed: int):
+    rng = np.random.default_rng(seed)
+    fanout = rng.integers(3, 13, songs)
+    weights = 1.0 / np.arange(1, chords + 1) ** 1.1
+    song_ids = np.arange(1, songs + 1)
+    pairs = np.column_stack([
+        np.repeat(song_ids, fanout),
+        rng.choice(chords, fanout.sum(), p=weights / weights.sum()) + 1,
+    ])
+    return song_ids, pairs, rng.integers(0, 5, songs).astype(np.int8)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--songs", type=int, default=1_000_000)
+    ap.add_argument("--chords", type=int, default=400)
+    ap.add_argument("--queries", type=int, default=2000)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    bench_env()
+    from app.services.similar import SimilarSongsIndex
+
+    song_ids, pairs, genres = catalog(args.songs, args.chords, args.seed)
+    idx = SimilarSongsIndex()
+    started = time.perf_counter()
+    idx.bulk_load(song_ids, pairs, genres)
+    print(f"bulk_load: {time.perf_counter() - started:.2f} s, {len(pairs)} пар")
+
+    rng = np.random.default_rng(args.seed + 1)
+    for genre_weight in (0.0, 0.2):
+        took, found = [], 0
+        for sid in rng.integers(1, args.songs + 1, args.queries).tolist():
+            started = time.perf_counter()
+            found += len(idx.similar(sid, 10, genre_weight))
+            took.append(time.perf_counter() - started)
+        p50, p99 = np.percentile(took, [50, 99]) * 1000
+        print(f"similar(genre_weight={genre_weight}): p50 {p50:.2f} ms, p99 {p99:.2f} ms, "
+              f"в середньому {found / args.queries:.1f} результатів")
+
+    started = time.perf_counter()
+    for sid in range(args.songs + 1, args.songs + 10_001):
+        idx.add_song(sid, rng.integers(1, args.chords + 1, 6).tolist())
+    print(f"add_song: {(time.perf_counter() - started) / 10_000 * 1e6:.0f} µs")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "similar.npz")
+        started = time.perf_counter()
+        idx.save(path)
+        saved = time.perf_counter() - started
+        started = time.perf_counter()
+        SimilarSongsIndex().load(path)
+        print(f"save: {saved:.2f} s, load: {time.perf_counter() - started:.2f} s, "
+              f"{os.path.getsize(path) / 2**20:.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Знімок каталогу: повне збирання, інкрементальне після ``--changes`` змін і
+розмір проти холодного старту сторінками ``GET /songs``.
+
+Для холодного старту сторінками рахується кількість запитів і байти gzip-тіл
+(як їх стисне ``ResponseEncodingMiddleware``); знімок — один файл.
+
+    cd backend && python -m benchmarks.snapshot --songs 20000 --changes 10
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.datagen import Dataset, bench_env
+from benchmarks.loadtest import DEFAULT_DB
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db-url", default=DEFAULT_DB, help="цю базу буде очищено!")
+    ap.add_argument("--songs", type=int, default=Dataset.songs)
+    ap.add_argument("--changes", type=int, default=10)
+    ap.add_argument("--shard", type=int, default=1000)
+    ap.add_argument("--page", type=int, default=1000)
+    args = ap.parse_args()
+
+    bench_env()
+    from sqlalchemy import create_engine, update
+    from sqlalchemy.orm import Session
+
+    from app.api.endpoints.songs import _list_songs_stmt, _song_item
+    from app.core.encoding import compress, json_bytes
+    from app.models import Song
+    from app.services import catalog_changes
+    from app.services.catalog_snapshot import CatalogSnapshot
+    from benchmarks.datagen import generate, reset
+
+    engine = create_engine(args.db_url)
+    reset(engine)
+    ds = Dataset(songs=args.songs)
+    with Session(engine) as db:
+        generate(db, ds)
+        catalog_changes.ensure(db)
+
+    with Session(engine) as db, tempfile.TemporaryDirectory() as tmp:
+        requests, size, cursor = 0, 0, None
+        while True:
+            rows = db.execute(_list_songs_stmt(None, None, None, cursor).limit(args.page)).all()
+            requests += 1
+            size += len(compress(json_bytes([_song_item(s) for s in rows]), "gzip"))
+            if len(rows) < args.page:
+                break
+            cursor = [rows[-1].id]
+        print(f"{'':<30} {'запитів':>8} {'KiB':>9} {'ms':>9}")
+        print(f"{'GET /songs сторінками (gzip)':<30} {requests:>8} {size / 1024:>9.1f} {'':>9}")
+
+        snapshot = CatalogSnapshot(Path(tmp), shard_size=args.shard)
+        started = time.perf_counter()
+        manifest = snapshot.build(db)
+        took = (time.perf_counter() - started) * 1000
+        name = "знімок: повне збирання"
+        print(f"{name:<30} {1:>8} {manifest['bytes'] / 1024:>9.1f} {took:>9.1f}")
+
+        rng = random.Random(7)
+        for song_id in rng.sample(range(1, ds.songs + 1), args.changes):
+            db.execute(update(Song).where(Song.id == song_id).values(title=f"Змінена {song_id}"))
+            catalog_changes.record(db, catalog_changes.SONG, [song_id])
+            db.commit()
+        started = time.perf_counter()
+        manifest = snapshot.build(db)
+        took = (time.perf_counter() - started) * 1000
+        name = f"знімок: {args.changes} змін"
+        print(f"{name:<30} {1:>8} {manifest['bytes'] / 1024:>9.1f} {took:>9.1f}")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
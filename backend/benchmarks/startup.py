@@ -0,0 +1,140 @@
+"""
+Час старту воркерів: профіль імпортів і запуск uvicorn з ``--workers N``.
+
+Для кожного режиму схеми (``create_all`` і ``USE_ALEMBIC=true`` з проставленою
+``alembic_version``) і кожної кількості воркерів міряється:
+
+* до першої відповіді ``/metrics`` — коли застосунок уже приймає трафік;
+* до ``Application startup complete`` від усіх воркерів;
+* кроки ``app_startup_seconds`` (імпорти, схема, індекси) з того воркера,
+  що відповів.
+
+    cd backend && python -m benchmarks.startup --workers 1 4 --songs 20000
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import httpx
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from benchmarks.datagen import Dataset, bench_env, generate, reset
+from benchmarks.loadtest import DEFAULT_DB
+
+_IMPORT_RE = re.compile(r"import time:\s+(\d+) \|\s+\d+ \|\s+(\S+)")
+_STEP_RE = re.compile(r'^app_startup_seconds\{step="([^"]+)"\} (\S+)$', re.M)
+
+
+def import_profile(top: int) -> None:
+    """``-X importtime`` для ``app.main``: загальний час і найважчі пакети."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c",
+         "from benchmarks.datagen import bench_env; bench_env(); import app.main"],
+        capture_output=True, text=True, check=True,
+    ).stderr
+    own: Dict[str, int] = defaultdict(int)  # власний час модулів, згрупований за пакетом
+    for self_us, name in _IMPORT_RE.findall(out):
+        own[name.split(".")[0]] += int(self_us)
+    print(f"імпорт app.main: {sum(own.values()) / 1000:.0f} ms")
+    for name, us in sorted(own.items(), key=lambda kv: -kv[1])[:top]:
+        print(f"  {name:<24} {us / 1000:>7.1f} ms")
+
+
+def stamp(url: str) -> None:
+    """Те, що зробив би ``alembic upgrade head`` для вже створеної схеми."""
+    from app.core.schema import alembic_heads
+
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
+        conn.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)"))
+        for head in alembic_heads():
+            conn.execute(text("INSERT INTO alembic_version VALUES (:v)"), {"v": head})
+    engine.dispose()
+
+
+def launch(workers: int, port: int, env: dict) -> dict:
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.loadtest:make_app", "--factory",
+         "--port", str(port), "--workers", str(workers), "--log-level", "info", "--no-access-log"],
+        env=env, stderr=subprocess.PIPE, text=True,
+    )
+    complete: List[float] = []
+    lines: List[str] = []
+
+    def read() -> None:
+        for line in proc.stderr:
+            lines.append(line)
+            if "Application startup complete" in line:
+                complete.append(time.perf_counter() - started)
+
+    reader = threading.Thread(target=read, daemon=True)
+    reader.start()
+    base = f"http://127.0.0.1:{port}"
+    try:
+        first = None
+        deadline = started + 300
+        while time.perf_counter() < deadline and (first is None or len(complete) < workers):
+            if first is None:
+                try:
+                    metrics = httpx.get(base + "/metrics").text
+                    first = time.perf_counter() - started
+                except httpx.TransportError:
+                    pass
+            if proc.poll() is not None:
+                raise RuntimeError("uvicorn завершився:\n" + "".join(lines[-20:]))
+            time.sleep(0.02)
+        if first is None or len(complete) < workers:
+            raise RuntimeError("воркери не стартували за 300 s")
+        steps = {step: float(value) for step, value in _STEP_RE.findall(metrics)}
+        return {"first": first, "all": max(complete), "steps": steps}
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db-url", default=DEFAULT_DB, help="цю базу буде очищено!")
+    ap.add_argument("--reuse", action="store_true", help="не перегенеровувати базу")
+    ap.add_argument("--songs", type=int, default=Dataset.songs)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--port", type=int, default=8767)
+    ap.add_argument("--top", type=int, default=10)
+    args = ap.parse_args()
+
+    bench_env()
+    import_profile(args.top)
+    if not args.reuse:
+        engine = create_engine(args.db_url)
+        reset(engine)
+        with Session(engine) as db:
+            generate(db, Dataset(songs=args.songs))
+        engine.dispose()
+    stamp(args.db_url)
+
+    env = {**os.environ, "BENCH_DB_URL": args.db_url, "SIMILAR_INDEX_PATH": ""}
+    for mode, use_alembic in (("create_all", "false"), ("alembic", "true")):
+        for workers in args.workers:
+            runs = [
+                launch(workers, args.port, {**env, "USE_ALEMBIC": use_alembic})
+                for _ in range(args.repeat)
+            ]
+            best = min(runs, key=lambda r: r["first"])
+            steps = ", ".join(f"{k} {v * 1000:.0f}" for k, v in best["steps"].items())
+            print(f"{mode:<10} workers={workers}: перша відповідь "
+                  f"{min(r['first'] for r in runs):.2f} s, усі воркери {min(r['all'] for r in runs):.2f} s "
+                  f"(кроки, ms: {steps})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+import os
+
+# Settings() вимагає ці змінні; для тестів БД не потрібна
+os.environ.setdefault("DB_USER", "test")
+os.environ.setdefault("DB_PASSWORD", "test")
+os.environ.setdefault("SECRET_KEY", "test")
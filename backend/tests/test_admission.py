@@ -0,0 +1,105 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from app.core.admission import AdmissionMiddleware, GradientLimit, classify
+
+
+def test_classify():
+    assert classify("POST", "/login") == "auth"
+    assert classify("POST", "/songs/7/upload-audio") == "uploads"
+    assert classify("POST", "/songs/import") == "admin"
+    assert classify("PUT", "/users/3/role") == "admin"
+    assert classify("DELETE", "/songs/7") == "admin"
+    assert classify("GET", "/songs/7") == "catalog"
+    assert classify("PATCH", "/chords/me/saved") == "catalog"
+    assert classify("GET", "/changes") == "catalog"
+    assert classify("GET", "/media/songs/a.wav") is None
+    assert classify("GET", "/metrics") is None
+
+
+def _load(limit: GradientLimit, rtt: float, samples: int) -> None:
+    for _ in range(samples):
+        limit.in_flight = int(limit.limit)  # клас використовує весь ліміт
+        limit.release(rtt)
+
+
+def test_limit_grows_while_latency_holds_and_backs_off_when_it_climbs():
+    limit = GradientLimit(10, min_limit=2, max_limit=100)
+    _load(limit, 0.010, 50)
+    grown = limit.limit
+    assert grown > 20
+
+    _load(limit, 0.100, 30)  # затримка вдесятеро — ліміт падає
+    assert limit.limit < grown / 2
+
+    _load(limit, 0.010, 200)  # відпустило — знову росте
+    assert limit.limit > grown
+
+
+def test_idle_class_does_not_inflate_limit():
+    limit = GradientLimit(10, max_limit=100)
+    for _ in range(100):
+        assert limit.acquire()
+        limit.release(0.001)
+    assert limit.limit == 10 and limit.in_flight == 0
+
+
+def test_over_limit_gets_fast_503():
+    api = FastAPI()
+    gate = asyncio.Event()
+
+    @api.get("/songs/{song_id}")
+    async def song(song_id: int):
+        await gate.wait()
+        return {"id": song_id}
+
+    @api.post("/login")
+    async def login():
+        return {}
+
+    api.add_middleware(AdmissionMiddleware, limits={"catalog": (1, 1, 1), "auth": (1, 1, 1)},
+                       retry_after=3)
+
+    async def go():
+        transport = httpx.ASGITransport(app=api)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as http:
+            first = asyncio.create_task(http.get("/songs/1"))
+            await asyncio.sleep(0.05)
+            rejected = await http.get("/songs/2")
+            other_class = await http.post("/login")
+            gate.set()
+            return await first, rejected, other_class, await http.get("/songs/3")
+
+    first, rejected, other_class, after = asyncio.run(go())
+    assert first.status_code == 200 and after.status_code == 200
+    assert rejected.status_code == 503 and rejected.headers["retry-after"] == "3"
+    assert "перевантажений" in rejected.json()["detail"]
+    assert other_class.status_code == 200
+
+
+def test_stream_frees_slot_after_headers():
+    gate = asyncio.Event()
+
+    async def export(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await gate.wait()  # клієнт повільно читає тіло
+        await send({"type": "http.response.body", "body": b"{}\n"})
+
+    async def send(message):
+        pass
+
+    admission = AdmissionMiddleware(export, limits={"catalog": (1, 1, 1)})
+    limit = admission.limits["catalog"]
+    scope = {"type": "http", "method": "GET", "path": "/songs", "query_string": b"stream=ndjson"}
+
+    async def go():
+        task = asyncio.create_task(admission(scope, None, send))
+        await asyncio.sleep(0.05)
+        assert limit.in_flight == 0  # слот вільний для інших запитів каталогу
+        gate.set()
+        await task
+
+    asyncio.run(go())
+    assert limit.in_flight == 0 and limit.short_rtt == 0.0  # тривалість стріму — не затримка
@@ -0,0 +1,137 @@
+import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+from app.api.endpoints import changes, songs
+from app.core import database
+from app.core.principals import principal_cache
+from app.core.security import create_access_token
+from app.models import Base, CatalogChange, Chord, Song, SongChord, User, UserRole
+from app.services import catalog_changes
+from app.services.song_import import import_songs
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'changes.db'}")
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=engine, autoflush=False))
+    with database.SessionLocal() as db:
+        db.add(User(username="admin", hashed_password="x", role=UserRole.ADMIN))
+        db.add_all(Chord(name=n, strings_json="[0,2,2,1,0,0]") for n in ["Am", "C", "G"])
+        db.flush()
+        db.add_all(Song(title=f"s{i}", author_id=1) for i in range(1, 6))
+        db.flush()
+        db.add_all(SongChord(song_id=1, chord_id=c) for c in (2, 1))
+        db.commit()
+        catalog_changes.ensure(db)
+
+    app = FastAPI()
+    app.include_router(changes.router)
+    app.include_router(songs.router)
+    with TestClient(app) as http:
+        http.headers["Authorization"] = "Bearer " + create_access_token({"sub": "admin"})
+        yield http
+    principal_cache.clear()
+    engine.dispose()
+
+
+def _sync(client, since=0, limit=1000) -> dict:
+    r = client.get("/changes", params={"since": since, "limit": limit})
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_initial_sync_pages_through_existing_catalog(client):
+    first = _sync(client, limit=3)
+    assert first["more"] and [s["id"] for s in first["songs"]] == [1, 2, 3]
+    assert first["songs"][0]["chord_ids"] == [2, 1]
+    rest = _sync(client, first["version"], limit=100)
+    assert not rest["more"] and [s["id"] for s in rest["songs"]] == [4, 5]
+    assert [c["name"] for c in rest["chords"]] == ["Am", "C", "G"]
+    assert rest["chords"][0]["strings"] == [0, 2, 2, 1, 0, 0]
+    assert _sync(client, rest["version"])["songs"] == []
+
+
+def test_mutations_produce_upserts_and_tombstones(client):
+    head = _sync(client)["version"]
+    r = client.post("/songs", json={"title": "Нова", "chord_ids": [3]})
+    new_id = r.json()["id"]
+    assert client.delete("/songs/2").status_code == 200
+
+    delta = _sync(client, head)
+    assert [(s["id"], s["chord_ids"]) for s in delta["songs"]] == [(new_id, [3])]
+    assert delta["deleted"] == {"songs": [2], "chords": []}
+    assert delta["version"] == head + 2
+
+    # повна синхронізація — без надгробків
+    assert 2 not in [s["id"] for s in _sync(client)["songs"]]
+    assert _sync(client, head + 100)["version"] == head + 100  # репліка відстає — чекаємо
+
+
+def test_log_keeps_one_row_per_entity(client):
+    with database.SessionLocal() as db:
+        before = db.query(CatalogChange).count()
+        imported = import_songs(db, [(1, '{"title": "i1", "chords": "Am"}')], author_id=1)
+        assert imported.imported == 1
+        for _ in range(3):
+            catalog_changes.record(db, catalog_changes.SONG, [1, 1, 3])
+        db.commit()
+        assert db.query(CatalogChange).count() == before + 1
+
+
+def test_compacted_tombstones_force_full_resync(client):
+    head = _sync(client)["version"]
+    client.delete("/songs/3")
+    with database.SessionLocal() as db:
+        old = datetime.datetime.utcnow() - datetime.timedelta(days=40)
+        db.execute(update(CatalogChange).values(changed_at=old))
+        db.commit()
+        assert catalog_changes.compact(db, tombstone_days=30) == 1
+
+    r = client.get("/changes", params={"since": head})
+    assert r.status_code == 410
+    assert 3 not in [s["id"] for s in _sync(client)["songs"]]
+    assert client.get("/changes", params={"since": head + 1}).status_code == 200
+
+
+def test_orm_chord_changes_are_recorded(client):
+    head = _sync(client)["version"]
+    with database.SessionLocal() as db:
+        before = catalog_changes.chord_version(db)
+        db.get(Chord, 2).name = "C/G"
+        db.add(Chord(name="Em", strings_json="[0,2,2,0,0,0]"))
+        db.delete(db.get(Chord, 3))
+        db.commit()
+        after = catalog_changes.chord_version(db)
+        assert after > before and catalog_changes.versions(db)[0] == after
+        db.get(Chord, 1).name = "Am"  # те саме значення — без запису
+        db.commit()
+        assert catalog_changes.versions(db)[0] == after
+
+    delta = _sync(client, head)
+    assert [(c["id"], c["name"]) for c in delta["chords"]] == [(2, "C/G"), (4, "Em")]
+    assert delta["deleted"]["chords"] == [3]
+
+
+def test_import_batch_is_split_across_pages(client):
+    head = _sync(client)["version"]
+    with database.SessionLocal() as db:
+        rows = [(n, f'{{"title": "i{n}", "chords": "Am"}}') for n in range(1, 6)]
+        assert import_songs(db, rows, author_id=1, update_indexes=False).imported == 5
+
+    seen, since, after = [], head, None
+    while True:  # одна версія на всю пачку, а сторінка — не більше limit сутностей
+        params = {"since": since, "limit": 2, **({"after": after} if after else {})}
+        page = client.get("/changes", params=params).json()
+        assert len(page["songs"]) <= 2
+        seen += [s["id"] for s in page["songs"]]
+        since, after = page["version"], page["after"]
+        if not page["more"]:
+            break
+    assert seen == [6, 7, 8, 9, 10] and since == head + 1 and after is None
+    assert client.get("/changes", params={"after": "e30"}).status_code == 400
@@ -0,0 +1,85 @@
+import gzip
+import json
+
+import pytest
+from sqlalchemy import create_engine, delete, update
+from sqlalchemy.orm import Session
+
+from app.models import Base, CatalogChange, Chord, Song, SongChord, User
+from app.services import catalog_changes
+from app.services.catalog_snapshot import CatalogSnapshot
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(User(username="admin", hashed_password="x"))
+        db.add_all(Chord(name=n, strings_json="[0,2,2,1,0,0]") for n in ["Am", "C"])
+        db.flush()
+        db.add_all(Song(title=f"s{i}", author_id=1) for i in range(1, 26))
+        db.flush()
+        db.add_all(SongChord(song_id=s, chord_id=1 + s % 2) for s in range(1, 26))
+        db.commit()
+        catalog_changes.ensure(db)
+        yield db
+
+
+def _lines(snapshot: CatalogSnapshot, manifest: dict) -> list:
+    raw = gzip.decompress((snapshot.directory / manifest["name"]).read_bytes())
+    return [json.loads(line) for line in raw.splitlines()]
+
+
+def test_snapshot_covers_catalog(db, tmp_path):
+    snapshot = CatalogSnapshot(tmp_path, shard_size=10)
+    manifest = snapshot.build(db)
+    assert snapshot.manifest() == manifest
+    assert sorted(manifest["shards"]) == ["chords", "songs-0", "songs-1", "songs-2"]
+
+    lines = _lines(snapshot, manifest)
+    assert lines[0] == {"type": "snapshot", "version": manifest["version"]}
+    assert [c["name"] for c in lines if c["type"] == "chord"] == ["Am", "C"]
+    songs = [s for s in lines if s["type"] == "song"]
+    assert [s["id"] for s in songs] == list(range(1, 26))
+    assert songs[0]["chord_ids"] == [2]
+    assert snapshot.build(db) is None  # версія та сама — нічого не збирається
+
+
+def test_only_touched_shards_are_rebuilt(db, tmp_path):
+    snapshot = CatalogSnapshot(tmp_path, shard_size=10)
+    before = snapshot.build(db)
+
+    db.execute(update(Song).where(Song.id == 12).values(title="нова назва"))
+    catalog_changes.record(db, catalog_changes.SONG, [12])
+    db.execute(delete(SongChord).where(SongChord.song_id == 25))
+    db.execute(delete(Song).where(Song.id == 25))
+    catalog_changes.record(db, catalog_changes.SONG, [25], deleted=True)
+    db.commit()
+
+    after = snapshot.build(db)
+    assert after["version"] == before["version"] + 2 and after["name"] != before["name"]
+    changed = {k for k in after["shards"] if after["shards"][k] != before["shards"].get(k)}
+    assert changed == {"songs-1", "songs-2"}
+    assert after["shards"]["songs-0"] == before["shards"]["songs-0"]
+
+    songs = {s["id"]: s for s in _lines(snapshot, after) if s["type"] == "song"}
+    assert songs[12]["title"] == "нова назва" and 25 not in songs
+
+    # той самий результат, що й повна перебудова з нуля
+    fresh = CatalogSnapshot(tmp_path / "fresh", shard_size=10).build(db)
+    assert fresh["name"] == after["name"]
+    assert sorted(p.name for p in (tmp_path / "shards").iterdir()) == sorted(
+        f"{d}.gz" for d in after["shards"].values()
+    )
+
+
+def test_refresh_compacts_change_log(db, tmp_path):
+    catalog_changes.record(db, catalog_changes.SONG, [25], deleted=True)
+    db.execute(delete(Song).where(Song.id == 25))
+    db.commit()
+    snapshot = CatalogSnapshot(tmp_path, shard_size=10, tombstone_days=0)
+    assert snapshot.refresh(db) is not None
+    head, horizon = catalog_changes.versions(db)
+    assert horizon == head
+    assert db.query(CatalogChange).filter(CatalogChange.deleted.is_(True)).count() == 0
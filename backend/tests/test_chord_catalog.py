@@ -0,0 +1,172 @@
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, delete, insert, update
+from sqlalchemy.orm import sessionmaker
+
+from app.api.endpoints import chords, songs
+from app.core import database
+from app.core.principals import principal_cache
+from app.core.security import create_access_token
+from app.models import Base, Chord, Song, SongChord, User, UserChord
+from app.services import catalog_changes
+from app.services.chord_catalog import ChordCatalog, chord_catalog
+from app.services.song_cache import song_cache
+
+
+@pytest.fixture
+def sessions(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'chords.db'}")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine, autoflush=False)
+    monkeypatch.setattr(database, "SessionLocal", factory)
+    with factory() as db:
+        db.add(User(username="admin", hashed_password="x"))
+        db.add_all([
+            Chord(name="Am", strings_json="[-1,0,2,2,1,0]", description="ля мінор"),
+            Chord(name="Am", strings_json="[5,7,7,5,5,5]"),
+            Chord(name="C", strings_json="[-1,3,2,0,1,0]"),
+            Chord(name="N.C.", strings_json="not json"),
+        ])
+        db.commit()
+        catalog_changes.ensure(db)
+    yield factory
+    engine.dispose()
+
+
+@pytest.fixture
+def client(sessions, monkeypatch):
+    monkeypatch.setattr(chord_catalog, "_snapshot", chord_catalog.snapshot)
+    with sessions() as db:
+        chord_catalog.rebuild(db)
+    app = FastAPI()
+    app.include_router(chords.router)
+    app.include_router(songs.router)
+    with TestClient(app) as http:
+        http.headers["Authorization"] = "Bearer " + create_access_token({"sub": "admin"})
+        yield http
+    principal_cache.clear()
+
+
+def _rename(db, chord_id: int, name: str) -> None:
+    db.execute(update(Chord).where(Chord.id == chord_id).values(name=name))
+    catalog_changes.record(db, catalog_changes.CHORD, [chord_id])
+    db.commit()
+
+
+def test_endpoints_serve_catalog_from_memory(client):
+    r = client.get("/chords")
+    assert [c["name"] for c in r.json()] == ["Am", "Am", "C", "N.C."]
+    assert r.json()[0] == {
+        "id": 1, "name": "Am", "strings": [-1, 0, 2, 2, 1, 0], "description": "ля мінор",
+        "image_url": None, "audio_url": None,
+    }
+    assert r.json()[3]["strings"] is None
+    again = client.get("/chords", headers={"If-None-Match": r.headers["etag"]})
+    assert again.status_code == 304 and again.content == b""
+
+    assert [c["id"] for c in client.get("/chords", params={"search": " a"}).json()] == [1, 2]
+    assert [c["id"] for c in client.get("/chords/by-name", params={"name": "Am "}).json()] == [1, 2]
+    assert client.get("/chords/by-name", params={"name": "am"}).json() == []
+    assert client.get("/chords/3").json()["strings"] == [-1, 3, 2, 0, 1, 0]
+    assert client.get("/chords/99").status_code == 404
+
+
+def test_version_change_reaches_other_workers(sessions):
+    catalog = ChordCatalog()  # інший воркер: зміну пише тест напряму в БД
+    with sessions() as db:
+        catalog.rebuild(db)
+        before = catalog.snapshot
+        assert not catalog.refresh(db)  # версія та сама — лише один запит
+
+        _rename(db, 3, "C/G")
+        assert catalog.refresh(db)
+    assert catalog.get(3).name == "C/G" and catalog.snapshot.etag != before.etag
+    # старий знімок незмінний — хто його вже взяв, дочитає цілим
+    assert before.by_id[3].name == "C"
+    with pytest.raises(TypeError):
+        before.by_id[3] = None
+
+
+def test_miss_is_checked_in_db_and_wakes_reload(sessions):
+    catalog = ChordCatalog()
+    with sessions() as db:
+        catalog.rebuild(db)
+        db.execute(insert(Chord).values(name="G", strings_json="[3,2,0,0,0,3]"))  # повз ORM
+        db.commit()
+        found = catalog.lookup(db, [5, 1, 5, 42])
+        assert sorted(found) == [1, 5] and found[5].strings == (3, 2, 0, 0, 0, 3)
+        assert catalog.get(5) is None
+        # версія не змінилась (журнал не знає про вставку), але промах позначив знімок застарілим
+        assert catalog.refresh(db) and catalog.get(5).name == "G"
+
+
+def test_background_thread_picks_up_changes(sessions):
+    catalog = ChordCatalog()
+    catalog.start(sessions, interval=0.05)
+    try:
+        with sessions() as db:
+            _rename(db, 1, "A-")
+        deadline = time.monotonic() + 5
+        while catalog.get(1) is None or catalog.get(1).name != "A-":
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        assert catalog.get(1).name == "A-"
+        assert [c.id for c in catalog.by_name("Am")] == [2]
+    finally:
+        catalog.stop()
+
+
+def test_names_of_chords_missing_from_snapshot(client, sessions):
+    with sessions() as db:  # акорд, якого знімок ще не бачив
+        db.execute(insert(Chord).values(name="G", strings_json="[3,2,0,0,0,3]"))
+        db.add(Song(title="Пісня", author_id=1))
+        db.flush()
+        db.add_all([SongChord(song_id=1, chord_id=5), UserChord(user_id=1, chord_id=5)])
+        db.commit()
+    assert chord_catalog.get(5) is None
+    try:
+        detail = client.get("/songs/1").json()
+        assert detail["chords"] == [{"id": 5, "name": "G"}]
+        assert client.get("/chords/me/saved").json() == [{"id": 5, "name": "G"}]
+    finally:
+        song_cache.invalidate([1])
+
+
+def test_orm_change_wakes_reload_only_after_commit(sessions, monkeypatch):
+    catalog = ChordCatalog()
+    monkeypatch.setattr("app.services.chord_catalog.chord_catalog", catalog)
+    with sessions() as db:
+        catalog.rebuild(db)
+        db.get(Chord, 3).name = "C/G"
+        db.flush()
+        assert not catalog._wake.is_set()  # до коміту перечитування побачило б старе
+        db.rollback()
+        db.commit()
+        assert not catalog._wake.is_set()
+        db.get(Chord, 3).name = "C/G"
+        db.commit()
+        assert catalog._wake.is_set()
+
+
+def test_write_path_checks_ids_in_db(sessions):
+    catalog = ChordCatalog()
+    with sessions() as db:
+        catalog.rebuild(db)
+        db.execute(delete(Chord).where(Chord.id == 2))  # видалив інший воркер
+        db.commit()
+        assert catalog.get(2) is not None
+        assert catalog.existing(db, [1, 2, 1, 42]) == [1]
+        assert catalog.refresh(db) and catalog.get(2) is None
+
+
+def test_readers_wait_for_first_read_in_thread(sessions):
+    catalog = ChordCatalog()  # старт воркера: каталог читає потік, запит приходить раніше
+    catalog.start(sessions, 0)
+    try:
+        assert [c.id for c in catalog.by_name("Am")] == [1, 2]
+    finally:
+        catalog.stop()
+    assert catalog.reloads == 1
@@ -0,0 +1,39 @@
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.models import Song, SongChord, UserChord, UserSong
+from benchmarks.datagen import Dataset, generate, reset
+
+DS = Dataset(users=30, chords=40, songs=300, seed=7)
+
+
+def _dump(ds: Dataset) -> dict:
+    engine = create_engine("sqlite://")
+    reset(engine)
+    with Session(engine) as db:
+        generate(db, ds)
+        return {
+            "songs": db.execute(select(Song.id, Song.title, Song.genre).order_by(Song.id)).all(),
+            "song_chords": db.execute(select(SongChord.song_id, SongChord.chord_id)).all(),
+            "user_songs": db.execute(select(UserSong.user_id, UserSong.song_id)).all(),
+            "user_chords": db.execute(select(UserChord.user_id, UserChord.chord_id)).all(),
+        }
+
+
+def test_same_seed_same_data_and_scratch_is_unsaved():
+    first = _dump(DS)
+    assert first == _dump(DS)
+    assert first["songs"] != _dump(Dataset(users=30, chords=40, songs=300, seed=8))["songs"]
+
+    assert len(first["songs"]) == DS.songs
+    assert max(s for _, s in first["user_songs"]) < DS.scratch_from
+
+    fanout = {}
+    for song_id, _ in first["song_chords"]:
+        fanout[song_id] = fanout.get(song_id, 0) + 1
+    assert len(fanout) == DS.songs and 3 <= min(fanout.values()) and max(fanout.values()) <= 12
+
+
+def test_fingerprint_tracks_parameters():
+    assert DS.fingerprint() == Dataset(users=30, chords=40, songs=300, seed=7).fingerprint()
+    assert DS.fingerprint() != Dataset(users=30, chords=40, songs=301, seed=7).fingerprint()
@@ -0,0 +1,121 @@
+import gzip
+import json
+
+import pytest
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core import encoding
+from app.core.encoding import (
+    JSON,
+    NegotiatedResponse,
+    ResponseEncodingMiddleware,
+    choose_coding,
+    encoded,
+    negotiate,
+)
+from app.services.song_cache import MemoryBackend, SongDetailCache
+
+ITEMS = [{"id": i, "title": f"пісня {i}", "genre": None} for i in range(200)]
+
+
+def _app() -> FastAPI:
+    api = FastAPI(default_response_class=NegotiatedResponse)
+    cache = SongDetailCache(MemoryBackend(1 << 20, 60))
+    body = cache.put(1, {"id": 1, "lyrics": "ля " * 2000})
+
+    @api.get("/songs")
+    def songs(response: Response):
+        response.headers["X-Next-Cursor"] = "abc"
+        return encoded(ITEMS, response)
+
+    @api.get("/small")
+    def small():
+        return {"id": 1, "keys": {2: "int-ключ"}}
+
+    @api.get("/detail")
+    def detail(request: Request):
+        return cache.respond(body, request.headers)
+
+    @api.get("/stream")
+    def stream():
+        lines = (json.dumps(item).encode() + b"\n" for item in ITEMS)
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+
+    @api.get("/audio")
+    def audio():
+        return Response(b"\0" * 10_000, media_type="audio/wav")
+
+    api.add_middleware(ResponseEncodingMiddleware, min_size=512)
+    return api
+
+
+def test_large_json_is_gzipped_small_is_not():
+    with TestClient(_app()) as client:
+        r = client.get("/songs", headers={"Accept-Encoding": "gzip"})
+        assert r.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in r.headers["vary"] and "Accept" in r.headers["vary"]
+        assert r.headers["x-next-cursor"] == "abc"
+        assert r.json() == ITEMS
+
+        r = client.get("/small", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in r.headers
+        assert r.json() == {"id": 1, "keys": {"2": "int-ключ"}}
+
+        r = client.get("/songs", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in r.headers and r.json() == ITEMS
+
+
+def test_stream_is_compressed_incrementally_and_media_is_not():
+    with TestClient(_app()) as client:
+        r = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+        assert r.headers["content-encoding"] == "gzip" and "content-length" not in r.headers
+        assert [json.loads(line) for line in r.text.splitlines()] == ITEMS
+
+        r = client.get("/audio", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in r.headers and len(r.content) == 10_000
+
+
+def test_compressed_etag_is_weak_and_still_revalidates():
+    with TestClient(_app()) as client:
+        r = client.get("/detail", headers={"Accept-Encoding": "gzip"})
+        assert r.headers["content-encoding"] == "gzip"
+        etag = r.headers["etag"]
+        assert etag.startswith('W/"')
+        again = client.get("/detail", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+        assert again.status_code == 304
+
+
+def test_gzip_body_is_plain_gzip():
+    assert gzip.decompress(encoding.compress(b"x" * 1000, "gzip")) == b"x" * 1000
+
+
+def test_accept_encoding_choice():
+    assert choose_coding(None) is None
+    assert choose_coding("gzip;q=0, identity") is None
+    assert choose_coding("deflate, *;q=0.5") in ("gzip", "br")
+    assert choose_coding("gzip, br") == ("br" if encoding.brotli is not None else "gzip")
+
+
+def test_negotiate_defaults_to_json():
+    assert negotiate(None) is JSON
+    assert negotiate("*/*") is JSON
+    assert negotiate("application/json") is JSON
+
+
+def test_msgpack_negotiation_and_body():
+    msgpack = pytest.importorskip("msgpack")
+    assert negotiate("application/msgpack") is encoding.MSGPACK
+    assert negotiate("application/x-msgpack, application/json") is encoding.MSGPACK
+    assert negotiate("application/json, application/msgpack") is JSON
+    assert negotiate("application/json;q=0.5, application/msgpack") is encoding.MSGPACK
+    assert negotiate("application/msgpack;q=0.1, */*") is JSON
+
+    with TestClient(_app()) as client:
+        r = client.get("/songs", headers={"Accept": "application/msgpack"})
+        assert r.headers["content-type"] == "application/msgpack"
+        assert msgpack.unpackb(r.content) == ITEMS
+        r = client.get("/detail", headers={"Accept": "application/msgpack"})
+        assert r.headers["content-type"] == "application/msgpack"
+        assert msgpack.unpackb(r.content)["id"] == 1
@@ -0,0 +1,67 @@
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.core import hashing
+from app.core.hashing import PasswordHasher
+from app.core.metrics import registry
+
+
+@pytest.fixture
+def hasher():
+    h = PasswordHasher(workers=1, queue_size=0)
+    yield h
+    h.shutdown()
+
+
+def test_roundtrip_and_metrics(hasher):
+    hashed = hasher.hash("Secret123")
+    assert hasher.verify("Secret123", hashed)
+    assert not hasher.verify("Secret124", hashed)
+    stats = hasher.stats()
+    assert stats["completed"] == 3 and stats["queue_depth"] == 0
+    assert stats["hash_ms"]["p50"] > 0
+
+
+def test_full_queue_fails_fast(hasher):
+    hasher.start()
+    busy = threading.Thread(target=hasher.hash, args=("Secret123",))
+    busy.start()
+    while hasher.stats()["queue_depth"] == 0:
+        time.sleep(0.001)
+    with pytest.raises(HTTPException) as exc:
+        hasher.hash("Secret123")
+    busy.join()
+    assert exc.value.status_code == 503
+    assert exc.value.headers == {"Retry-After": "1"}
+    assert hasher.stats()["rejected"] == 1
+
+
+def test_default_workers_share_cores_between_web_workers(monkeypatch):
+    monkeypatch.setattr(hashing.os, "cpu_count", lambda: 8)
+    assert PasswordHasher(web_workers=4).workers == 2
+    assert PasswordHasher(web_workers=16).workers == 1
+    assert PasswordHasher(3, web_workers=4).workers == 3
+
+
+def test_broken_pool_is_replaced(hasher):
+    hashed = hasher.hash("Secret123")
+    pool = hasher.start()
+    for process in list(pool._processes.values()):
+        process.kill()  # як OOM killer
+    try:
+        hasher.verify("Secret123", hashed)
+    except HTTPException as e:  # завдання встигло потрапити в зламаний пул
+        assert e.status_code == 503
+    assert hasher.verify("Secret123", hashed)
+    assert hasher.stats()["restarts"] == 1 and hasher.start() is not pool
+
+
+def test_gauges_on_metrics(hasher):
+    hasher.hash("Secret123")
+    hasher._collect()
+    text = registry.render()
+    assert "password_hash_queue_depth 0" in text
+    assert 'password_hash_latency_ms{stage="hash",quantile="p50"}' in text
@@ -0,0 +1,78 @@
+import hashlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.endpoints import media
+
+DATA = bytes(range(256)) * 4  # 1024 байти
+DIGEST = hashlib.sha256(DATA).hexdigest()
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    (tmp_path / f"{DIGEST}.mp3").write_bytes(DATA)
+    (tmp_path / "7_audio.mp3").write_bytes(DATA)
+    monkeypatch.setattr(media, "SONGS_DIR", tmp_path)
+    app = FastAPI()
+    app.include_router(media.router)
+    return TestClient(app)
+
+
+def test_full_and_conditional(client):
+    url = f"/media/songs/{DIGEST}.mp3"
+    r = client.get(url)
+    assert r.status_code == 200 and r.content == DATA
+    assert r.headers["etag"] == f'"{DIGEST}"'
+    assert r.headers["accept-ranges"] == "bytes"
+    assert "immutable" in r.headers["cache-control"]
+
+    assert client.get(url, headers={"If-None-Match": f'W/"{DIGEST}"'}).status_code == 304
+    ims = {"If-Modified-Since": r.headers["last-modified"]}
+    assert client.get(url, headers=ims).status_code == 304
+    head = client.head(url)
+    assert head.headers["content-length"] == "1024" and head.content == b""
+
+    # старі імена: ETag рахується з вмісту, кеш — з ревалідацією
+    legacy = client.get("/media/songs/7_audio.mp3")
+    assert legacy.headers["etag"] == f'"{DIGEST}"'
+    assert legacy.headers["cache-control"] == "public, no-cache"
+    assert client.get("/media/songs/.x.part").status_code == 404
+
+
+@pytest.mark.parametrize(
+    "header, start, end",
+    [
+        ("bytes=10-19", 10, 20),
+        ("bytes=1000-", 1000, 1024),
+        ("bytes=-24", 1000, 1024),
+        ("bytes=1020-5000", 1020, 1024),
+    ],
+)
+def test_single_range(client, header, start, end):
+    r = client.get(f"/media/songs/{DIGEST}.mp3", headers={"Range": header})
+    assert r.status_code == 206
+    assert r.content == DATA[start:end]
+    assert r.headers["content-range"] == f"bytes {start}-{end - 1}/1024"
+
+
+def test_multi_range_and_errors(client):
+    url = f"/media/songs/{DIGEST}.mp3"
+    r = client.get(url, headers={"Range": "bytes=0-3, 100-101"})
+    assert r.status_code == 206
+    boundary = r.headers["content-type"].split("boundary=")[1]
+    assert int(r.headers["content-length"]) == len(r.content)
+    parts = r.content.split(f"--{boundary}".encode())
+    assert parts[0] == b"" and parts[-1] == b"--\r\n"
+    assert parts[1].endswith(b"\r\n\r\n" + DATA[0:4] + b"\r\n")
+    assert b"Content-Range: bytes 100-101/1024" in parts[2]
+    assert parts[2].endswith(DATA[100:102] + b"\r\n")
+
+    unsatisfiable = client.get(url, headers={"Range": "bytes=2000-"})
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers["content-range"] == "bytes */1024"
+    # невалідний Range і застарілий If-Range — повний файл
+    assert client.get(url, headers={"Range": "bytes=9-1"}).status_code == 200
+    stale = {"Range": "bytes=0-1", "If-Range": '"other"'}
+    assert client.get(url, headers=stale).content == DATA
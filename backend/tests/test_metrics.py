@@ -0,0 +1,63 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.api.endpoints.metrics import router
+from app.core.metrics import (
+    POOL_WAIT,
+    QUERY_SECONDS,
+    Histogram,
+    MetricsMiddleware,
+    TimedQueuePool,
+    registry,
+    watch_pools,
+)
+
+
+def test_histogram_text_format():
+    h = Histogram("t_seconds", "test", ("route",), (0.1, 1.0))
+    for v in (0.05, 0.5, 0.5, 3.0):
+        h.observe(v, '/a"b')
+    assert h.render() == [
+        "# HELP t_seconds test",
+        "# TYPE t_seconds histogram",
+        't_seconds_bucket{route="/a\\"b",le="0.1"} 1',
+        't_seconds_bucket{route="/a\\"b",le="1"} 3',
+        't_seconds_bucket{route="/a\\"b",le="+Inf"} 4',
+        't_seconds_sum{route="/a\\"b"} 4.05',
+        't_seconds_count{route="/a\\"b"} 4',
+    ]
+
+
+def test_middleware_labels_by_route_template():
+    app = FastAPI()
+
+    @app.get("/things/{thing_id}")
+    def thing(thing_id: int):
+        return {"id": thing_id}
+
+    app.include_router(router)
+    client = TestClient(MetricsMiddleware(app))
+    for i in range(3):
+        client.get(f"/things/{i}")
+    client.get("/missing")
+
+    body = client.get("/metrics").text
+    assert 'http_request_duration_seconds_count{method="GET",route="/things/{thing_id}",status="200"} 3' in body
+    assert 'route="<unmatched>",status="404"' in body
+    assert 'http_response_size_bytes_sum{method="GET",route="/things/{thing_id}"} 24' in body
+    assert 'route="/metrics"' not in body
+    assert "http_requests_in_flight 0" in body
+
+
+def test_pool_wait_and_query_durations(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'm.db'}", poolclass=TimedQueuePool, pool_size=2)
+    watch_pools(lambda: [("test", engine.pool)])
+    before = QUERY_SECONDS._series.get((), [None, 0, 0])[2]
+    with engine.connect() as conn:
+        conn.execute(text("select 1"))
+        body = registry.render()
+    assert POOL_WAIT._series[("sync",)][2] >= 1
+    assert QUERY_SECONDS._series[()][2] == before + 1
+    assert 'db_pool_checked_out{pool="test"} 1' in body
+    assert 'db_pool_size{pool="test"} 2' in body
@@ -0,0 +1,23 @@
+import pytest
+from fastapi import HTTPException
+
+from app.core.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(42)) == [42]
+    assert decode_cursor(None) is None
+
+
+@pytest.mark.parametrize("values", [("x",), (None,), (1.5,), (True,), (-1,), (2**31,), ([1],), (1, 2)])
+def test_tampered_cursor_is_rejected(values):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(encode_cursor(*values))
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.parametrize("cursor", ["!!!", "e30", ""])
+def test_garbage_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor)
+    assert exc.value.status_code == 400
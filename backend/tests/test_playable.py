@@ -0,0 +1,58 @@
+from sqlalchemy import create_engine, delete
+from sqlalchemy.orm import Session
+
+from app.models import Base, Chord, Song, SongChord, User
+from app.services import catalog_changes
+from app.services.playable import PlayableIndex
+
+
+def test_query_tiers_by_missing_chords():
+    ix = PlayableIndex()
+    ix.bulk_load([1, 2, 3, 70], [(1, 1), (1, 2), (2, 1), (2, 2), (2, 3), (3, 4), (3, 5), (70, 1)])
+
+    assert ix.query({1, 2}, max_missing=0) == [(1, []), (70, [])]
+    assert ix.query({1, 2}, max_missing=1) == [(1, []), (70, []), (2, [3])]
+    assert ix.query({1, 2}, max_missing=2) == [(1, []), (70, []), (2, [3]), (3, [4, 5])]
+    assert ix.query({1, 2}, max_missing=2, limit=3) == [(1, []), (70, []), (2, [3])]
+
+
+def test_incremental_add_remove_grows_storage():
+    ix = PlayableIndex()
+    ix.bulk_load([1], [(1, 1)])
+    ix.add_song(500, [1, 130])  # нові місткість за піснями й за акордами
+    assert ix.query({1, 130}, max_missing=0) == [(1, []), (500, [])]
+    assert ix.query({1}, max_missing=1) == [(1, []), (500, [130])]
+
+    ix.remove_song(1)
+    assert ix.query({1}, max_missing=1) == [(500, [130])]
+    assert len(ix) == 1
+
+
+def test_refresh_follows_change_log():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(User(username="admin", hashed_password="x"))
+        db.add_all(Chord(name=n) for n in ["Am", "C"])
+        db.add_all(Song(id=i, title=f"s{i}", author_id=1) for i in (1, 2, 5))
+        db.flush()
+        db.add_all(SongChord(song_id=i, chord_id=1) for i in (1, 2, 5))
+        db.commit()
+        catalog_changes.ensure(db)
+        ix = PlayableIndex(refresh_interval=0)
+        ix.rebuild(db)
+
+        # інший воркер: id 3 закомічено вже після 5, пісню 2 видалено
+        db.add(Song(id=3, title="s3", author_id=1))
+        db.flush()
+        db.add(SongChord(song_id=3, chord_id=2))
+        catalog_changes.record(db, catalog_changes.SONG, [3])
+        db.execute(delete(SongChord).where(SongChord.song_id == 2))
+        db.execute(delete(Song).where(Song.id == 2))
+        catalog_changes.record(db, catalog_changes.SONG, [2], deleted=True)
+        db.commit()
+
+        ix.refresh(db)
+        assert ix.query({1}, max_missing=0) == [(1, []), (5, [])]
+        assert ix.query({2}, max_missing=0) == [(3, [])]
+    engine.dispose()
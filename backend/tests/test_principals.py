@@ -0,0 +1,43 @@
+import time
+
+from app.core.principals import Principal, PrincipalCache
+from app.models import UserRole
+
+ALICE = Principal(1, "alice", UserRole.USER)
+BOB = Principal(2, "bob", UserRole.ADMIN)
+
+
+def test_hits_misses_and_lru_bound():
+    cache = PrincipalCache(ttl=60, max_size=2)
+    assert cache.get("t1") is None
+    cache.put("t1", ALICE)
+    cache.put("t2", BOB)
+    assert cache.get("t1") == ALICE  # t1 тепер найсвіжіший
+    cache.put("t3", BOB)
+    assert cache.get("t2") is None
+    assert cache.get("t1") == ALICE and len(cache) == 2
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_expiry_and_invalidation():
+    cache = PrincipalCache(ttl=60)
+    cache.put("expired", ALICE, token_exp=time.time() - 1)
+    assert cache.get("expired") is None
+
+    cache.put("a1", ALICE)
+    cache.put("a2", ALICE)
+    cache.put("b1", BOB)
+    cache.invalidate_user(ALICE.id)
+    assert cache.get("a1") is None and cache.get("a2") is None
+    assert cache.get("b1") == BOB
+
+
+def test_admin_entries_expire_sooner(monkeypatch):
+    cache = PrincipalCache(ttl=60, admin_ttl=5)
+    cache.put("a", ALICE)
+    cache.put("b", BOB)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 10)
+    # інший воркер зняв роль адміністратора — кеш тут перечитає користувача
+    assert cache.get("b") is None
+    assert cache.get("a") == ALICE
@@ -0,0 +1,187 @@
+"""
+Бюджет SQL-запитів для кожного маршруту з ``app/api/endpoints``.
+
+Кожен випадок виконується на свіжій SQLite-БД з холодними кешами (principal,
+деталі пісні), тож у число входить і пошук користувача за токеном. Перевищення
+бюджету — регресія (N+1, зайвий refresh тощо); якщо запитів стало менше,
+бюджет варто зменшити. Async-роутери проганяються тими самими випадками.
+"""
+import importlib
+import pkgutil
+from collections import namedtuple
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.api.endpoints as endpoints
+from app.api.endpoints import media, songs
+from app.core import database
+from app.core.principals import principal_cache
+from app.core.querystats import QueryStatsMiddleware
+from app.core.security import create_access_token, hash_password
+from app.models import Base, Chord, Song, SongChord, User, UserChord, UserRole, UserSong
+from app.services import catalog_changes
+from app.services.catalog_snapshot import catalog_snapshot
+from app.services.chord_catalog import chord_catalog
+from app.services.playable import playable_index
+from app.services.search import song_index
+from app.services.similar import similar_index
+from app.services.song_cache import song_cache
+from app.services.transpose import transposer
+
+ASYNC_MODULES = ("auth_async", "chords_async", "songs_async", "users_async")
+SYNC_MODULES = ("auth", "chords", "songs", "users", "chord_save", "changes", "media", "metrics")
+AUDIO = "a" * 64 + ".wav"
+SNAPSHOT = "b" * 64 + ".gz"
+USER_HASH = hash_password("Passw0rd!")
+
+Case = namedtuple("Case", "method route url kwargs budget")
+
+
+def _upload(name: str, data: bytes = b"x" * 128) -> dict:
+    return {"files": {"file": (name, data)}}
+
+
+CASES = [
+    Case("POST", "/register", "/register", {"json": {"username": "newbie", "password": "Passw0rd!"}}, 2),
+    Case("POST", "/login", "/login", {"json": {"username": "user", "password": "Passw0rd!"}}, 1),
+    Case("POST", "/chords/{chord_id}/save", "/chords/3/save", {}, 4),
+    Case("DELETE", "/chords/{chord_id}/save", "/chords/1/save", {}, 3),
+    Case("GET", "/chords/me/saved", "/chords/me/saved", {}, 2),
+    Case("PATCH", "/chords/me/saved", "/chords/me/saved", {"json": {"add": [3, 4, 99], "remove": [1]}}, 3),
+    Case("GET", "/chords/me/saved", "/chords/me/saved?stream=json", {}, 2),
+    Case("GET", "/chords/voicings", "/chords/voicings?frets=022100", {}, 2),
+    Case("GET", "/chords/voicings/nearest", "/chords/voicings/nearest?frets=x2210?", {}, 2),
+    Case("GET", "/chords/voicings/by-name", "/chords/voicings/by-name?name=Am", {}, 2),
+    Case("GET", "/chords", "/chords", {}, 1),
+    Case("GET", "/chords", "/chords?search=m", {}, 1),
+    Case("GET", "/chords/by-name", "/chords/by-name?name=Am", {}, 1),
+    Case("GET", "/chords/{chord_id}", "/chords/2", {}, 1),
+    Case("GET", "/changes", "/changes?since=0", {}, 6),
+    Case("GET", "/changes/snapshot", "/changes/snapshot", {}, 1),
+    Case("GET", "/media/catalog/{name}", f"/media/catalog/{SNAPSHOT}", {}, 0),
+    Case("GET", "/media/songs/{name}", f"/media/songs/{AUDIO}", {}, 0),
+    Case("GET", "/metrics", "/metrics", {}, 0),
+    Case("POST", "/songs", "/songs", {"json": {"title": "Нова", "chord_ids": [1, 2]}}, 9),
+    Case("POST", "/songs/import", "/songs/import", _upload("s.ndjson", b'{"title": "I", "chords": "Am C"}\n'), 10),
+    Case("GET", "/songs", "/songs", {}, 2),
+    Case("GET", "/songs", "/songs?search=пісня", {}, 2),
+    Case("GET", "/songs/playable", "/songs/playable", {}, 3),
+    Case("GET", "/songs/me/saved", "/songs/me/saved", {}, 2),
+    Case("PATCH", "/songs/me/saved", "/songs/me/saved", {"json": {"add": [1, 2, 99], "remove": [3]}}, 3),
+    Case("GET", "/songs/detail-cache", "/songs/detail-cache", {}, 1),
+    Case("GET", "/songs/{song_id}", "/songs/1", {}, 4),
+    Case("GET", "/songs/{song_id}", "/songs/2", {}, 3),
+    Case("DELETE", "/songs/{song_id}", "/songs/1", {}, 8),
+    Case("POST", "/songs/{song_id}/upload-sheet", "/songs/1/upload-sheet", _upload("s.pdf"), 6),
+    Case("POST", "/songs/{song_id}/upload-audio", "/songs/1/upload-audio", _upload("s.wav"), 6),
+    Case("GET", "/songs/transpose", "/songs/transpose?ids=1&ids=2&semitones=2", {}, 3),
+    Case("GET", "/songs/{song_id}/transpose", "/songs/1/transpose?semitones=3&capo=1", {}, 3),
+    Case("GET", "/songs/{song_id}/similar", "/songs/1/similar?genre_weight=0.1", {}, 3),
+    Case("GET", "/songs/{song_id}/peaks", "/songs/1/peaks", {}, 2),
+    Case("POST", "/songs/{song_id}/save", "/songs/2/save", {}, 3),
+    Case("DELETE", "/songs/{song_id}/save", "/songs/1/save", {}, 3),
+    Case("GET", "/users", "/users", {}, 2),
+    Case("GET", "/users/principal-cache", "/users/principal-cache", {}, 1),
+    Case("GET", "/users/password-hasher", "/users/password-hasher", {}, 1),
+    Case("PUT", "/users/{user_id}/role", "/users/2/role", {"json": "admin"}, 3),
+]
+
+
+def _route_key(method: str, path: str) -> tuple:
+    return method, path.replace(":int}", "}")
+
+
+def test_every_route_has_a_budget():
+    budgeted = {_route_key(c.method, c.route) for c in CASES}
+    missing = []
+    for info in pkgutil.iter_modules(endpoints.__path__):
+        module = importlib.import_module(f"{endpoints.__name__}.{info.name}")
+        for route in module.router.routes:
+            for method in route.methods - {"HEAD"}:
+                if _route_key(method, route.path) not in budgeted:
+                    missing.append(f"{info.name}: {method} {route.path}")
+    assert not missing
+
+
+@pytest.fixture(params=["sync", "async"])
+def api(request, tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'budget.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=engine, autoflush=False))
+    monkeypatch.setattr(media, "SONGS_DIR", tmp_path)
+    monkeypatch.setattr(songs, "SONGS_DIR", tmp_path)
+    (tmp_path / AUDIO).write_bytes(b"RIFF")
+    monkeypatch.setattr(catalog_snapshot, "directory", tmp_path / "catalog")
+    monkeypatch.setattr(chord_catalog, "_snapshot", chord_catalog.snapshot)
+
+    app = FastAPI()
+    if request.param == "async":
+        pytest.importorskip("aiosqlite")
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        async_engine = create_async_engine(url.replace("sqlite:", "sqlite+aiosqlite:", 1))
+        monkeypatch.setattr(
+            database,
+            "AsyncSessionLocal",
+            async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False),
+        )
+        for name in ASYNC_MODULES:
+            app.include_router(importlib.import_module(f"app.api.endpoints.{name}").router)
+    for name in SYNC_MODULES:
+        app.include_router(importlib.import_module(f"app.api.endpoints.{name}").router)
+
+    with database.SessionLocal() as db:
+        db.add(User(username="admin", hashed_password="x", role=UserRole.ADMIN))
+        db.add(User(username="user", hashed_password=USER_HASH))
+        db.add_all(Chord(name=n, strings_json="[0,2,2,1,0,0]") for n in ["Am", "C", "G", "Em"])
+        db.flush()
+        db.add_all([
+            Song(title="Перша пісня", lyrics="пісня", author_id=1, audio_url=f"/media/songs/{AUDIO}"),
+            Song(title="Друга пісня", author_id=1),
+        ])
+        db.flush()
+        db.add_all(SongChord(song_id=1, chord_id=c) for c in (1, 2, 3))
+        db.add_all([UserChord(user_id=1, chord_id=1), UserChord(user_id=1, chord_id=2)])
+        db.add(UserSong(user_id=1, song_id=1))
+        catalog_changes.bootstrap(db)
+        db.commit()
+        song_index.rebuild(db)
+        playable_index.rebuild(db)
+        similar_index.rebuild(db)
+        catalog_snapshot.build(db)
+        chord_catalog.rebuild(db)
+        song_cache.reset(db)
+        transposer.rebuild(db)
+    (tmp_path / "catalog" / SNAPSHOT).write_bytes(b"\x1f\x8b")
+
+    completed = []
+    client = TestClient(
+        QueryStatsMiddleware(app, record=True, on_complete=lambda scope, stats: completed.append(stats))
+    )
+    client.headers["Authorization"] = "Bearer " + create_access_token({"sub": "admin"})
+    yield client, completed
+    principal_cache.clear()
+    song_cache.invalidate([1, 2])
+    if request.param == "async":
+        import anyio
+
+        anyio.run(async_engine.dispose)
+    engine.dispose()
+
+
+@pytest.mark.parametrize("case", CASES, ids=lambda c: f"{c.method} {c.url}")
+def test_query_budget(api, case):
+    client, completed = api
+    principal_cache.clear()
+    song_cache.invalidate([1, 2])
+    response = client.request(case.method, case.url, **case.kwargs)
+    assert response.status_code < 400, response.text
+    stats = completed[-1]
+    assert stats.count <= case.budget, "\n".join(stats.statements)
+    if "stream=" not in case.url:  # тіло стріму читається вже після заголовків
+        assert response.headers["x-db-queries"] == str(stats.count)
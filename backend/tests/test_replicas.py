@@ -0,0 +1,154 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core import replicas
+from app.core.replicas import ReadRoutingMiddleware, ReplicaSet, RoutingSession
+from app.models import Base, Chord
+
+
+def _sqlite(path, name):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(Chord(id=1, name=name))
+        db.commit()
+    return engine
+
+
+@pytest.fixture
+def dbs(tmp_path, monkeypatch):
+    """Primary і репліка — окремі SQLite-файли з різними назвами акорду 1."""
+    primary = _sqlite(tmp_path / "primary.db", "primary")
+    rs = ReplicaSet(retry=60)
+    rs.add("replica0", _sqlite(tmp_path / "replica.db", "replica"))
+    monkeypatch.setattr(replicas, "replica_set", rs)
+    yield sessionmaker(class_=RoutingSession, bind=primary), rs
+    primary.dispose()
+    rs.replicas[0].engine.dispose()
+
+
+def _name(db) -> str:
+    return db.get(Chord, 1, populate_existing=True).name
+
+
+def test_session_reads_replica_until_it_writes(dbs):
+    make, _ = dbs
+    with make() as db:
+        assert _name(db) == "primary"  # поза HTTP-запитом — лише primary
+
+    token = replicas._replica_reads.set(True)
+    try:
+        with make() as db:
+            assert _name(db) == "replica"
+            db.add(Chord(name="new"))
+            db.flush()
+            assert _name(db) == "primary"  # після запису сесія лишається на primary
+            db.rollback()
+    finally:
+        replicas._replica_reads.reset(token)
+
+
+def test_failed_replica_leaves_rotation(dbs, tmp_path):
+    make, rs = dbs
+    broken = rs.add("replica1", create_engine(f"sqlite:///{tmp_path}/missing/replica.db"))
+    token = replicas._replica_reads.set(True)
+    try:
+        names = set()
+        for _ in range(4):
+            with make() as db:
+                try:
+                    names.add(_name(db))
+                except OperationalError:
+                    names.add("error")
+        assert names == {"replica", "error"}
+        assert not rs.healthy(broken)
+        with make() as db:
+            assert {_name(db) for _ in range(3)} == {"replica"}
+
+        rs.replicas[0].down_until = broken.down_until  # обидві впали — читаємо з primary
+        with make() as db:
+            assert _name(db) == "primary"
+
+        broken.down_until = 1.0  # пауза минула — репліка знову в ротації
+        assert rs.pick() is broken and broken.down_until == 0.0
+    finally:
+        replicas._replica_reads.reset(token)
+
+
+def test_read_your_writes(dbs, monkeypatch):
+    make, _ = dbs
+
+    def get_db():
+        with make() as db:
+            yield db
+
+    api = FastAPI()
+
+    @api.get("/chord")
+    def chord(db: Session = Depends(get_db)):
+        return _name(db)
+
+    @api.post("/chord")
+    def touch(db: Session = Depends(get_db)):
+        db.get(Chord, 1).description = "seen"
+        db.commit()
+        return _name(db)
+
+    @api.post("/lookup")
+    def lookup(db: Session = Depends(get_db)):
+        return _name(db)  # POST без запису
+
+    api.add_middleware(ReadRoutingMiddleware, window=30)
+    alice = {"Authorization": "Bearer alice"}
+    bob = {"Authorization": "Bearer bob"}
+    with TestClient(api) as client:
+        assert client.get("/chord", headers=alice).json() == "replica"
+        read_only = client.post("/lookup", headers=alice)
+        assert read_only.json() == "primary" and "set-cookie" not in read_only.headers
+        assert client.get("/chord", headers=alice).json() == "replica"
+        written = client.post("/chord", headers=alice)
+        assert written.json() == "primary"
+        assert "db_primary_until=" in written.headers["set-cookie"]
+        client.cookies.clear()
+        assert client.get("/chord", headers=alice).json() == "primary"
+        assert client.get("/chord", headers=bob).json() == "replica"
+
+    # інший воркер не знає про запис, але бачить cookie
+    with TestClient(api) as client:
+        cookie = written.headers["set-cookie"].split(";")[0]
+        assert client.get("/chord", headers={**bob, "Cookie": cookie}).json() == "primary"
+        monkeypatch.setattr(replicas.time, "time", lambda: 2e10)
+        assert client.get("/chord", headers=alice).json() == "replica"
+
+
+def test_pinned_requests_are_flagged(dbs):
+    make, _ = dbs
+
+    def get_db():
+        with make() as db:
+            yield db
+
+    api = FastAPI()
+
+    @api.get("/pinned")
+    def is_pinned():
+        return replicas.pinned()  # sync-ендпоінт: контекст копіюється в потік
+
+    @api.post("/chord")
+    def touch(db: Session = Depends(get_db)):
+        db.get(Chord, 1).description = "seen"
+        db.commit()
+
+    api.add_middleware(ReadRoutingMiddleware, window=30)
+    alice = {"Authorization": "Bearer alice"}
+    with TestClient(api) as client:
+        assert client.get("/pinned", headers=alice).json() is False
+        client.post("/chord", headers=alice)
+        assert client.get("/pinned", headers=alice).json() is True
+        client.cookies.clear()
+        assert client.get("/pinned", headers={"Authorization": "Bearer bob"}).json() is False
+    assert replicas.pinned() is False
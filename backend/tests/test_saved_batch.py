@@ -0,0 +1,50 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.core.saved import SAVED_BATCH_MAX, _statements, apply_saved_batch, batch_ids
+from app.models import Base, Chord, Song, User, UserChord, UserSong
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(User(username="user", hashed_password="x"))
+        db.add_all(Song(title=f"s{i}", author_id=1) for i in range(1, 6))
+        db.add_all(Chord(name=f"c{i}") for i in range(1, 4))
+        db.commit()
+        yield db
+
+
+def _saved(db, link, column) -> list:
+    return db.scalars(select(getattr(link, column)).order_by(getattr(link, column))).all()
+
+
+def test_batch_is_idempotent_and_skips_unknown_ids(db):
+    assert apply_saved_batch(db, UserSong, 1, [1, 2, 3, 99], []) == {"added": 3, "removed": 0}
+    assert apply_saved_batch(db, UserSong, 1, [1, 2, 3, 99], []) == {"added": 0, "removed": 0}
+    assert apply_saved_batch(db, UserSong, 1, [4], [1, 5]) == {"added": 1, "removed": 1}
+    assert _saved(db, UserSong, "song_id") == [2, 3, 4]
+
+    assert apply_saved_batch(db, UserChord, 1, [1, 3], []) == {"added": 2, "removed": 0}
+    assert apply_saved_batch(db, UserChord, 1, [], [3, 3]) == {"added": 0, "removed": 1}
+    assert _saved(db, UserChord, "chord_id") == [1]
+
+
+def test_batch_validation():
+    assert batch_ids([3, 1, 3], [2]) == ([1, 3], [2])
+    with pytest.raises(HTTPException):
+        batch_ids([1], [1])
+    with pytest.raises(HTTPException):
+        batch_ids(list(range(SAVED_BATCH_MAX + 1)), [])
+
+
+def test_postgres_uses_on_conflict():
+    add, remove = _statements("postgresql", UserSong, 1, [1, 2], [3])
+    sql = str(add.compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (user_id, song_id) DO NOTHING" in sql and "NOT EXISTS" not in sql
+    assert "DELETE FROM user_songs" in str(remove.compile(dialect=postgresql.dialect()))
@@ -0,0 +1,36 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.core.schema import VERSIONS_DIR, alembic_heads, check_schema
+from app.models import Base
+
+
+def test_heads_of_shipped_migrations():
+    assert alembic_heads() == {"0003"}
+    assert (VERSIONS_DIR / "0001_initial_schema.py").exists()
+
+
+def test_heads_follow_down_revision_chain(tmp_path):
+    (tmp_path / "a.py").write_text('revision = "a"\ndown_revision = None\n')
+    (tmp_path / "b.py").write_text("revision: str = 'b'\ndown_revision = 'a'\n")
+    (tmp_path / "c.py").write_text('revision = "c"\ndown_revision = "a"\n')
+    assert alembic_heads(tmp_path) == {"b", "c"}
+    (tmp_path / "m.py").write_text('revision = "m"\ndown_revision = ("b", "c")\n')
+    assert alembic_heads(tmp_path) == {"m"}
+
+
+def test_check_schema():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with pytest.raises(RuntimeError, match="alembic upgrade head"):
+        check_schema(engine)  # немає alembic_version
+
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)"))
+        conn.execute(text("INSERT INTO alembic_version VALUES ('0000')"))
+    with pytest.raises(RuntimeError, match="0000"):
+        check_schema(engine)
+
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE alembic_version SET version_num = '0003'"))
+    check_schema(engine)
@@ -0,0 +1,80 @@
+from sqlalchemy import create_engine, delete
+from sqlalchemy.orm import Session
+
+from app.models import Base, Song, User
+from app.services import catalog_changes
+from app.services.search import SongSearchIndex, tokenize
+
+
+def test_tokenize_mixed_scripts():
+    assert tokenize("Червона Рута, м’ята — Café don't ҐАНОК") == [
+        "червона", "рута", "мята", "cafe", "dont", "ганок",
+    ]
+
+
+def test_ranked_prefix_and_incremental():
+    ix = SongSearchIndex()
+    ix.add(1, "Червона рута", "Ти признайся мені")
+    ix.add(2, "Café del mar", "червона троянда")
+    ix.add(3, "Рута", None)
+
+    # збіг у назві важить більше, ніж у тексті
+    assert [sid for sid, _ in ix.search("червона")] == [1, 2]
+    # останнє слово — префікс, усі слова обов'язкові
+    assert [sid for sid, _ in ix.search("червона ру")] == [1]
+    assert [sid for sid, _ in ix.search("cafe")] == [2]
+
+    ix.remove(1)
+    assert [sid for sid, _ in ix.search("червона")] == [2]
+    assert ix.search("признайся") == []
+
+
+def test_compaction_keeps_readded_song():
+    ix = SongSearchIndex(delta_limit=2)
+    ix.bulk_load([(1, "Ой у лузі", None), (2, "Lullaby", None)])
+    ix.remove(1)
+    ix.add(1, "Ой у гаю", None)  # той самий id після видалення з бази
+    ix.add(3, "Гаю мій", None)  # дельта досягла ліміту → злиття в базу
+
+    assert {sid for sid, _ in ix.search("гаю")} == {1, 3}
+    assert ix.search("лузі") == []
+    assert len(ix) == 3
+
+
+def test_refresh_follows_change_log():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(User(username="admin", hashed_password="x"))
+        db.add_all(Song(id=i, title=f"пісня {i}", author_id=1) for i in (1, 2, 5))
+        db.commit()
+        catalog_changes.ensure(db)
+        ix = SongSearchIndex(refresh_interval=0)
+        ix.rebuild(db)
+
+        # інший воркер: id 3 закомічено вже після 5, пісню 2 видалено
+        db.add(Song(id=3, title="пізня пісня", author_id=1))
+        catalog_changes.record(db, catalog_changes.SONG, [3])
+        db.execute(delete(Song).where(Song.id == 2))
+        catalog_changes.record(db, catalog_changes.SONG, [2], deleted=True)
+        db.commit()
+
+        ix.refresh(db)
+        assert {sid for sid, _ in ix.search("пісня")} == {1, 3, 5}
+        assert [sid for sid, _ in ix.search("пізня")] == [3]
+    engine.dispose()
+
+
+def test_first_refresh_builds_the_index():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(User(username="admin", hashed_password="x"))
+        db.add_all(Song(id=i, title=f"пісня {i}", author_id=1) for i in (1, 2))
+        db.commit()
+        catalog_changes.ensure(db)
+        ix = SongSearchIndex()  # воркер стартував без rebuild — індекс будує перший запит
+        assert not ix.ready
+        ix.refresh(db)
+        assert ix.ready and {sid for sid, _ in ix.search("пісня")} == {1, 2}
+    engine.dispose()
@@ -0,0 +1,100 @@
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.models import Base, Chord, Genre, Song, SongChord, User
+from app.services import catalog_changes
+from app.services.similar import SimilarSongsIndex
+
+SONGS = {
+    1: ([1, 2, 3, 4], Genre.ROCK),
+    2: ([1, 2, 3, 4], Genre.POP),  # той самий набір
+    3: ([1, 2, 3, 4, 5], Genre.ROCK),
+    4: ([6, 7, 8], Genre.ROCK),
+    5: ([], Genre.ROCK),
+}
+
+
+def _db() -> Session:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = Session(engine)
+    db.add(User(username="admin", hashed_password="x"))
+    db.add_all(Chord(name=f"c{i}") for i in range(1, 9))
+    for sid, (chords, genre) in SONGS.items():
+        db.add(Song(id=sid, title=f"s{sid}", genre=genre, author_id=1))
+        db.add_all(SongChord(song_id=sid, chord_id=c) for c in chords)
+    db.commit()
+    return db
+
+
+def test_similar_ranks_by_jaccard_and_genre():
+    idx = SimilarSongsIndex()
+    with _db() as db:
+        idx.rebuild(db)
+    hits = idx.similar(1)
+    assert [h[0] for h in hits][:2] == [2, 3]
+    assert hits[0][2] == 1.0 and 4 not in [h[0] for h in hits]
+    # бонус за жанр піднімає рок-пісню над поп-піснею з ідентичним набором
+    assert [h[0] for h in idx.similar(1, genre_weight=0.5)][:2] == [3, 2]
+    assert idx.similar(5) == [] and idx.similar(99) is None
+
+
+def test_incremental_matches_bulk():
+    bulk, inc = SimilarSongsIndex(), SimilarSongsIndex(compact_at=3)
+    with _db() as db:
+        bulk.rebuild(db)
+    for sid, (chords, genre) in SONGS.items():
+        inc.add_song(sid, chords, genre)
+    assert inc.similar(1) == bulk.similar(1)
+    inc.remove_song(2)
+    assert 2 not in [h[0] for h in inc.similar(1)]
+
+
+def test_persisted_signatures_catch_up_with_db(tmp_path):
+    path = str(tmp_path / "sig.npz")
+    with _db() as db:
+        first = SimilarSongsIndex()
+        first.open(db, path)
+        db.query(SongChord).filter(SongChord.song_id == 2).delete()
+        db.query(Song).filter(Song.id == 2).delete()
+        db.add(Song(id=6, title="s6", genre=Genre.ROCK, author_id=1))
+        db.add_all(SongChord(song_id=6, chord_id=c) for c in (1, 2, 3, 4))
+        db.commit()
+
+        restarted = SimilarSongsIndex()
+        assert restarted.load(path) and len(restarted) == 5
+        restarted.sync(db)
+        assert [h[0] for h in restarted.similar(1)][:2] == [6, 3]
+        assert not SimilarSongsIndex(seed=2).load(path)  # інші хеш-функції — файл не годиться
+
+
+def test_refresh_follows_change_log():
+    with _db() as db:
+        catalog_changes.ensure(db)
+        idx = SimilarSongsIndex(refresh_interval=0)
+        idx.rebuild(db)
+
+        # інший воркер: пісню 2 видалено, 4 отримала акорди пісні 1
+        db.query(SongChord).filter(SongChord.song_id.in_([2, 4])).delete()
+        db.query(Song).filter(Song.id == 2).delete()
+        catalog_changes.record(db, catalog_changes.SONG, [2], deleted=True)
+        db.add_all(SongChord(song_id=4, chord_id=c) for c in (1, 2, 3, 4))
+        catalog_changes.record(db, catalog_changes.SONG, [4])
+        db.commit()
+
+        idx.refresh(db)
+    assert idx.similar(2) is None
+    assert [h[0] for h in idx.similar(1)][:2] == [4, 3]
+
+
+def test_signatures_estimate_jaccard():
+    idx = SimilarSongsIndex()
+    rng = np.random.default_rng(0)
+    a, b = set(rng.choice(1000, 60, replace=False)), set(rng.choice(1000, 60, replace=False))
+    b |= set(list(a)[:40])
+    ids = np.array([1, 2])
+    pairs = np.array([(1, c) for c in a] + [(2, c) for c in b])
+    sig = idx.signatures(ids, pairs)
+    exact = len(a & b) / len(a | b)
+    assert abs((sig[0] == sig[1]).mean() - exact) < 0.2
@@ -0,0 +1,93 @@
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.models import Base
+from app.services import catalog_changes
+from app.services.song_cache import MemoryBackend, SongDetailCache, etag_for
+
+
+def test_memory_backend_is_bounded_by_bytes():
+    backend = MemoryBackend(max_bytes=10, ttl=60)
+    backend.set("1", b"aaaa")
+    backend.set("2", b"bbbb")
+    assert backend.get("1") == b"aaaa"  # 1 тепер найсвіжіший
+    backend.set("3", b"cccc")
+    assert backend.get("2") is None
+    assert backend.get("1") == b"aaaa" and backend.get("3") == b"cccc"
+    assert backend.size() == 8
+
+    backend.set("big", b"x" * 11)  # більше за весь кеш — не кешується
+    assert backend.get("big") is None and backend.size() == 8
+
+
+def test_memory_backend_ttl():
+    backend = MemoryBackend(max_bytes=100, ttl=0.01)
+    backend.set("1", b"a")
+    time.sleep(0.02)
+    assert backend.get("1") is None and backend.size() == 0
+
+
+def test_etag_304_and_counters():
+    cache = SongDetailCache(MemoryBackend(max_bytes=1024, ttl=60))
+    assert cache.get(1) is None
+    body = cache.put(1, {"id": 1, "title": "Пісня"})
+    assert cache.get(1) == body
+
+    first = cache.respond(body, {})
+    assert first.status_code == 200 and first.body == body
+    assert first.headers["etag"] == etag_for(body)
+
+    again = cache.respond(body, {"if-none-match": f'"x", W/{etag_for(body)}'})
+    assert again.status_code == 304 and again.body == b""
+
+    cache.invalidate([1])
+    assert cache.get(1) is None
+    changed = cache.put(1, {"id": 1, "title": "Інша"})
+    assert etag_for(changed) != etag_for(body)
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["not_modified"]) == (1, 2, 1)
+    assert stats["bytes_saved"] == len(body)
+
+
+def test_put_after_invalidate_is_not_cached():
+    cache = SongDetailCache(MemoryBackend(max_bytes=1024, ttl=60))
+    generation = cache.generation
+    assert cache.get(1) is None  # промах: читаємо з БД…
+    cache.invalidate([1])  # …а тим часом пісню змінили
+    cache.put(1, {"id": 1, "title": "Стара"}, generation)
+    assert cache.get(1) is None
+    cache.put(1, {"id": 1, "title": "Нова"}, cache.generation)
+    assert cache.get(1) is not None
+
+
+def test_change_feed_retires_only_changed_songs_in_other_workers(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'cache.db'}")
+    Base.metadata.create_all(engine)
+    # два воркери, у кожного своя пам'ять; зміну робить перший
+    first = SongDetailCache(MemoryBackend(max_bytes=1024, ttl=60), refresh_interval=0)
+    other = SongDetailCache(MemoryBackend(max_bytes=1024, ttl=60), refresh_interval=0)
+    with Session(engine) as db:
+        catalog_changes.ensure(db)
+        for cache in (first, other):
+            cache.refresh(db)
+            for song_id in (1, 2):
+                cache.put(song_id, {"id": song_id}, cache.generation)
+
+        catalog_changes.record(db, catalog_changes.SONG, [1])
+        db.commit()
+        first.invalidate([1])
+        other.refresh(db)
+        assert other.get(1) is None and first.get(1) is None
+        assert other.get(2) is not None  # решта кешу лишається
+        assert other.stats()["version"] == 1
+
+        # зміна акорду — нова chord_version, старі ключі більше не читаються
+        catalog_changes.record(db, catalog_changes.CHORD, [1])
+        db.commit()
+        other.refresh(db)
+        assert other.get(2) is None
+        assert other.stats()["chord_version"] == catalog_changes.chord_version(db)
+    engine.dispose()
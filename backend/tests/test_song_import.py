@@ -0,0 +1,93 @@
+import io
+import json
+
+import pytest
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, Chord, Song, SongChord, User, UserRole
+from app.services.song_import import import_songs, iter_rows
+
+NDJSON = """\
+{"title": "Червона рута", "chords": ["Am", "c", 3], "genre": "pop"}
+not json
+
+{"title": "Червона рута", "chords": "Am"}
+{"title": "Lullaby", "chords": "Am;H7"}
+{"title": "Ой у лузі", "chords": "Am G", "genre": "metal"}
+{"title": "Ніч яка місячна", "chords": "Am G"}
+"""
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as session:
+        session.add(User(username="admin", hashed_password="x", role=UserRole.ADMIN))
+        session.add_all(Chord(name=n) for n in ["Am", "C", "G"])
+        session.commit()
+        yield session
+
+
+def test_ndjson_batches_errors_and_resume(db):
+    batches = []
+    report = import_songs(
+        db, iter_rows(io.StringIO(NDJSON), "ndjson"), 1, batch_size=2,
+        on_batch=lambda r: batches.append(r.checkpoint), update_indexes=False,
+    )
+    assert report.imported == 2
+    assert [(e["line"], e["error"]) for e in report.errors] == [
+        (2, "Невалідний JSON"),
+        (4, "Пісня з такою назвою вже існує"),
+        (5, "Акорд не знайдено: H7"),
+        (6, "Невідомий жанр: metal"),
+    ]
+    assert report.checkpoint == 7 and batches[-1] == 7
+    song = db.scalar(select(Song).where(Song.title == "Червона рута"))
+    assert sorted(db.scalars(select(SongChord.chord_id).where(SongChord.song_id == song.id))) == [1, 2, 3]
+
+    # повторний запуск з checkpoint нічого не дублює
+    again = import_songs(
+        db, iter_rows(io.StringIO(NDJSON), "ndjson"), 1, start_line=report.checkpoint,
+        update_indexes=False,
+    )
+    assert (again.imported, again.failed) == (0, 0)
+
+
+def test_csv_multiline_lyrics(db):
+    src = 'title,lyrics,genre,chords\n"Пісня","рядок 1\nрядок 2",rock,Am C\nБез акордів,,,\n'
+    report = import_songs(db, iter_rows(io.StringIO(src), "csv"), 1, update_indexes=False)
+    assert report.imported == 1
+    assert report.errors == [{"line": 4, "error": "Не вказано акорди"}]
+    assert db.scalar(select(Song.lyrics)) == "рядок 1\nрядок 2"
+
+
+
+def test_non_utf8_csv_stops_with_row_error(db):
+    # перші пачки вже в UTF-8, далі — рядок, збережений у cp1251
+    good = "".join(f"Пісня {i},,,Am\n" for i in range(1, 501)).encode()
+    src = b"title,lyrics,genre,chords\n" + good + "Зламана,,,Am\n".encode("cp1251")
+    stream = io.TextIOWrapper(io.BytesIO(src), encoding="utf-8-sig", newline="")
+    report = import_songs(db, iter_rows(stream, "csv"), 1, batch_size=100, update_indexes=False)
+    assert report.imported > 0 and report.failed == 1
+    assert report.errors[0]["error"].startswith("Файл не в кодуванні UTF-8")
+    assert report.errors[0]["line"] == report.checkpoint + 1
+    assert db.scalar(select(func.count()).select_from(Song)) == report.imported
+
+def test_rejected_batch_is_retried_row_by_row(db):
+    # рядок, який пропустила валідація, але відхилила БД (як CHECK чи тип на Postgres)
+    db.execute(text(
+        "CREATE TRIGGER no_bad BEFORE INSERT ON songs WHEN NEW.title = 'Погана' "
+        "BEGIN SELECT RAISE(ABORT, 'погана назва'); END"
+    ))
+    db.commit()
+    src = "\n".join(
+        json.dumps({"title": t, "chords": "Am"}) for t in ["Перша", "Погана", "Третя"]
+    )
+    report = import_songs(db, iter_rows(io.StringIO(src), "ndjson"), 1, update_indexes=False)
+    assert report.imported == 2 and report.checkpoint == 3
+    assert [e["line"] for e in report.errors] == [2]
+    assert report.errors[0]["error"].startswith("Помилка БД: ")
+    assert sorted(db.scalars(select(Song.title))) == ["Перша", "Третя"]
+    assert db.scalar(select(func.count()).select_from(SongChord)) == 2
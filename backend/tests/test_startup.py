@@ -0,0 +1,17 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+
+def test_app_import_does_not_load_numpy():
+    # numpy та індекси — у фоновому прогріві або в першому запиті, а не в імпорті
+    lazy = ("numpy", "app.services.search")
+    code = f"import sys, app.main; print([m for m in {lazy!r} if m in sys.modules])"
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND, env=dict(os.environ),
+        capture_output=True, text=True, check=True,
+    )
+    assert out.stdout.strip() == "[]"
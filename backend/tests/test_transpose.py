@@ -0,0 +1,84 @@
+import numpy as np
+from sqlalchemy import create_engine, delete
+from sqlalchemy.orm import Session
+
+from app.models import Base, Chord, Song, SongChord, User
+from app.services import catalog_changes
+from app.services.transpose import Transposer, effective_shift, parse_name, transposer
+
+NAMES = {1: "Am", 2: "C", 3: "G", 4: "Bm", 5: "D", 6: "Bb7/F", 7: "N.C.", 8: "Am"}
+
+
+def test_parse_and_capo():
+    assert parse_name("C#m7/G#") == (1, "m7", 8)
+    assert parse_name("Bb") == (10, "", -1)
+    assert parse_name("N.C.") is None
+    assert effective_shift(2, 0) == 2
+    assert effective_shift(0, 2) == 10  # капо на 2 — грати на тон нижче
+    assert effective_shift(-1, 0) == 11
+
+
+def test_tables_prefer_catalog_chords():
+    t = Transposer()
+    t.build(NAMES)
+    ids, names = t.transpose(np.array([1, 2, 6, 7, 8, 99]), 2)
+    assert list(ids) == [4, 5, -1, 7, 4, -1]
+    assert list(names[:5]) == ["Bm", "D", "C7/G", "N.C.", "Bm"]
+    ids, names = t.transpose(np.array([6, 8]), 0)
+    assert list(ids) == [6, 8] and list(names) == ["Bb7/F", "Am"]
+    _, names = t.transpose(np.array([6]), 1)
+    assert list(names) == ["B7/F#"]
+
+
+def test_songs_memoized_until_forget():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add_all(Chord(name=n, strings_json="[0,2,2,1,0,0]") for n in ["Am", "C", "Bm", "D"])
+        db.add(User(username="admin", hashed_password="x"))
+        db.add(Song(title="Пісня", author_id=1))
+        db.flush()
+        db.add_all(SongChord(song_id=1, chord_id=c) for c in (1, 2))
+        db.commit()
+
+        songs = transposer.songs(db, [1, 42], 2)
+        assert list(songs) == [1]
+        assert [(c["id"], c["name"], c["original_id"]) for c in songs[1]] == [(3, "Bm", 1), (4, "D", 2)]
+        assert songs[1][0]["voicings"][0]["shape"] == "022100"
+
+        db.add(SongChord(song_id=1, chord_id=3))
+        db.commit()
+        assert len(transposer.songs(db, [1], 14)[1]) == 2  # той самий зсув — з кешу
+        transposer.forget(1)
+        assert len(transposer.songs(db, [1], 2)[1]) == 3
+
+        db.add(Chord(name="C#m", strings_json="[-1,4,6,6,5,4]"))
+        db.commit()  # зміна каталогу перебудовує таблиці й скидає кеш
+        assert transposer.songs(db, [1], 4)[1][0]["id"] == 5
+
+
+def test_changes_from_other_workers_drop_memo():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add_all(Chord(name=n, strings_json="[0,2,2,1,0,0]") for n in ["Am", "C", "Bm"])
+        db.add(User(username="admin", hashed_password="x"))
+        db.add_all([Song(title="Перша", author_id=1), Song(title="Друга", author_id=1)])
+        db.flush()
+        db.add_all(SongChord(song_id=s, chord_id=1) for s in (1, 2))
+        db.commit()
+        catalog_changes.ensure(db)
+        worker = Transposer(refresh_interval=0)
+        assert set(worker.songs(db, [1, 2], 2)) == {1, 2}
+
+        # інший воркер: пісні 1 додав акорд, пісню 2 видалив — forget був лише там
+        db.add(SongChord(song_id=1, chord_id=2))
+        catalog_changes.record(db, catalog_changes.SONG, [1])
+        db.execute(delete(SongChord).where(SongChord.song_id == 2))
+        db.execute(delete(Song).where(Song.id == 2))
+        catalog_changes.record(db, catalog_changes.SONG, [2], deleted=True)
+        db.commit()
+
+        songs = worker.songs(db, [1, 2], 2)
+        assert list(songs) == [1] and len(songs[1]) == 2
+    engine.dispose()
@@ -0,0 +1,59 @@
+import io
+
+import anyio
+
+import pytest
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi.testclient import TestClient
+
+from app.core.uploads import MULTIPART_SLACK, UploadLimitMiddleware, store_upload
+
+
+def test_store_upload_is_content_addressed(tmp_path):
+    first = store_upload(io.BytesIO(b"riff" * 1000), tmp_path, ".wav", 10_000, chunk_size=7)
+    second = store_upload(io.BytesIO(b"riff" * 1000), tmp_path, ".wav", 10_000)
+    assert first == second and first.endswith(".wav") and len(first) == 64 + 4
+    assert [p.name for p in tmp_path.iterdir()] == [first]
+
+    with pytest.raises(HTTPException) as exc:
+        store_upload(io.BytesIO(b"x" * 10_001), tmp_path, ".wav", 10_000, chunk_size=4096)
+    assert exc.value.status_code == 413
+    assert [p.name for p in tmp_path.iterdir()] == [first]  # без .part-залишків
+
+
+def test_middleware_rejects_while_receiving():
+    app = FastAPI()
+    app.add_middleware(UploadLimitMiddleware, max_bytes=1000, path_pattern=r"^/up")
+
+    @app.post("/up")
+    def up(file: UploadFile = File(...)):
+        return {"size": len(file.file.read())}
+
+    client = TestClient(app)
+    ok = client.post("/up", files={"file": ("a.wav", b"x" * 1000)})
+    assert ok.json() == {"size": 1000}
+
+    big = b"x" * (1000 + MULTIPART_SLACK + 1)
+    assert client.post("/up", files={"file": ("a.wav", big)}).status_code == 413
+
+    # без Content-Length (chunked) — обрив під час читання тіла
+    body = b"--b\r\nContent-Disposition: form-data; name=file; filename=a.wav\r\n\r\n" + big
+    chunks = (body[i:i + 8192] for i in range(0, len(body), 8192))
+    r = client.post("/up", content=chunks, headers={"Content-Type": "multipart/form-data; boundary=b"})
+    assert r.status_code == 413
+
+
+@pytest.mark.parametrize("length", [b"abc", b"-5", b"1e3"])
+def test_middleware_rejects_malformed_content_length(length):
+    async def endpoint(scope, receive, send):
+        raise AssertionError("запит не мав дійти до застосунку")
+
+    middleware = UploadLimitMiddleware(endpoint, max_bytes=1000, path_pattern=r"^/up")
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "path": "/up", "headers": [(b"content-length", length)]}
+    anyio.run(middleware, scope, None, send)
+    assert sent[0]["status"] == 400
@@ -0,0 +1,75 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.models import Base, Chord
+from app.services.shapes import format_shape, pack, parse_shape, unpack
+from app.services.voicings import VoicingIndex, voicing_index
+
+CATALOG = [
+    ("Am", "[-1,0,2,2,1,0]"),
+    ("Am", "[5,7,7,5,5,5]"),
+    ("C", "[-1,3,2,0,1,0]"),
+    ("E", "[0,2,2,1,0,0]"),
+    ("Em", "[0,2,2,0,0,0]"),
+    ("Bad", "[1,2,3]"),
+    ("Empty", None),
+]
+
+
+@pytest.fixture
+def index():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add_all(Chord(name=n, strings_json=s) for n, s in CATALOG)
+        db.commit()
+        idx = VoicingIndex()
+        idx.refresh(db)
+        return idx
+
+
+def test_pack_roundtrip_and_shapes():
+    for frets in [(-1, 0, 2, 2, 1, 0), (30, 30, 30, 30, 30, 30), (-1,) * 6]:
+        assert unpack(pack(frets)) == frets
+    assert pack((0,) * 6) != pack((-1,) * 6)
+    with pytest.raises(ValueError):
+        pack((31, 0, 0, 0, 0, 0))
+
+    assert parse_shape("x02210") == [-1, 0, 2, 2, 1, 0]
+    assert parse_shape("x,12,14,14,13,12") == [-1, 12, 14, 14, 13, 12]
+    assert parse_shape("x0221?", wildcards=True)[-1] is None
+    for bad in ("x0221?", "x0221", "x022100", "a02210"):
+        with pytest.raises(ValueError):
+            parse_shape(bad)
+    assert format_shape([-1, 12, 14, 14, 13, 12]) == "x,12,14,14,13,12"
+
+
+def test_exact_and_by_name(index):
+    assert len(index) == 5  # без некоректних аплікатур
+    assert [c["name"] for c in index.exact([-1, 0, 2, 2, 1, 0])] == ["Am"]
+    assert index.exact([3, 2, 0, 0, 0, 3]) == []
+    assert [c["shape"] for c in index.by_name("Am")] == ["x02210", "577555"]
+    assert index.by_name("Bad") == []
+
+
+def test_nearest_tolerates_muted_and_open(index):
+    # заглушена 6-та замість відкритої — майже E
+    hits = index.nearest([-1, 2, 2, 1, 0, 0], max_distance=2)
+    assert [(c["name"], c["distance"]) for c in hits] == [("E", 1), ("Em", 2)]
+    assert index.nearest([-1, 2, 2, 1, 0, 0], max_distance=2, open_cost=5) == []
+    # «?» — будь-що на струні
+    hits = index.nearest([None, 0, 2, 2, 1, None], max_distance=0)
+    assert [c["name"] for c in hits] == ["Am"]
+
+
+def test_orm_changes_mark_index_stale():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        voicing_index.rebuild(db)
+        assert voicing_index.exact([3, 2, 0, 0, 0, 3]) == []
+        db.add(Chord(name="G", strings_json="[3,2,0,0,0,3]"))
+        db.commit()
+        voicing_index.refresh(db)
+        assert [c["name"] for c in voicing_index.exact([3, 2, 0, 0, 0, 3])] == ["G"]
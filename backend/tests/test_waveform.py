@@ -0,0 +1,88 @@
+import wave
+
+import numpy as np
+import pytest
+
+from app.services import waveform
+from app.services.waveform import build_peaks, failed_path, peaks_path, read_level
+
+
+def _write_wav(path, samples: np.ndarray, width: int, rate: int = 8000) -> None:
+    scale = 2 ** (8 * width - 1) - 1
+    ints = np.round(samples * scale).astype("<i4")
+    raw = ints.astype("<i2").tobytes() if width == 2 else b"".join(
+        int(v).to_bytes(3, "little", signed=True) for v in ints.ravel()
+    )
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(samples.shape[1])
+        w.setsampwidth(width)
+        w.setframerate(rate)
+        w.writeframes(raw)
+
+
+@pytest.mark.parametrize("width", [2, 3])
+def test_levels_match_brute_force(tmp_path, monkeypatch, width):
+    monkeypatch.setattr(waveform, "BLOCK_FRAMES", waveform.BASE_SAMPLES * 8)  # кілька блоків
+    frames = 256 * 300 + 17  # неповна остання точка
+    t = np.arange(frames) / 8000
+    left = 0.9 * np.sin(2 * np.pi * 3 * t)
+    right = -0.5 * np.sin(2 * np.pi * 5 * t)
+    audio = tmp_path / "song.wav"
+    _write_wav(audio, np.stack([left, right], axis=1), width)
+
+    assert build_peaks(audio)
+    meta, data = read_level(peaks_path(audio), width=1)
+    assert meta == {"sample_rate": 8000, "frames": frames, "samples_per_peak": 512, "peaks": 151}
+
+    meta, data = read_level(peaks_path(audio), width=301)  # ≥ 301 точок — лише базовий рівень
+    assert meta["samples_per_peak"] == 256 and meta["peaks"] == 301
+    pairs = np.frombuffer(data, np.int8).reshape(-1, 2)
+    both = np.minimum(left, right), np.maximum(left, right)
+    for i in (0, 150, 300):
+        chunk = slice(i * 256, (i + 1) * 256)
+        assert abs(pairs[i, 0] - both[0][chunk].min() * 127) <= 1
+        assert abs(pairs[i, 1] - both[1][chunk].max() * 127) <= 1
+
+
+def test_unsupported_format(tmp_path):
+    audio = tmp_path / "song.mp3"
+    audio.write_bytes(b"ID3" + b"\0" * 100)
+    if waveform.soundfile is None:
+        assert not build_peaks(audio)
+        assert failed_path(audio).exists()  # маркер: повторно не декодуємо
+        assert not build_peaks(audio)
+    assert read_level(peaks_path(tmp_path / "missing.wav"), 100) is None
+
+
+def test_stale_or_truncated_sidecar_is_rebuilt(tmp_path):
+    audio = tmp_path / "song.wav"
+    _write_wav(audio, np.zeros((256 * 10, 1)), 2)
+    assert build_peaks(audio)
+    good = peaks_path(audio).read_bytes()
+
+    for broken in (good[:10], good[:-4], b"WFPK\x09" + good[5:]):
+        peaks_path(audio).write_bytes(broken)
+        assert read_level(peaks_path(audio), 1) is None
+        assert build_peaks(audio)
+        assert peaks_path(audio).read_bytes() == good
+
+
+def test_truncated_wav(tmp_path, monkeypatch):
+    audio = tmp_path / "song.wav"
+    _write_wav(audio, np.zeros((256 * 10, 2)), 2)
+    # завантаження обірвалося посеред кадру: заголовок обіцяє більше, ніж є
+    audio.write_bytes(audio.read_bytes()[:-3])
+    assert build_peaks(audio)
+    meta, _ = read_level(peaks_path(audio), 1)
+    assert meta["frames"] == 256 * 10 - 1
+
+    # будь-яка інша помилка декодування — маркер, а не повтор на кожен запит
+    broken = tmp_path / "broken.wav"
+    broken.write_bytes(audio.read_bytes())
+
+    def fail(path):
+        raise ValueError("buffer size must be a multiple of element size")
+
+    monkeypatch.setattr(waveform, "compute_peaks", fail)
+    assert not build_peaks(broken)
+    assert failed_path(broken).exists()